@@ -0,0 +1,158 @@
+# adaptive_concurrency.py
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from loguru import logger
+
+
+def parse_retry_after(value: str | None) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return 0.0
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease limit on in-flight requests.
+
+    The limit grows by one after a full window of successful requests (one per
+    allowed slot) while the smoothed latency stays under `latency_target`, and
+    is multiplied by `decrease_factor` on errors, 429s or slow responses (at
+    most once per `cooldown` seconds, so a burst of failures counts once).
+    A Retry-After header pauses every new request until it expires.
+    Every change of the limit is kept in `trace`, as (seconds, limit, reason).
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        floor: int,
+        ceiling: int,
+        latency_target: float,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        self.floor = max(floor, 1)
+        self.ceiling = max(ceiling, self.floor)
+        self.limit = min(max(initial, self.floor), self.ceiling)
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.latency = None
+        self._successes = 0
+        self._last_decrease = float("-inf")
+        self._paused_until = 0.0
+        self._start = time.monotonic()
+        self._condition = threading.Condition()
+        self.trace = [(0.0, self.limit, "start")]
+
+    def _set_limit(self, limit: int, reason: str):
+        limit = min(max(limit, self.floor), self.ceiling)
+        if limit == self.limit:
+            return
+        logger.debug(f"Concurrency {self.limit} -> {limit} ({reason})")
+        self.limit = limit
+        self._successes = 0
+        self.trace.append((time.monotonic() - self._start, limit, reason))
+        self._condition.notify_all()
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._set_limit(int(self.limit * self.decrease_factor), reason)
+
+    def _wait_time(self) -> float:
+        """Seconds before a slot can be taken, 0 if one is free now."""
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            return pause
+        return 0.0 if self.in_flight < self.limit else None
+
+    def _pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def pause(self, seconds: float):
+        """Holds every new request for `seconds` (requests in flight go on)."""
+        with self._condition:
+            self._pause(seconds)
+            self.trace.append((time.monotonic() - self._start, self.limit, "paused"))
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self._wait_time() == 0.0:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        """Blocks the calling thread until a request slot is available."""
+        with self._condition:
+            while True:
+                wait = self._wait_time()
+                if wait == 0.0:
+                    self.in_flight += 1
+                    return
+                self._condition.wait(timeout=wait)
+
+    async def acquire_async(self, poll_interval: float = 0.05):
+        """Waits on the event loop until a request slot is available."""
+        while not self.try_acquire():
+            await asyncio.sleep(poll_interval)
+
+    def release(
+        self,
+        latency: float = None,
+        error: bool = False,
+        status: int = None,
+        retry_after: str = None,
+    ):
+        """Frees a slot and feeds the outcome of the request to the controller."""
+        with self._condition:
+            self.in_flight -= 1
+            pause = parse_retry_after(retry_after)
+            if pause:
+                self._pause(pause)
+                logger.debug(f"Retry-After: pausing new requests for {pause:.1f}s")
+
+            if status == 429:
+                self._decrease("429")
+            elif error:
+                self._decrease(f"error {status}" if status else "error")
+            elif latency is not None:
+                self.latency = (
+                    latency
+                    if self.latency is None
+                    else 0.7 * self.latency + 0.3 * latency
+                )
+                if self.latency > self.latency_target:
+                    self._decrease(f"latency {self.latency:.2f}s")
+                else:
+                    self._successes += 1
+                    if self._successes >= self.limit:
+                        self._set_limit(self.limit + 1, "ok")
+            self._condition.notify_all()
+
+    def log_trace(self):
+        """Writes the evolution of the concurrency limit to the run log."""
+        limits = [limit for _, limit, _ in self.trace]
+        logger.info(
+            f"Adaptive concurrency: final {self.limit}, "
+            f"range {min(limits)}-{max(limits)}, {len(self.trace) - 1} changes."
+        )
+        logger.info(
+            "Concurrency trace: "
+            + " ".join(f"{t:.1f}s={limit}({reason})" for t, limit, reason in self.trace)
+        )
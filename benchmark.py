@@ -0,0 +1,974 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the hot spots of the pipeline, run offline on local fixtures.
+
+    poetry run python benchmark.py parser --fixtures data/fixtures/fpedia
+    poetry run python benchmark.py scrape --engine async --latency 0.1 --rate-429 0.05
+    poetry run python benchmark.py store
+    poetry run python benchmark.py load
+    poetry run python benchmark.py convenienza
+    poetry run python benchmark.py fstats
+    poetry run python benchmark.py sensitivity
+"""
+
+import ast
+import glob
+import gzip
+import os
+import random
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import click
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from rich.console import Console
+from rich.table import Table
+
+import config
+import convenienza_calculator
+import data_retriever
+import data_store
+import fpedia_parser
+import replay_server
+import scrape_journal
+
+console = Console()
+
+
+def _parse_attributi_giocatore_legacy(content: bytes) -> dict:
+    """Original per-field implementation, one CSS query per attribute."""
+    attributi = {}
+    soup = BeautifulSoup(content, "html.parser")
+
+    attributi["Nome"] = soup.select_one("h1").get_text().strip()
+
+    selettore = "div.col_one_fourth:nth-of-type(1) span.stickdan"
+    attributi["Punteggio"] = soup.select_one(selettore).text.strip().replace("/100", "")
+
+    selettore = "	div.col_one_fourth:nth-of-type(n+2) div"
+    medie = [el.find("span").text.strip() for el in soup.select(selettore)]
+    anni = [
+        el.find("strong").text.split(" ")[-1].strip() for el in soup.select(selettore)
+    ]
+    i = 0
+    for anno in anni:
+        attributi[f"Fantamedia anno {anno}"] = medie[i]
+        i += 1
+
+    selettore = "div.col_one_third:nth-of-type(2) div"
+    stats_ultimo_anno = soup.select_one(selettore)
+    parametri = [
+        el.text.strip().replace(":", "") for el in stats_ultimo_anno.find_all("strong")
+    ]
+    valori = [el.text.strip() for el in stats_ultimo_anno.find_all("span")]
+    attributi.update(dict(zip(parametri, valori, strict=False)))
+
+    selettore = ".col_one_third.col_last div"
+    stats_previste = soup.select_one(selettore)
+    parametri = [
+        el.text.strip().replace(":", "") for el in stats_previste.find_all("strong")
+    ]
+    valori = [el.text.strip() for el in stats_previste.find_all("span")]
+    attributi.update(dict(zip(parametri, valori, strict=False)))
+
+    selettore = ".label12 span.label"
+    ruolo = soup.select_one(selettore)
+    attributi["Ruolo"] = ruolo.get_text().strip()
+
+    selettore = "span.stickdanpic"
+    skills = [el.text for el in soup.select(selettore)]
+    attributi["Skills"] = skills
+
+    selettore = "div.progress-percent"
+    investimento = soup.select(selettore)[2]
+    attributi["Buon investimento"] = investimento.text.replace("%", "")
+
+    selettore = "div.progress-percent"
+    investimento = soup.select(selettore)[3]
+    attributi["Resistenza infortuni"] = investimento.text.replace("%", "")
+
+    selettore = "img.inf_calc"
+    try:
+        consigliato = soup.select_one(selettore).get("title")
+        if "Consigliato per la giornata" in consigliato:
+            attributi["Consigliato prossima giornata"] = True
+        else:
+            attributi["Consigliato prossima giornata"] = False
+
+    except Exception:
+        attributi["Consigliato prossima giornata"] = False
+
+    selettore = "span.new_calc"
+    nuovo = soup.select_one(selettore)
+    if nuovo is not None:
+        attributi["Nuovo acquisto"] = True
+    else:
+        attributi["Nuovo acquisto"] = False
+
+    selettore = "img.inf_calc"
+    try:
+        infortunato = soup.select_one(selettore).get("title")
+        if "Infortunato" in infortunato:
+            attributi["Infortunato"] = True
+        else:
+            attributi["Infortunato"] = False
+
+    except Exception:
+        attributi["Infortunato"] = False
+
+    selettore = "#content > div > div.section.nobg.nomargin > div > div > div:nth-child(2) > div.col_three_fifth > div.promo.promo-border.promo-light.row > div:nth-child(3) > div:nth-child(1) > div > img"
+    squadra = soup.select_one(selettore).get("title").split(":")[1].strip()
+    attributi["Squadra"] = squadra
+
+    selettore = "	div.col_one_fourth:nth-of-type(n+2) div"
+    try:
+        trend = soup.select(selettore)[0].find("i").get("class")[1]
+        if trend == "icon-arrow-up":
+            attributi["Trend"] = "UP"
+        else:
+            attributi["Trend"] = "DOWN"
+    except Exception:
+        attributi["Trend"] = "STABLE"
+
+    selettore = "div.col_one_fourth:nth-of-type(2) span.rouge"
+    presenze_attuali = soup.select_one(selettore).text
+    attributi["Presenze campionato corrente"] = presenze_attuali
+
+    return attributi
+
+
+def _pagina_sintetica(i: int, rng) -> bytes:
+    """
+    Anonymized FPEDIA player page with the markup the parsers read. Page `i`
+    cycles through the optional parts: trend arrow up/down/missing, the
+    recommended/injured icon or none, new signing badge, skills or none.
+    """
+    freccia = ("icon-arrow-up", "icon-arrow-down", None)[i % 3]
+    trend = f'<i class="icon {freccia}"></i>' if freccia else ""
+    icona = (
+        '<img class="inf_calc" title="Consigliato per la giornata">',
+        '<img class="inf_calc" title="Infortunato">',
+        "",
+        "",
+    )[i % 4]
+    nuovo = '<span class="new_calc">N</span>' if i % 5 == 0 else ""
+    skills = "".join(
+        f'<span class="stickdanpic">{skill}</span>'
+        for skill in rng.sample(
+            list(convenienza_calculator.skills_mapping) + ["Sconosciuta"], i % 4
+        )
+    )
+    percentuali = "".join(
+        f'<div class="progress-percent">{rng.choice([40, 60, 70])}%</div>'
+        for _ in range(5)
+    )
+    anno = config.ANNO_CORRENTE
+    return f"""<html><head><title>Giocatore</title></head><body>
+<div id="content"><div><div class="section nobg nomargin"><div><div>
+<div><h1> GIOCATORE {i} </h1></div>
+<div>
+ <div class="col_three_fifth"><div class="promo promo-border promo-light row">
+  <div>a</div><div>b</div><div><div><div><img title="Squadra: Team{i % 20}"></div></div></div>
+ </div></div>
+ <div class="label12"><span class="label">{rng.choice(["POR", "DIF", "CEN", "TRQ", "ATT"])}</span></div>
+ {skills}{icona}{nuovo}{percentuali}
+</div>
+</div></div></div></div></div>
+<div class="stats">
+ <div class="col_one_fourth"><span class="stickdan">{rng.randint(30, 99)}/100</span></div>
+ <div class="col_one_fourth"><div><strong>Fantamedia anno {anno-1}-{anno}</strong><span>{rng.uniform(5, 8):.2f}</span>{trend}</div><span class="rouge">{rng.randint(0, 38)}</span></div>
+ <div class="col_one_fourth"><div><strong>Fantamedia anno {anno-2}-{anno-1}</strong><span>{rng.uniform(5, 8):.2f}</span></div></div>
+</div>
+<div class="stats2">
+ <div class="col_one_third"><div><strong>Altro:</strong><span>-</span></div></div>
+ <div class="col_one_third"><div><strong>Partite giocate:</strong><span>{rng.randint(0, 38)}</span><strong>FM su tot gare {anno-1}-{anno}:</strong><span>{rng.uniform(3, 7):.2f}</span></div></div>
+ <div class="col_one_third col_last"><div><strong>Presenze previste:</strong><span>{rng.randint(0, 38)}</span><strong>Gol previsti:</strong><span>{rng.randint(0, 20)}</span><strong>Assist previsti:</strong><span>{rng.randint(0, 10)}</span></div></div>
+</div>
+{"".join(f'<p class="testo{k}">Lorem <b>ipsum</b> {k}</p>' for k in range(200))}
+</body></html>""".encode()
+
+
+def pagine_sintetiche(n: int = 24, seed: int = 0) -> list:
+    """`n` anonymized player pages, covering every optional part of the page."""
+    rng = random.Random(seed)  # noqa: S311 (test data, not security)
+    return [_pagina_sintetica(i, rng) for i in range(n)]
+
+
+def _load_fixtures(directory: str) -> list:
+    """HTML pages saved as *.html, or gzip bodies (*.gz) such as the HTTP cache."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    for path in sorted(glob.glob(os.path.join(directory, "*.gz"))):
+        with gzip.open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def _time_per_page(parse, pages: list, repeat: int) -> tuple[float, list]:
+    """Best-of-`repeat` parse time per page in milliseconds, plus the results."""
+    best = float("inf")
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [_safe_parse(parse, page) for page in pages]
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1000, results
+
+
+def _safe_parse(parse, page: bytes):
+    try:
+        return parse(page)
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+
+
+def _print_timings(title: str, timings: dict):
+    table = Table(title=title, show_header=True, header_style="bold cyan")
+    table.add_column("Implementation", style="cyan")
+    table.add_column("ms / page", justify="right")
+    table.add_column("Speedup", justify="right")
+    baseline = next(iter(timings.values()))
+    for name, ms in timings.items():
+        table.add_row(name, f"{ms:.2f}", f"{baseline / ms:.2f}x")
+    console.print(table)
+
+
+@click.group()
+def cli():
+    """Benchmarks over local fixtures, without network access."""
+
+
+@cli.command()
+@click.option(
+    "--fixtures",
+    type=click.Path(file_okay=False),
+    default=config.FPEDIA_FIXTURES_DIR,
+    show_default=True,
+    help="Directory of saved player pages (*.html or gzip *.gz)",
+)
+@click.option("--repeat", type=int, default=3, help="Runs per implementation")
+def parser(fixtures, repeat):
+    """Per-page parse time of the FPEDIA player page extractor, before/after."""
+    pages = _load_fixtures(fixtures) or _load_fixtures(config.HTTP_CACHE_DIR)
+    if not pages:
+        pages = pagine_sintetiche()
+        console.print(
+            f"[yellow]No fixtures found in {fixtures} or in the HTTP cache: "
+            f"using {len(pages)} synthetic pages.[/yellow]"
+        )
+
+    legacy_ms, expected = _time_per_page(
+        _parse_attributi_giocatore_legacy, pages, repeat
+    )
+    spec_ms, results = _time_per_page(
+        fpedia_parser.parse_attributi_giocatore, pages, repeat
+    )
+    _print_timings(
+        f"FPEDIA player pages ({len(pages)} fixtures)",
+        {"per-field selectors": legacy_ms, "single-pass spec": spec_ms},
+    )
+    mismatches = sum(1 for a, b in zip(expected, results, strict=True) if a != b)
+    if mismatches:
+        console.print(f"[red]{mismatches} pages parsed differently![/red]")
+    else:
+        console.print("[green]Identical results on every fixture.[/green]")
+
+
+@cli.command()
+@click.option(
+    "--fixtures",
+    type=click.Path(file_okay=False),
+    default=config.FPEDIA_FIXTURES_DIR,
+    show_default=True,
+    help="Directory of saved player pages (*.html or gzip *.gz)",
+)
+@click.option("--repeat", type=int, default=3, help="Runs per backend")
+def backends(fixtures, repeat):
+    """Per-page parse time of each HTML parser backend, checked against html.parser."""
+    pages = _load_fixtures(fixtures) or _load_fixtures(config.HTTP_CACHE_DIR)
+    if not pages:
+        pages = pagine_sintetiche()
+        console.print(
+            f"[yellow]No fixtures found in {fixtures} or in the HTTP cache: "
+            f"using {len(pages)} synthetic pages.[/yellow]"
+        )
+
+    timings = {}
+    expected = None
+    for backend in fpedia_parser.BACKENDS:
+        try:
+            ms, results = _time_per_page(
+                lambda page, backend=backend: fpedia_parser.parse_attributi_giocatore(
+                    page, backend
+                ),
+                pages,
+                repeat,
+            )
+        except ImportError as e:
+            console.print(f"[yellow]Skipping {backend}: {e}[/yellow]")
+            continue
+        timings[backend] = ms
+        if expected is None:
+            expected = results
+            continue
+        mismatches = sum(1 for a, b in zip(expected, results, strict=True) if a != b)
+        if mismatches:
+            console.print(
+                f"[red]{backend}: {mismatches} pages differ from html.parser![/red]"
+            )
+        else:
+            console.print(f"[green]{backend}: identical to html.parser.[/green]")
+    _print_timings(f"HTML parser backends ({len(pages)} fixtures)", timings)
+
+
+def _use_replay_server(url: str, data_dir: str):
+    """Points the retrievers at the replay server and their files at `data_dir`."""
+    fstats_base = url + urlsplit(config.BASEURL_FSTATS).path
+    config.FPEDIA_URL = config.FPEDIA_URL.replace(config.BASEURL_FPEDIA, url)
+    config.FSTATS_LOGIN_URL = config.FSTATS_LOGIN_URL.replace(
+        config.BASEURL_FSTATS, fstats_base
+    )
+    config.FSTATS_PLAYERS_URL = config.FSTATS_PLAYERS_URL.replace(
+        config.BASEURL_FSTATS, fstats_base
+    )
+    config.BASEURL_FPEDIA, config.BASEURL_FSTATS = url, fstats_base
+
+    config.GIOCATORI_URLS_FILE = os.path.join(data_dir, "giocatori_urls.txt")
+    config.GIOCATORI_CSV = os.path.join(data_dir, "_giocatori.csv")
+    config.GIOCATORI_JOURNAL = os.path.join(data_dir, "_giocatori.jsonl")
+    config.GIOCATORI_FAILED = os.path.join(data_dir, "_giocatori_failed.jsonl")
+    config.FSTATS_DIR = os.path.join(data_dir, "fstats")
+    config.PLAYERS_CSV = config.players_csv(config.FSTATS_ANNO)
+    config.FSTATS_TOKEN_FILE = os.path.join(data_dir, ".fstats_token.json")
+    config.SNAPSHOT_DB = os.path.join(data_dir, "snapshots.sqlite")
+    config.HTTP_CACHE_ENABLED = False
+    config.HTML_ARCHIVE_ENABLED = False
+    config.FORCE_SCRAPE_URLS = True
+    config.POLITENESS_DELAY = (0.0, 0.0)
+    os.environ.setdefault("FSTATS_MAIL", "replay")
+    os.environ.setdefault("FSTATS_PASSWORD", "replay")
+
+
+def _count_rows(path: str, sep: str = ",") -> int:
+    if not data_store.exists(path):
+        return 0
+    return len(data_store.read(path, sep=sep))
+
+
+@cli.command()
+@click.option(
+    "--fixtures",
+    type=click.Path(exists=True, file_okay=False),
+    default=config.HTTP_FIXTURES_DIR,
+    show_default=True,
+    help="Directory recorded with 'cli.py scrape --record'",
+)
+@click.option("--source", type=click.Choice(["fpedia", "fstats"]), default="fpedia")
+@click.option("--engine", type=click.Choice(["threaded", "async"]), default="threaded")
+@click.option("--rate", type=float, default=None, help="Requests/s of the async engine")
+@click.option(
+    "--latency", type=float, default=0.0, help="Injected seconds per response"
+)
+@click.option(
+    "--jitter", type=float, default=0.0, help="Random ± seconds on the latency"
+)
+@click.option("--error-rate", type=float, default=0.0, help="Share of injected 503s")
+@click.option("--rate-429", type=float, default=0.0, help="Share of injected 429s")
+@click.option("--seed", type=int, default=0, show_default=True)
+def scrape(fixtures, source, engine, rate, latency, jitter, error_rate, rate_429, seed):
+    """End-to-end scraper throughput against the local replay server."""
+    faults = replay_server.FaultProfile(
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        rate_429=rate_429,
+        seed=seed,
+    )
+    server = replay_server.start(fixtures, faults=faults)
+    if not server.entries:
+        console.print(f"[red]No recorded responses in {fixtures}.[/red]")
+        server.shutdown()
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        _use_replay_server(server.url, data_dir)
+        start = time.perf_counter()
+        if source == "fpedia":
+            data_retriever.scrape_fpedia(
+                force=True, use_async=engine == "async", rate=rate
+            )
+            rows = _count_rows(config.GIOCATORI_CSV)
+            failed = len(scrape_journal.DeadLetterFile(config.GIOCATORI_FAILED).urls())
+        else:
+            data_retriever.fetch_FSTATS_data(force=True)
+            rows = sum(
+                _count_rows(config.players_csv(anno), sep=";")
+                for anno in config.FSTATS_STAGIONI
+            )
+            failed = 0
+        elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    table = Table(
+        title=f"{source} scrape against the replay server",
+        show_header=True,
+        header_style="bold cyan",
+    )
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", justify="right")
+    table.add_row("Engine", engine if source == "fpedia" else "-")
+    table.add_row(
+        "Injected faults",
+        f"{latency:g}s ±{jitter:g}s, 503 {error_rate:.0%}, 429 {rate_429:.0%}",
+    )
+    table.add_row("Rows written", str(rows))
+    table.add_row("Permanent failures", str(failed))
+    table.add_row("Elapsed", f"{elapsed:.2f} s")
+    table.add_row("Requests served", str(server.counters["served"]))
+    table.add_row(
+        "Injected 429 / 503", f"{server.counters['429']} / {server.counters['503']}"
+    )
+    table.add_row("Unknown paths (404)", str(server.counters["not_found"]))
+    table.add_row("Throughput", f"{server.counters['served'] / elapsed:.1f} req/s")
+    console.print(table)
+
+
+def _read_csv_legacy(path: str, sep: str) -> pd.DataFrame:
+    """CSV load as done before the Parquet store, nested values parsed per cell."""
+    df = pd.read_csv(path, sep=sep)
+    if "Skills" in df.columns:
+        df["Skills"] = df["Skills"].fillna("[]").map(ast.literal_eval)
+    if "team" in df.columns:
+        df["team"] = df["team"].map(
+            lambda v: (
+                ast.literal_eval(v) if isinstance(v, str) and v.startswith("{") else v
+            )
+        )
+    return df
+
+
+def _valori(df: pd.DataFrame) -> list:
+    """Rows of `df` as Python values, missing values (NaN/None/NA) as None."""
+
+    def valore(v):
+        if not isinstance(v, (list, dict)) and pd.isna(v):
+            return None
+        return v
+
+    return [[valore(v) for v in riga] for riga in df.itertuples(index=False)]
+
+
+@cli.command()
+@click.option("--repeat", type=int, default=5, help="Loads per format")
+def store(repeat):
+    """Load time of the FPEDIA/FSTATS tables: CSV + literal_eval vs Parquet."""
+    if data_store._pyarrow() is None:
+        console.print("[red]pyarrow is not installed: poetry install -E columnar[/red]")
+        return
+
+    table = Table(
+        title="Intermediate store loads", show_header=True, header_style="bold cyan"
+    )
+    for colonna in (
+        "Table",
+        "Rows",
+        "CSV KB",
+        "Parquet KB",
+        "CSV ms",
+        "Parquet ms",
+        "Speedup",
+    ):
+        table.add_column(
+            colonna, style="cyan" if colonna == "Table" else None, justify="right"
+        )
+    for nome, csv_path, sep in (
+        ("FPEDIA", config.GIOCATORI_CSV, ","),
+        ("FSTATS", config.PLAYERS_CSV, ";"),
+    ):
+        parquet = data_store.parquet_path(csv_path)
+        if not (os.path.exists(csv_path) and os.path.exists(parquet)):
+            console.print(
+                f"[yellow]Skipping {nome}: needs both {csv_path} and {parquet} "
+                "(scrape with EXPORT_CSV = True).[/yellow]"
+            )
+            continue
+        timings = {}
+        for formato, carica in (
+            ("csv", lambda csv_path=csv_path, sep=sep: _read_csv_legacy(csv_path, sep)),
+            ("parquet", lambda parquet=parquet: data_store.read_parquet(parquet)),
+        ):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                df = carica()
+                best = min(best, time.perf_counter() - start)
+            timings[formato] = (best * 1000, df)
+        (csv_ms, expected), (parquet_ms, df) = timings["csv"], timings["parquet"]
+        table.add_row(
+            nome,
+            str(len(df)),
+            str(os.path.getsize(csv_path) // 1024),
+            str(os.path.getsize(parquet) // 1024),
+            f"{csv_ms:.1f}",
+            f"{parquet_ms:.1f}",
+            f"{csv_ms / parquet_ms:.2f}x",
+        )
+        # Compared as exported, nested values written the CSV way
+        if list(df.columns) != list(expected.columns) or _valori(
+            data_store.to_export(expected)
+        ) != _valori(data_store.to_export(df)):
+            console.print(f"[red]{nome}: Parquet and CSV contents differ![/red]")
+        else:
+            console.print(f"[green]{nome}: identical values in both formats.[/green]")
+    console.print(table)
+
+
+@cli.command()
+@click.option("--repeat", type=int, default=5, help="Loads per configuration")
+def load(repeat):
+    """Load time and memory: untyped full loads vs the schema registry views."""
+    import data_processor
+
+    table = Table(
+        title="Schema registry loads", show_header=True, header_style="bold cyan"
+    )
+    for colonna in ("Source", "Load", "Columns", "MB", "ms", "Memory"):
+        table.add_column(
+            colonna, style="cyan" if colonna == "Source" else None, justify="right"
+        )
+    for fonte, csv_path, sep in (
+        ("fpedia", config.GIOCATORI_CSV, ","),
+        ("fstats", config.PLAYERS_CSV, ";"),
+    ):
+        if not data_store.exists(csv_path):
+            console.print(f"[yellow]Skipping {fonte}: {csv_path} not found.[/yellow]")
+            continue
+        carichi = {
+            "untyped": lambda csv_path=csv_path, sep=sep: data_store.read(
+                csv_path, sep=sep
+            ),
+            "analysis": lambda fonte=fonte: data_processor.load_source(fonte),
+        }
+        for vista in data_processor.VISTE:
+            carichi[vista] = (
+                lambda fonte=fonte, vista=vista: data_processor.load_source(
+                    fonte, vista=vista
+                )
+            )
+        baseline = None
+        for nome, carica in carichi.items():
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                df = carica()
+                best = min(best, time.perf_counter() - start)
+            memoria = df.memory_usage(deep=True).sum()
+            baseline = baseline or memoria
+            table.add_row(
+                fonte,
+                nome,
+                str(len(df.columns)),
+                f"{memoria / 2**20:.2f}",
+                f"{best * 1000:.1f}",
+                f"{memoria / baseline:.0%}",
+            )
+    console.print(table)
+
+
+def _calcola_convenienza_fpedia_legacy(df: pd.DataFrame) -> pd.DataFrame:
+    """Row-by-row implementation (two iterrows passes) used before vectorizing."""
+    skills_mapping = convenienza_calculator.skills_mapping
+    # --- Calcolo Convenienza (basata su presenze) ---
+    res_convenienza = []
+    df_calc = df.copy()
+
+    numeric_cols = [
+        f"Fantamedia anno {config.ANNO_CORRENTE-2}-{config.ANNO_CORRENTE-1}",
+        "Partite giocate",
+        f"Fantamedia anno {config.ANNO_CORRENTE-1}-{config.ANNO_CORRENTE}",
+        "Presenze campionato corrente",
+        "Punteggio",
+        "Buon investimento",
+        "Resistenza infortuni",
+    ]
+    for col in numeric_cols:
+        df_calc[col] = pd.to_numeric(df_calc[col], errors="coerce").fillna(0)
+
+    giocatemax = df_calc["Presenze campionato corrente"].max()
+    if giocatemax == 0:
+        giocatemax = 1
+
+    for _, row in df_calc.iterrows():
+        appetibilita = 0
+        fantamedia_prec = row.get(
+            f"Fantamedia anno {config.ANNO_CORRENTE-2}-{config.ANNO_CORRENTE-1}", 0
+        )
+        partite_prec = row.get("Partite giocate", 0)
+        fantamedia_corr = row.get(
+            f"Fantamedia anno {config.ANNO_CORRENTE-1}-{config.ANNO_CORRENTE}", 0
+        )
+        partite_corr = row.get("Presenze campionato corrente", 0)
+        punteggio = row.get("Punteggio", 1)
+
+        if partite_prec > 0:
+            appetibilita += fantamedia_prec * (partite_prec / 38) * 0.20
+        if partite_corr > 5:
+            appetibilita += fantamedia_corr * (partite_corr / giocatemax) * 0.80
+        elif partite_prec > 0:
+            appetibilita = fantamedia_prec * (partite_prec / 38)
+
+        appetibilita = appetibilita * punteggio * 0.30
+        pt = punteggio if punteggio != 0 else 1
+        appetibilita = (appetibilita / pt) * 100 / 40
+
+        skills_list = data_store.as_list(row.get("Skills"))
+        plus = sum(skills_mapping.get(skill, 0) for skill in skills_list)
+        appetibilita += plus
+
+        if row.get("Nuovo acquisto", False):
+            appetibilita -= 2
+        if row.get("Buon investimento", 0) == 60:
+            appetibilita += 3
+        if row.get("Consigliato prossima giornata", False):
+            appetibilita += 1
+        # Trend from our own snapshot history when known, else the scraped one
+        trend = row.get("Trend storico")
+        if not isinstance(trend, str):
+            trend = row.get("Trend", "")
+        if trend == "UP":
+            appetibilita += 2
+        if row.get("Infortunato", False):
+            appetibilita -= 1
+        if row.get("Resistenza infortuni", 0) > 60:
+            appetibilita += 4
+        elif row.get("Resistenza infortuni", 0) == 60:
+            appetibilita += 2
+
+        res_convenienza.append(appetibilita)
+
+    df["Convenienza"] = res_convenienza
+
+    # --- Calcolo Convenienza Potenziale (indipendente da presenze) ---
+    res_potenziale = []
+    for _, row in df_calc.iterrows():
+        potenziale = row.get("Punteggio", 0)
+        skills_list = data_store.as_list(row.get("Skills"))
+        plus = sum(skills_mapping.get(skill, 0) for skill in skills_list)
+        potenziale += plus * 2  # Diamo più peso alle skill nel potenziale
+        res_potenziale.append(potenziale)
+
+    df["Convenienza Potenziale"] = res_potenziale
+
+    return df
+
+
+def _giocatori_sintetici(n: int, seed: int = 0) -> pd.DataFrame:
+    """`n` random FPEDIA players, with every edge case the scoring branches on."""
+    rng = np.random.default_rng(seed)
+    skills = list(convenienza_calculator.skills_mapping) + ["Sconosciuta"]
+    anno = config.ANNO_CORRENTE
+
+    def con_nan(valori, quota=0.05):
+        valori = pd.Series(valori, dtype=object)
+        return valori.mask(rng.random(n) < quota)
+
+    return pd.DataFrame(
+        {
+            "Nome": [f"GIOCATORE {i}" for i in range(n)],
+            "Punteggio": rng.integers(0, 100, n),
+            f"Fantamedia anno {anno-2}-{anno-1}": rng.normal(6, 1, n).round(2),
+            "Partite giocate": rng.integers(0, 39, n),
+            f"Fantamedia anno {anno-1}-{anno}": rng.normal(6, 1, n).round(2),
+            "Presenze campionato corrente": rng.integers(0, 39, n),
+            "Buon investimento": rng.choice([0, 40, 60, 80], n),
+            "Resistenza infortuni": rng.choice([0, 40, 60, 80], n),
+            "Skills": [
+                list(rng.choice(skills, rng.integers(0, 4), replace=False))
+                for _ in range(n)
+            ],
+            "Nuovo acquisto": con_nan(rng.random(n) < 0.2),
+            "Consigliato prossima giornata": con_nan(rng.random(n) < 0.3),
+            "Infortunato": con_nan(rng.random(n) < 0.1),
+            "Trend": con_nan(rng.choice(["UP", "DOWN", "STABLE"], n)),
+            "Trend storico": con_nan(rng.choice(["UP", "DOWN", "STABLE"], n), 0.5),
+        }
+    )
+
+
+def _calcola_convenienza_fstats_legacy(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementation joining its results back on Nome, used before index alignment."""
+    pesi = convenienza_calculator.PESI_FSTATS
+    df_calc = df.copy()
+    numeric_cols = [
+        "goals",
+        "assists",
+        "yellowCards",
+        "redCards",
+        "xgFromOpenPlays",
+        "xA",
+        "presences",
+        "fanta_avg",
+        "fantacalcioFantaindex",
+    ]
+    for col in numeric_cols:
+        df_calc[col] = pd.to_numeric(df_calc[col], errors="coerce").fillna(0)
+
+    # --- Calcolo Convenienza (basata su presenze) ---
+    df_con_presenze = df_calc[df_calc["presences"] > 0].reset_index(drop=True)
+    if not df_con_presenze.empty:
+        bonus_score = (df_con_presenze["goals"] * 3) + (df_con_presenze["assists"] * 1)
+        malus_score = (df_con_presenze["yellowCards"] * 0.5) + (
+            df_con_presenze["redCards"] * 1
+        )
+        bonus_per_presence = bonus_score / df_con_presenze["presences"]
+        malus_per_presence = malus_score / df_con_presenze["presences"]
+        potential_score = (
+            df_con_presenze["xgFromOpenPlays"] + df_con_presenze["xA"]
+        ) / df_con_presenze["presences"]
+
+        convenienza = (
+            df_con_presenze["fanta_avg"] * pesi["fanta_avg"]
+            + bonus_per_presence * pesi["bonus"]
+            + potential_score * pesi["potenziale"]
+            - malus_per_presence * pesi["malus"]
+        )
+        df_con_presenze["Convenienza"] = (convenienza / convenienza.max()) * 100
+        df = df.merge(df_con_presenze[["Nome", "Convenienza"]], on="Nome", how="left")
+    else:
+        df["Convenienza"] = 0
+
+    # --- Calcolo Convenienza Potenziale (indipendente da presenze) ---
+    potential_stats = (
+        df_calc["xgFromOpenPlays"] + df_calc["xA"]
+    ) * 2  # Pondera il potenziale xG/xA
+    potenziale = df_calc["fantacalcioFantaindex"] + potential_stats
+
+    df_calc["Convenienza Potenziale"] = (potenziale / potenziale.max()) * 100
+    df = df.merge(df_calc[["Nome", "Convenienza Potenziale"]], on="Nome", how="left")
+
+    df.fillna({"Convenienza": 0, "Convenienza Potenziale": 0}, inplace=True)
+    return df
+
+
+def _giocatori_fstats_sintetici(
+    n: int, omonimi: float = 0.0, seed: int = 0
+) -> pd.DataFrame:
+    """`n` random FSTATS players, a share `omonimi` of them named like another."""
+    rng = np.random.default_rng(seed)
+    nomi = np.array([f"P{i}" for i in range(n)], dtype=object)
+    copie = rng.random(n) < omonimi
+    nomi[copie] = nomi[rng.integers(0, n, int(copie.sum()))]
+    presenze = rng.integers(0, 39, n)
+    presenze[rng.random(n) < 0.15] = 0
+    return pd.DataFrame(
+        {
+            "Nome": nomi,
+            "fantacalcioPlayerId": np.arange(n),
+            "goals": rng.poisson(2, n),
+            "assists": rng.poisson(1.5, n),
+            "yellowCards": rng.poisson(2, n),
+            "redCards": rng.poisson(0.2, n),
+            "xgFromOpenPlays": rng.gamma(1, 2, n).round(2),
+            "xA": rng.gamma(1, 1.5, n).round(2),
+            "presences": presenze,
+            "fanta_avg": rng.normal(6, 1, n).round(2),
+            "fantacalcioFantaindex": rng.uniform(20, 90, n).round(1),
+        }
+    )
+
+
+def _best_ms(func, df: pd.DataFrame, repeat: int) -> tuple[float, pd.DataFrame]:
+    best = float("inf")
+    for _ in range(repeat):
+        copia = df.copy()
+        start = time.perf_counter()
+        risultato = func(copia)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, risultato
+
+
+@cli.command()
+@click.option("--repeat", type=int, default=5, help="Runs per implementation")
+@click.option(
+    "--legacy-max",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Largest synthetic roster also scored (and checked) with the row-by-row version",
+)
+def convenienza(repeat, legacy_max):
+    """FPEDIA scoring time, row-by-row vs vectorized, on real and synthetic players."""
+    import data_processor
+
+    casi = {}
+    df_reale = data_processor.load_source("fpedia")
+    if not df_reale.empty:
+        casi[f"FPEDIA ({len(df_reale)})"] = data_processor.process_fpedia_data(df_reale)
+    for n in (600, 10_000, 100_000):
+        casi[f"synthetic {n:,}"] = _giocatori_sintetici(n)
+
+    table = Table(
+        title="Convenienza FPEDIA", show_header=True, header_style="bold cyan"
+    )
+    for colonna in (
+        "Players",
+        "Row-by-row ms",
+        "Vectorized ms",
+        "µs / player",
+        "Speedup",
+    ):
+        table.add_column(
+            colonna, style="cyan" if colonna == "Players" else None, justify="right"
+        )
+    colonne = ["Convenienza", "Convenienza Potenziale"]
+    for nome, df in casi.items():
+        vector_ms, risultato = _best_ms(
+            convenienza_calculator.calcola_convenienza_fpedia, df, repeat
+        )
+        legacy_ms = None
+        if len(df) <= legacy_max:
+            legacy_ms, expected = _best_ms(
+                _calcola_convenienza_fpedia_legacy, df, 1 if len(df) > 1000 else repeat
+            )
+            if all(
+                np.array_equal(
+                    risultato[c].to_numpy(dtype=float),
+                    expected[c].to_numpy(dtype=float),
+                )
+                for c in colonne
+            ):
+                console.print(f"[green]{nome}: identical indexes.[/green]")
+            else:
+                console.print(
+                    f"[red]{nome}: indexes differ from the row-by-row version![/red]"
+                )
+        table.add_row(
+            nome,
+            f"{legacy_ms:.1f}" if legacy_ms is not None else "-",
+            f"{vector_ms:.2f}",
+            f"{vector_ms * 1000 / len(df):.2f}",
+            f"{legacy_ms / vector_ms:.0f}x" if legacy_ms is not None else "-",
+        )
+    console.print(table)
+
+
+@cli.command()
+@click.option("--repeat", type=int, default=5, help="Runs per implementation")
+def fstats(repeat):
+    """
+    FSTATS scoring, name joins vs index alignment: same indexes on unique
+    names, one row per input row with homonymous players, time per roster.
+    """
+    import data_processor
+
+    colonne = ["Convenienza", "Convenienza Potenziale"]
+    casi = {}
+    df_reale = data_processor.load_source("fstats")
+    if not df_reale.empty:
+        casi[f"FSTATS ({len(df_reale)})"] = data_processor.process_FSTATS_data(df_reale)
+    for n in (600, 10_000, 100_000):
+        casi[f"synthetic {n:,}"] = _giocatori_fstats_sintetici(n)
+
+    # Homonyms: the join multiplied rows, the aligned version must not
+    omonimi = _giocatori_fstats_sintetici(2_000, omonimi=0.1)
+    risultato = convenienza_calculator.calcola_convenienza_FSTATS(omonimi.copy())
+    join = _calcola_convenienza_fstats_legacy(omonimi.copy())
+    ordinati = omonimi.assign(Nome="").pipe(
+        convenienza_calculator.calcola_convenienza_FSTATS
+    )
+    if (
+        len(risultato) == len(omonimi)
+        and risultato.index.equals(omonimi.index)
+        and risultato["fantacalcioPlayerId"].equals(omonimi["fantacalcioPlayerId"])
+        and all(np.array_equal(risultato[c], ordinati[c]) for c in colonne)
+    ):
+        console.print(
+            f"[green]Homonyms: {len(omonimi)} rows kept "
+            f"({omonimi['Nome'].duplicated().sum()} duplicate names, "
+            f"the name join gave {len(join)}).[/green]"
+        )
+    else:
+        console.print("[red]Homonyms: rows lost, duplicated or scored by name![/red]")
+
+    table = Table(
+        title="Convenienza FSTATS", show_header=True, header_style="bold cyan"
+    )
+    for colonna in ("Players", "Name join ms", "Aligned ms", "Speedup"):
+        table.add_column(
+            colonna, style="cyan" if colonna == "Players" else None, justify="right"
+        )
+    for nome, df in casi.items():
+        aligned_ms, risultato = _best_ms(
+            convenienza_calculator.calcola_convenienza_FSTATS, df, repeat
+        )
+        join_ms, expected = _best_ms(_calcola_convenienza_fstats_legacy, df, repeat)
+        if all(
+            np.array_equal(
+                risultato[c].to_numpy(dtype=float), expected[c].to_numpy(dtype=float)
+            )
+            for c in colonne
+        ):
+            console.print(f"[green]{nome}: identical indexes.[/green]")
+        else:
+            console.print(
+                f"[red]{nome}: indexes differ from the name join version![/red]"
+            )
+        table.add_row(
+            nome, f"{join_ms:.1f}", f"{aligned_ms:.2f}", f"{join_ms / aligned_ms:.1f}x"
+        )
+    console.print(table)
+
+
+@cli.command()
+@click.option("--repeat", type=int, default=3, help="Runs per batch size")
+def sensitivity(repeat):
+    """Batch what-if scoring: base configuration vs the scorers, time per batch."""
+    import data_processor
+    import sensitivity as sensitivity_analysis
+
+    df_fpedia, df_fstats = data_processor.load_dataframes()
+    casi = {"synthetic 600": ("fpedia", _giocatori_sintetici(600))}
+    if not df_fpedia.empty:
+        casi["FPEDIA"] = ("fpedia", data_processor.process_fpedia_data(df_fpedia))
+    if not df_fstats.empty:
+        casi["FSTATS"] = ("fstats", data_processor.process_FSTATS_data(df_fstats))
+    scorer = {
+        "fpedia": convenienza_calculator.calcola_convenienza_fpedia,
+        "fstats": convenienza_calculator.calcola_convenienza_FSTATS,
+    }
+
+    table = Table(title="Rank stability", show_header=True, header_style="bold cyan")
+    for colonna in ("Data", "Players", "Configurations", "ms"):
+        table.add_column(
+            colonna, style="cyan" if colonna == "Data" else None, justify="right"
+        )
+    for nome, (fonte, df) in casi.items():
+        atteso = scorer[fonte](df.copy())["Convenienza"].to_numpy(dtype=float)
+        pesi_base = [list(sensitivity_analysis.PESI[fonte].values())]
+        base = sensitivity_analysis.BATCH[fonte](df, pesi_base)[:, 0]
+        if len(atteso) == len(base) and np.allclose(
+            base, atteso, rtol=1e-12, atol=1e-9
+        ):
+            console.print(
+                f"[green]{nome}: batch base configuration matches the scorer.[/green]"
+            )
+        else:
+            console.print(f"[red]{nome}: batch scores differ from the scorer![/red]")
+        for n in (1_000, 10_000):
+            pesi = sensitivity_analysis.sample_weights(fonte, n)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                sensitivity_analysis.rank_stability(df, fonte, pesi)
+                best = min(best, time.perf_counter() - start)
+            table.add_row(nome, str(len(df)), f"{n:,}", f"{best * 1000:.0f}")
+    console.print(table)
+
+
+if __name__ == "__main__":
+    cli()
@@ -27,6 +27,18 @@ from rich.live import Live
 
 # Import existing modules
 import data_retriever
+import data_store
+import html_archive
+import http_cache
+import http_client
+import http_recorder
+import player_history
+import rankings
+import scoring_profiles
+import sensitivity as sensitivity_analysis
+import skills
+import snapshot_db
+import stage_cache
 import data_processor
 import convenienza_calculator
 import fuzzy_matcher
@@ -40,7 +52,7 @@ console = Console()
 
 def _get_file_age_info(file_path):
     """Get human-readable file age information"""
-    if not os.path.exists(file_path):
+    if not file_path or not os.path.exists(file_path):
         return None
 
     file_time = datetime.fromtimestamp(os.path.getmtime(file_path))
@@ -105,8 +117,49 @@ def cli(ctx, verbose):
 @click.option(
     "--force", "-f", is_flag=True, help="Force re-download even if cache exists"
 )
+@click.option(
+    "--async",
+    "use_async",
+    is_flag=True,
+    help="Fetch FPEDIA player pages with the asyncio engine (rate limited)",
+)
+@click.option(
+    "--rate",
+    type=float,
+    default=None,
+    help=f"Requests per second for --async (default: {config.ASYNC_RATE_LIMIT})",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Resume an interrupted FPEDIA scrape, skipping players already journaled",
+)
+@click.option(
+    "--retry-failed",
+    is_flag=True,
+    help="Scrape only the FPEDIA players that failed permanently in the last run",
+)
+@click.option(
+    "--season",
+    "seasons",
+    type=int,
+    multiple=True,
+    help="FSTATS season to fetch, by start year (repeatable, default: "
+    f"{', '.join(map(str, config.FSTATS_STAGIONI))})",
+)
+@click.option(
+    "--record",
+    "record_dir",
+    is_flag=False,
+    flag_value=config.HTTP_FIXTURES_DIR,
+    default=None,
+    help="Record every HTTP response into a fixture directory for replay_server.py "
+    f"(default: {config.HTTP_FIXTURES_DIR}); disables the HTTP cache",
+)
 @click.pass_context
-def scrape(ctx, source, force):
+def scrape(
+    ctx, source, force, use_async, rate, resume, retry_failed, seasons, record_dir
+):
     """
     📥 Download player data from external sources
 
@@ -115,6 +168,12 @@ def scrape(ctx, source, force):
     """
     verbose = ctx.obj.get("verbose", False)
 
+    if record_dir:
+        # Conditional requests would record empty 304s instead of the pages
+        config.HTTP_CACHE_ENABLED = False
+        http_recorder.start(record_dir)
+        ctx.call_on_close(http_recorder.stop)
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -130,12 +189,25 @@ def scrape(ctx, source, force):
         if source in ["fpedia", "all"]:
             task = progress.add_task("Scraping FPEDIA data...", total=None)
             try:
-                if force or not os.path.exists(config.GIOCATORI_CSV):
-                    data_retriever.scrape_fpedia(force)
+                if (
+                    force
+                    or resume
+                    or retry_failed
+                    or not data_store.exists(config.GIOCATORI_CSV)
+                ):
+                    data_retriever.scrape_fpedia(
+                        force,
+                        use_async=use_async,
+                        rate=rate,
+                        resume=resume,
+                        retry_failed=retry_failed,
+                    )
                     rprint("✅ [green]FPEDIA data scraped successfully[/green]")
                 else:
                     # Show cache age info
-                    age_info = _get_file_age_info(config.GIOCATORI_CSV)
+                    age_info = _get_file_age_info(
+                        data_store.stored_path(config.GIOCATORI_CSV)
+                    )
                     if age_info:
                         rprint(f"📁 [yellow]Using cached FPEDIA data from {age_info['date']} ({age_info['age']} old)[/yellow]")
                         if age_info['days'] >= 7:
@@ -151,12 +223,18 @@ def scrape(ctx, source, force):
         if source in ["fstats", "all"]:
             task = progress.add_task("Fetching FSTATS data...", total=None)
             try:
-                if force or not os.path.exists(config.PLAYERS_CSV):
-                    data_retriever.fetch_FSTATS_data(force)
+                stagioni = list(seasons) or config.FSTATS_STAGIONI
+                mancanti = not all(
+                    data_store.exists(config.players_csv(anno)) for anno in stagioni
+                )
+                if force or mancanti:
+                    data_retriever.fetch_FSTATS_data(force, stagioni=stagioni)
                     rprint("✅ [green]FSTATS data fetched successfully[/green]")
                 else:
                     # Show cache age info
-                    age_info = _get_file_age_info(config.PLAYERS_CSV)
+                    age_info = _get_file_age_info(
+                        data_store.stored_path(config.PLAYERS_CSV)
+                    )
                     if age_info:
                         rprint(f"📁 [yellow]Using cached FSTATS data from {age_info['date']} ({age_info['age']} old)[/yellow]")
                         if age_info['days'] >= 7:
@@ -169,6 +247,48 @@ def scrape(ctx, source, force):
             except Exception as e:
                 rprint(f"❌ [red]Error fetching FSTATS: {e}[/red]")
 
+    http_client.log_stats()
+
+
+@cli.command()
+@click.option(
+    "--run",
+    "run_id",
+    default=None,
+    help="Archived scrape to re-parse (default: the latest full scrape)",
+)
+@click.option(
+    "--processes",
+    "-p",
+    type=int,
+    default=None,
+    help="Parser processes (default: all cores)",
+)
+def reparse(run_id, processes):
+    """
+    ♻️ Rebuild FPEDIA data from the archived HTML pages
+
+    Re-parses the pages stored by the last scrape without any request,
+    e.g. after fixing a selector in fpedia_parser.
+    """
+    packs = html_archive.list_packs()
+    if not packs:
+        rprint(
+            "❌ [red]No archived pages found. Run 'scrape --source fpedia' first.[/red]"
+        )
+        return
+    try:
+        giocatori = data_retriever.reparse_fpedia(run_id, processes)
+    except FileNotFoundError as e:
+        rprint(f"❌ [red]{e}[/red] Available: {', '.join(packs)}")
+        return
+    if giocatori:
+        rprint(
+            f"✅ [green]{config.GIOCATORI_CSV} rebuilt with {giocatori} players[/green]"
+        )
+    else:
+        rprint("⚠️ [yellow]No archived page could be parsed[/yellow]")
+
 
 @cli.command()
 @click.option(
@@ -180,8 +300,15 @@ def scrape(ctx, source, force):
 )
 @click.option("--output", "-o", type=click.Path(), help="Custom output directory")
 @click.option("--top", "-t", type=int, default=50, help="Show top N players in summary")
+@click.option(
+    "--snapshot",
+    "snapshot_ids",
+    type=int,
+    multiple=True,
+    help="Analyze a stored snapshot instead of the current files (repeatable, see 'status')",
+)
 @click.pass_context
-def analyze(ctx, source, output, top):
+def analyze(ctx, source, output, top, snapshot_ids):
     """
     🔍 Process and analyze player data
 
@@ -194,6 +321,14 @@ def analyze(ctx, source, output, top):
         config.OUTPUT_DIR = output
         os.makedirs(output, exist_ok=True)
 
+    fonti = {s["id"]: s["fonte"] for s in snapshot_db.snapshots()}
+    for snapshot_id in snapshot_ids:
+        if snapshot_id not in fonti:
+            raise click.BadParameter(
+                f"unknown snapshot {snapshot_id}", param_hint="--snapshot"
+            )
+    snapshots = {fonti[snapshot_id]: snapshot_id for snapshot_id in snapshot_ids}
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -202,7 +337,7 @@ def analyze(ctx, source, output, top):
 
         # Load data
         task = progress.add_task("Loading data files...", total=None)
-        df_fpedia, df_fstats = data_processor.load_dataframes()
+        df_fpedia, df_fstats = data_processor.load_dataframes(snapshots=snapshots)
         progress.update(task, completed=True)
 
         # Store final dataframes for unified analysis
@@ -212,8 +347,7 @@ def analyze(ctx, source, output, top):
         # Process FPEDIA
         if source in ["fpedia", "all"] and not df_fpedia.empty:
             task = progress.add_task("Processing FPEDIA data...", total=None)
-            df_processed = data_processor.process_fpedia_data(df_fpedia)
-            df_final = convenienza_calculator.calcola_convenienza_fpedia(df_processed)
+            df_final = _score_data("fpedia", df_fpedia)
 
             # Save results
             output_path = os.path.join(config.OUTPUT_DIR, "fpedia_analysis.xlsx")
@@ -239,6 +373,7 @@ def analyze(ctx, source, output, top):
                 "Partite giocate",
                 # Qualitative Info
                 "Trend",
+                "Trend storico",
                 "Skills",
                 "Consigliato prossima giornata",
                 "Buon investimento",
@@ -251,13 +386,20 @@ def analyze(ctx, source, output, top):
                 "Assist previsti",
                 "Nuovo acquisto",
             ]
+            output_columns += scoring_profiles.profile_columns("fpedia")
+            output_columns += rankings.ranking_columns(df_final, "fpedia")
             final_columns = [
                 col for col in output_columns if col in df_final_sorted.columns
             ]
 
             # Save both Excel and JSON
-            excel_path, json_path = _save_analysis_results(
-                df_final_sorted[final_columns], "fpedia_analysis", "fpedia"
+            excel_path, json_path = stage_cache.cached(
+                "export_fpedia",
+                _save_analysis_results,
+                df_final_sorted[final_columns],
+                "fpedia_analysis",
+                "fpedia",
+                outputs=_output_paths("fpedia_analysis"),
             )
 
             progress.update(task, completed=True)
@@ -273,8 +415,7 @@ def analyze(ctx, source, output, top):
         # Process FSTATS
         if source in ["fstats", "all"] and not df_fstats.empty:
             task = progress.add_task("Processing FSTATS data...", total=None)
-            df_processed = data_processor.process_FSTATS_data(df_fstats)
-            df_final = convenienza_calculator.calcola_convenienza_FSTATS(df_processed)
+            df_final = _score_data("fstats", df_fstats)
 
             # Save results
             output_path = os.path.join(config.OUTPUT_DIR, "FSTATS_analysis.xlsx")
@@ -360,13 +501,20 @@ def analyze(ctx, source, output, top):
                 "Shot_on_target_Index",
                 "Dribbles_successful_Index",
             ]
+            output_columns += scoring_profiles.profile_columns("fstats")
+            output_columns += rankings.ranking_columns(df_final, "fstats")
             final_columns = [
                 col for col in output_columns if col in df_final_sorted.columns
             ]
 
             # Save both Excel and JSON
-            excel_path, json_path = _save_analysis_results(
-                df_final_sorted[final_columns], "FSTATS_analysis", "fstats"
+            excel_path, json_path = stage_cache.cached(
+                "export_fstats",
+                _save_analysis_results,
+                df_final_sorted[final_columns],
+                "FSTATS_analysis",
+                "fstats",
+                outputs=_output_paths("FSTATS_analysis"),
             )
 
             progress.update(task, completed=True)
@@ -385,7 +533,14 @@ def analyze(ctx, source, output, top):
             task = progress.add_task("Creating unified analysis...", total=None)
 
             # Create unified dataset using already processed data
-            df_unified = _merge_datasets_with_mapping(df_fpedia_final, df_fstats_final)
+            df_unified = stage_cache.cached(
+                "merge",
+                _merge_datasets_with_mapping,
+                df_fpedia_final,
+                df_fstats_final,
+                fuzzy_matcher.OUTPUT_FILE,
+                extra=[stage_cache.file_digest(fuzzy_matcher.OUTPUT_FILE)],
+            )
 
             if not df_unified.empty:
                 # Sort unified dataset by fpedia convenience (prioritize fpedia scoring)
@@ -397,8 +552,13 @@ def analyze(ctx, source, output, top):
                     df_unified_sorted = df_unified
 
                 # Save unified results
-                excel_path, json_path = _save_analysis_results(
-                    df_unified_sorted, "unified_analysis", "unified"
+                excel_path, json_path = stage_cache.cached(
+                    "export_unified",
+                    _save_analysis_results,
+                    df_unified_sorted,
+                    "unified_analysis",
+                    "unified",
+                    outputs=_output_paths("unified_analysis"),
                 )
 
                 progress.update(task, completed=True)
@@ -441,6 +601,184 @@ def run(ctx, source, force_scrape, top):
     rprint("🎉 [bold green]Pipeline completed successfully![/bold green]")
 
 
+@cli.command()
+@click.option(
+    "--source",
+    "-s",
+    type=click.Choice(["fpedia", "fstats"]),
+    default="fpedia",
+    help="Data source whose Convenienza weights are varied",
+)
+@click.option(
+    "--configs", "-n", type=int, default=2000, help="Random weight configurations"
+)
+@click.option(
+    "--spread",
+    type=float,
+    default=0.5,
+    help="Each weight is scaled by a random factor in [1 - spread, 1 + spread]",
+)
+@click.option("--seed", type=int, default=0, help="Seed of the random configurations")
+@click.option(
+    "--weights",
+    "weights_file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="CSV of weight configurations (one column per weight) instead of random ones",
+)
+@click.option("--top", "-t", type=int, default=10, help="Top N per role tracked")
+@click.option("--limit", "-l", type=int, default=20, help="Rows shown per table")
+def sensitivity(source, configs, spread, seed, weights_file, top, limit):
+    """
+    🎛️ What-if analysis of the Convenienza weights
+
+    Scores every player under many weight configurations at once and reports
+    how often each one stays in the top N of the role.
+    """
+    import time
+
+    df_fpedia, df_fstats = data_processor.load_dataframes()
+    df = df_fpedia if source == "fpedia" else df_fstats
+    if df.empty:
+        rprint(f"❌ [red]No {source.upper()} data found. Run 'scrape' first.[/red]")
+        return
+    if source == "fpedia":
+        df = stage_cache.cached(
+            "process_fpedia",
+            data_processor.process_fpedia_data,
+            df,
+            extra=[snapshot_db.latest("fpedia")],
+            modules=[player_history, skills, data_store],
+        )
+    else:
+        df = stage_cache.cached(
+            "process_fstats", data_processor.process_FSTATS_data, df
+        )
+
+    try:
+        if weights_file:
+            pesi = sensitivity_analysis.load_weights(weights_file, source)
+        else:
+            pesi = sensitivity_analysis.sample_weights(source, configs, spread, seed)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--weights") from e
+
+    start = time.perf_counter()
+    df_stabilita = sensitivity_analysis.rank_stability(df, source, pesi, top)
+    elapsed = time.perf_counter() - start
+    rprint(
+        f"⚡ [green]{len(df)} players × {len(pesi)} configurations scored and ranked "
+        f"in {elapsed * 1000:.0f} ms[/green]"
+    )
+
+    colonna_top = f"Top {top} %"
+    base_top = df_stabilita[df_stabilita["Rank base"] <= top]
+    incerti = base_top[base_top[colonna_top] < 100].sort_values(colonna_top)
+    for titolo, righe in (
+        (f"Least stable of the base top {top} per role", incerti),
+        (f"Most stable of the base top {top} per role", base_top),
+    ):
+        table = Table(title=titolo, show_header=True, header_style="bold magenta")
+        for colonna in ("Nome", "Ruolo", "Squadra"):
+            table.add_column(colonna)
+        for colonna in ("Rank base", "Rank min", "Rank max", colonna_top):
+            table.add_column(colonna, justify="right")
+        for _, row in righe.head(limit).iterrows():
+            table.add_row(
+                str(row.get("Nome", "N/A")),
+                str(row.get("Ruolo", "N/A")),
+                str(row.get("Squadra", "N/A")),
+                str(row["Rank base"]),
+                str(row["Rank min"]),
+                str(row["Rank max"]),
+                f"{row[colonna_top]:.1f}",
+            )
+        console.print(table)
+
+    excel_path, json_path = _save_analysis_results(
+        df_stabilita, f"sensitivity_{source}", source
+    )
+    rprint(f"✅ [green]Rank stability saved to {excel_path}[/green]")
+    rprint(f"📄 [blue]JSON export saved to {json_path}[/blue]")
+
+
+@cli.command()
+@click.option(
+    "--source",
+    "-s",
+    type=click.Choice(["fpedia", "fstats"]),
+    default="fpedia",
+    help="Data source to rank",
+)
+@click.option(
+    "--by",
+    "-b",
+    default="Convenienza Potenziale",
+    help="Score column (or profile) to rank by",
+)
+@click.option(
+    "--group",
+    "-g",
+    type=click.Choice(list(rankings.GRUPPI)),
+    default="ruolo",
+    help="Rank within the role or within the team",
+)
+@click.option("--role", "-r", help="Only this role (e.g., ATT, P)")
+@click.option("--team", help="Only teams matching this name")
+@click.option("--limit", "-l", type=int, default=20, help="Number of players to show")
+def ranking(source, by, group, role, team, limit):
+    """
+    🥇 Players ranked within their role or team
+
+    Percentile, z-score and rank of a score among the players of the same
+    role (or team). Uses the cached analysis stages, so after 'analyze'
+    sorting and filtering take no scoring at all.
+    """
+    df_fpedia, df_fstats = data_processor.load_dataframes()
+    df = df_fpedia if source == "fpedia" else df_fstats
+    if df.empty:
+        rprint(f"❌ [red]No {source.upper()} data found. Run 'scrape' first.[/red]")
+        return
+
+    df = _score_data(source, df)
+    try:
+        df_display = rankings.select(df, by, group, ruolo=role, squadra=team)
+    except ValueError as e:
+        raise click.BadParameter(
+            f"{e}; available: {rankings.score_columns(df, source)}", param_hint="--by"
+        ) from e
+
+    rprint(
+        f"\n🥇 [bold]{source.upper()} - {by} by {group}[/bold] ({len(df_display)} players)"
+    )
+    table = Table(show_header=True, header_style="bold magenta")
+    for colonna in ("Nome", "Ruolo", "Squadra"):
+        table.add_column(colonna)
+    for colonna in (by, "Rank", "Percentile", "Z-score"):
+        table.add_column(colonna, justify="right")
+    for _, row in df_display.head(limit).iterrows():
+        squadra = row.get("Squadra", "N/A")
+        table.add_row(
+            str(row.get("Nome", "N/A")),
+            str(row.get("Ruolo", "N/A")),
+            str(squadra.get("name") if isinstance(squadra, dict) else squadra),
+            f"{row[by]:.2f}",
+            str(row[rankings.column(by, "rank", group)]),
+            f"{row[rankings.column(by, 'percentile', group)]:.1f}",
+            f"{row[rankings.column(by, 'z', group)]:+.2f}",
+        )
+    console.print(table)
+
+
+def _fstats_inspect(df):
+    """FSTATS columns under their analysis names, team dicts as team names."""
+    df = df.rename(columns=data_processor.FSTATS_RENAME)
+    if "Squadra" in df.columns:
+        df["Squadra"] = df["Squadra"].map(
+            lambda t: t.get("name") if isinstance(t, dict) else t
+        )
+    return df
+
+
 @cli.command()
 @click.option(
     "--source",
@@ -452,40 +790,69 @@ def run(ctx, source, force_scrape, top):
 @click.option("--role", "-r", help="Filter by player role (e.g., Portieri, Difensori)")
 @click.option("--team", help="Filter by team name")
 @click.option("--limit", "-l", type=int, default=10, help="Number of players to show")
-def inspect(source, role, team, limit):
+@click.option(
+    "--snapshot",
+    type=int,
+    help="Snapshot id to inspect (default: the latest, see 'status')",
+)
+@click.option(
+    "--season",
+    "seasons",
+    type=int,
+    multiple=True,
+    help="FSTATS season to inspect, by start year (repeatable); "
+    "reads only the partitions of those seasons",
+)
+def inspect(source, role, team, limit, snapshot, seasons):
     """
     🔍 Inspect loaded data without full analysis
 
     Quick preview of the data to verify scraping worked correctly
     and explore player information before running analysis.
+    Reads the latest snapshot of the database when there is one.
     """
-    df_fpedia, df_fstats = data_processor.load_dataframes()
+    import pandas as pd
 
-    if source == "fpedia":
-        df = df_fpedia
-        if df.empty:
-            rprint(
-                "❌ [red]No FPEDIA data found. Run 'fantacalcio scrape' first.[/red]"
-            )
-            return
+    if seasons and (source != "fstats" or snapshot is not None):
+        raise click.BadParameter(
+            "only for FSTATS and without --snapshot", param_hint="--season"
+        )
+    stagione = config.ANNO_CORRENTE if source == "fpedia" else config.FSTATS_ANNO
+    if not seasons:
+        snapshot = snapshot or snapshot_db.latest(source, stagione)
+    if snapshot is not None:
+        # Filters and limit evaluated by SQLite on its indexed columns
+        total_players = snapshot_db.count(snapshot, squadra=team, ruolo=role)
+        df_display = data_store.apply_dtypes(
+            snapshot_db.query(snapshot, squadra=team, ruolo=role, limit=limit),
+            data_processor.SCHEMI[source],
+        )
+        if source == "fstats":
+            df_display = _fstats_inspect(df_display)
     else:
-        df = df_fstats
+        df_fpedia, df_fstats = data_processor.load_dataframes(
+            vista="inspect", stagioni=list(seasons)
+        )
+        df = df_fpedia if source == "fpedia" else df_fstats
         if df.empty:
             rprint(
-                "❌ [red]No FSTATS data found. Run 'fantacalcio scrape' first.[/red]"
+                f"❌ [red]No {source.upper()} data found. "
+                "Run 'fantacalcio scrape' first.[/red]"
             )
             return
 
-    # Apply filters
-    if role and "Ruolo" in df.columns:
-        df = df[df["Ruolo"].str.contains(role, case=False, na=False)]
+        if source == "fstats":
+            df = _fstats_inspect(df)
 
-    if team and "Squadra" in df.columns:
-        df = df[df["Squadra"].str.contains(team, case=False, na=False)]
+        # Apply filters
+        if role and "Ruolo" in df.columns:
+            df = df[df["Ruolo"].astype(str).str.contains(role, case=False, na=False)]
 
-    # Show results
-    total_players = len(df)
-    df_display = df.head(limit)
+        if team and "Squadra" in df.columns:
+            df = df[df["Squadra"].astype(str).str.contains(team, case=False, na=False)]
+
+        total_players = len(df)
+        df_display = df.head(limit)
 
     rprint(f"\n📊 [bold]{source.upper()} Data Preview[/bold]")
     rprint(f"Total players: {total_players}")
@@ -502,7 +869,7 @@ def inspect(source, role, team, limit):
     if source == "fpedia":
         key_cols.extend(["Punteggio", "Presenze campionato corrente"])
     else:
-        key_cols.extend(["fanta_avg", "presences"])
+        key_cols.extend(["fanta_avg", "presences", "Stagione"])
 
     for col in key_cols:
         if col in df_display.columns:
@@ -536,10 +903,12 @@ def status():
     table.add_column("Details")
 
     # Check data files
-    fpedia_exists = os.path.exists(config.GIOCATORI_CSV)
-    fpedia_size = os.path.getsize(config.GIOCATORI_CSV) if fpedia_exists else 0
-    fstats_exists = os.path.exists(config.PLAYERS_CSV)
-    fstats_size = os.path.getsize(config.PLAYERS_CSV) if fstats_exists else 0
+    fpedia_path = data_store.stored_path(config.GIOCATORI_CSV)
+    fpedia_exists = fpedia_path is not None
+    fpedia_size = os.path.getsize(fpedia_path) if fpedia_exists else 0
+    fstats_path = data_store.stored_path(config.PLAYERS_CSV)
+    fstats_exists = fstats_path is not None
+    fstats_size = os.path.getsize(fstats_path) if fstats_exists else 0
 
     table.add_row(
         "FPEDIA Data",
@@ -561,6 +930,55 @@ def status():
         config.OUTPUT_DIR,
     )
 
+    # Check HTTP cache
+    cache_stats = http_cache.read_stats()
+    last_run = cache_stats["last_run"]
+    cache_details = f"{cache_stats['pages']} pages, {cache_stats['size'] // 1024} KB"
+    if last_run:
+        cache_details += (
+            f" - last run: {last_run['hit']} hit, {last_run['miss']} miss, "
+            f"{last_run['not_modified']} 304"
+        )
+    table.add_row(
+        "HTTP Cache",
+        "✅ Ready" if cache_stats["pages"] else "ℹ️ Empty",
+        cache_details,
+    )
+
+    # Check HTML archive
+    packs = html_archive.list_packs()
+    archive_size = (
+        sum(entry.stat().st_size for entry in os.scandir(config.HTML_ARCHIVE_DIR))
+        if packs
+        else 0
+    )
+    table.add_row(
+        "HTML Archive",
+        "✅ Ready" if packs else "ℹ️ Empty",
+        f"{len(packs)} scrapes, {archive_size // 1024} KB"
+        + (f" - latest: {packs[-1]}" if packs else ""),
+    )
+
+    # Check analysis stage cache
+    stage_stats = stage_cache.read_stats()
+    table.add_row(
+        "Stage Cache",
+        "✅ Ready" if stage_stats["entries"] else "ℹ️ Empty",
+        f"{stage_stats['entries']} stage results, {stage_stats['size'] // 1024} KB",
+    )
+
+    # Check snapshot database
+    elenco = snapshot_db.snapshots()
+    table.add_row(
+        "Snapshot DB",
+        "✅ Ready" if elenco else "ℹ️ Empty",
+        (
+            f"{len(elenco)} snapshots, {os.path.getsize(config.SNAPSHOT_DB) // 1024} KB"
+            if elenco
+            else "Filled by every completed scrape"
+        ),
+    )
+
     # Check .env file
     env_exists = os.path.exists(".env")
     table.add_row(
@@ -572,9 +990,39 @@ def status():
     # Configuration
     table.add_row("Current Season", "ℹ️", str(config.ANNO_CORRENTE))
     table.add_row("FSTATS Season", "ℹ️", str(config.FSTATS_ANNO))
+    stagioni_scaricate = [
+        str(anno)
+        for anno in config.FSTATS_STAGIONI
+        if data_store.exists(config.players_csv(anno))
+    ]
+    table.add_row(
+        "FSTATS History",
+        "ℹ️",
+        (
+            ", ".join(stagioni_scaricate)
+            if stagioni_scaricate
+            else "No seasons downloaded"
+        ),
+    )
 
     console.print(table)
 
+    if elenco:
+        table = Table(
+            title="Latest snapshots", show_header=True, header_style="bold cyan"
+        )
+        for colonna in ("Id", "Source", "Season", "Taken at", "Players"):
+            table.add_column(colonna)
+        for voce in elenco[-10:]:
+            table.add_row(
+                str(voce["id"]),
+                voce["fonte"],
+                str(voce["stagione"]),
+                voce["creato_il"],
+                str(voce["giocatori"]),
+            )
+        console.print(table)
+
     if not env_exists:
         rprint("\n⚠️ [yellow]Warning: .env file not found![/yellow]")
         rprint(
@@ -583,16 +1031,70 @@ def status():
 
 
 
+def _score_data(source, df):
+    """
+    Processed and scored players of `source`: processing, Convenienza,
+    scoring profiles and per-role/per-team rankings, each a cached stage.
+    """
+    profili = stage_cache.file_digest(config.SCORING_PROFILES_FILE)
+    if source == "fpedia":
+        # The trend features depend on the snapshot history too
+        df = stage_cache.cached(
+            "process_fpedia",
+            data_processor.process_fpedia_data,
+            df,
+            extra=[snapshot_db.latest("fpedia")],
+            modules=[player_history, skills, data_store],
+        )
+        df = stage_cache.cached(
+            "convenienza_fpedia",
+            convenienza_calculator.calcola_convenienza_fpedia,
+            df,
+            modules=[skills, data_store],
+        )
+    else:
+        df = stage_cache.cached(
+            "process_fstats", data_processor.process_FSTATS_data, df
+        )
+        df = stage_cache.cached(
+            "convenienza_fstats", convenienza_calculator.calcola_convenienza_FSTATS, df
+        )
+    df = stage_cache.cached(
+        f"profili_{source}",
+        scoring_profiles.add_profile_columns,
+        df,
+        source,
+        extra=[profili],
+    )
+    return stage_cache.cached(
+        f"ranking_{source}",
+        rankings.add_rankings,
+        df,
+        source,
+        extra=[profili],
+        modules=[scoring_profiles],
+    )
+
+
+def _output_paths(base_name):
+    """Excel and JSON files written by _save_analysis_results"""
+    return [
+        os.path.join(config.OUTPUT_DIR, f"{base_name}.xlsx"),
+        os.path.join(config.OUTPUT_DIR, f"{base_name}.json"),
+    ]
+
+
 def _save_analysis_results(df, base_name, source_name):
     """Helper function to save analysis results in both Excel and JSON formats"""
     import pandas as pd
 
+    df = data_store.to_export(df)
+    excel_path, json_path = _output_paths(base_name)
+
     # Excel output
-    excel_path = os.path.join(config.OUTPUT_DIR, f"{base_name}.xlsx")
     df.to_excel(excel_path, index=False)
 
     # JSON output
-    json_path = os.path.join(config.OUTPUT_DIR, f"{base_name}.json")
     data = {
         "metadata": {
             "source": source_name,
@@ -630,7 +1132,8 @@ def _merge_datasets_with_mapping(df_fpedia_final, df_fstats_final, mapping_file=
         return pd.DataFrame()
 
     # Prepare datasets for merging
-    df_fpedia_merge = df_fpedia_final.copy()
+    # The packed skills matrix is internal to the scorers
+    df_fpedia_merge = df_fpedia_final.drop(columns=[skills.COLONNA], errors="ignore")
     df_fstats_merge = df_fstats_final.copy()
 
     # Rename columns to avoid conflicts
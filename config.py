@@ -12,25 +12,119 @@ DATA_DIR = "data"
 OUTPUT_DIR = os.path.join(DATA_DIR, "output")
 GIOCATORI_URLS_FILE = os.path.join(DATA_DIR, "giocatori_urls.txt")
 GIOCATORI_CSV = os.path.join(DATA_DIR, "_giocatori.csv")
-PLAYERS_CSV = os.path.join(DATA_DIR, "_players.csv")
+GIOCATORI_JOURNAL = os.path.join(DATA_DIR, "_giocatori.jsonl")
+GIOCATORI_FAILED = os.path.join(DATA_DIR, "_giocatori_failed.jsonl")
+FSTATS_DIR = os.path.join(DATA_DIR, "fstats")
 CONVENIENZA_CSV = os.path.join(OUTPUT_DIR, "convenienza.csv")
 OUTPUT_EXCEL = os.path.join(OUTPUT_DIR, "fantacalcio_analysis.xlsx")
+HTTP_CACHE_DIR = os.path.join(DATA_DIR, "http_cache")
+FPEDIA_FIXTURES_DIR = os.path.join(DATA_DIR, "fixtures", "fpedia")
+FSTATS_TOKEN_FILE = os.path.join(DATA_DIR, ".fstats_token.json")
+HTML_ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+HTTP_FIXTURES_DIR = os.path.join(DATA_DIR, "fixtures", "http")
+SNAPSHOT_DB = os.path.join(DATA_DIR, "snapshots.sqlite")
+STAGE_CACHE_DIR = os.path.join(DATA_DIR, "stage_cache")
+# Formule di convenienza della lega (vedi scoring_profiles.example.yaml)
+SCORING_PROFILES_FILE = "scoring_profiles.yaml"
 
 # URLS
 ANNO_CORRENTE = 2025
 FSTATS_ANNO = 2024
-BASEURL_FPEDIA = decode("aHR0cHM6Ly93d3cuZmFudGFjYWxjaW9wZWRpYS5jb20=")
-BASEURL_FSTATS = decode("aHR0cHM6Ly9hcGkuYXBwLmZhbnRhZ29hdC5pdC9hcGk=")
+# Sovrascrivibili da ambiente, ad es. per puntare a replay_server.py
+BASEURL_FPEDIA = os.getenv("FPEDIA_BASE_URL") or decode(
+    "aHR0cHM6Ly93d3cuZmFudGFjYWxjaW9wZWRpYS5jb20="
+)
+BASEURL_FSTATS = os.getenv("FSTATS_BASE_URL") or decode(
+    "aHR0cHM6Ly9hcGkuYXBwLmZhbnRhZ29hdC5pdC9hcGk="
+)
 FPEDIA_URL = f"{BASEURL_FPEDIA}/lista-calciatori-serie-a/"
 FSTATS_LOGIN_URL = f"{BASEURL_FSTATS}/account/login/"
-FSTATS_PLAYERS_URL = f"{BASEURL_FSTATS}/v1/zona/player/?page_size=1000&page=1&season={str(FSTATS_ANNO)}%2F{str(FSTATS_ANNO+1)[-2:]}&ordering="
+FSTATS_PLAYERS_URL = f"{BASEURL_FSTATS}/v1/zona/player/?season={{stagione}}&ordering="
+
+# Stagioni FSTATS scaricate (anno di inizio): una partizione per stagione.
+# Le stagioni passate sono definitive e vengono scaricate una volta sola.
+FSTATS_STAGIONI = [FSTATS_ANNO - 2, FSTATS_ANNO - 1, FSTATS_ANNO]
+
+
+def players_csv(anno: int) -> str:
+    """Partizione FSTATS della stagione che inizia in `anno`."""
+    return os.path.join(FSTATS_DIR, f"season={anno}", "_players.csv")
+
+
+PLAYERS_CSV = players_csv(FSTATS_ANNO)
 
 # Scraping
 RUOLI = ["Portieri", "Difensori", "Centrocampisti", "Trequartisti", "Attaccanti"]
 MAX_WORKERS = 5
+# Pausa casuale (secondi, min e max) prima di ogni pagina giocatore nel motore a thread
+POLITENESS_DELAY = (1.0, 8.0)
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
+# Backend di parsing HTML: "html.parser", "lxml" o "selectolax"
+HTML_PARSER = "html.parser"
+# Processi dedicati al parsing delle pagine giocatore (0 = parsing nei thread di download)
+PARSER_PROCESSES = min(4, os.cpu_count() or 1)
+# Ogni quanti giocatori il journal viene compattato nel CSV
+JOURNAL_COMPACT_EVERY = 50
+# Pool di connessioni HTTP keep-alive (numero di host e connessioni per host)
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 20
+# Cache HTTP su disco delle pagine giocatore (richieste condizionali ETag/Last-Modified)
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_MAX_MB = 200
+HTTP_CACHE_TTL = 0  # Secondi in cui una pagina è servita senza rivalidarla
+# Cache su disco delle fasi dell'analisi (elaborazione, matching, convenienza,
+# merge, export): chiave = hash dei dati in ingresso, delle costanti di config
+# e del codice della fase; oltre STAGE_CACHE_MAX_MB si eliminano le meno usate
+STAGE_CACHE_ENABLED = True
+STAGE_CACHE_MAX_MB = 100
+# Formato dei dati scaricati: "parquet" (colonne tipizzate, liste e struct native;
+# richiede pyarrow, altrimenti si usa il CSV) o "csv". Con EXPORT_CSV i CSV
+# vengono scritti comunque, come export.
+DATA_STORE = "parquet"
+EXPORT_CSV = True
+# Archivio compresso delle pagine HTML scaricate (un pack per scraping), usato da
+# "cli.py reparse" per ricostruire i dati senza riscaricare; pack mantenuti
+HTML_ARCHIVE_ENABLED = True
+HTML_ARCHIVE_KEEP = 3
+# Ogni scraping completato è aggiunto come snapshot datato al database SQLite
+# SNAPSHOT_DB, interrogato da "cli.py inspect" e "cli.py analyze --snapshot"
+SNAPSHOT_ENABLED = True
+# Storia dei campi numerici FPEDIA, codificata a delta fra gli snapshot: con
+# almeno TREND_MIN_SNAPSHOT snapshot il "Trend storico" (pendenza della
+# Fantamedia sugli ultimi TREND_FINESTRA) sostituisce il Trend del sito nel
+# calcolo della Convenienza
+TREND_DA_STORIA = True
+TREND_FINESTRA = 5
+TREND_MIN_SNAPSHOT = 3
+# Controllo adattivo (AIMD) delle richieste contemporanee alle pagine giocatore:
+# parte da MAX_WORKERS (o ASYNC_MAX_CONCURRENCY) e si muove fra minimo e massimo
+# in base a latenza, errori, 429 e Retry-After. False = concorrenza fissa.
+# Con CONCURRENCY_MAX = None il massimo è il valore di partenza: rallenta quando
+# il sito soffre ma non supera mai i limiti di sopra. Alzarlo solo di proposito.
+ADAPTIVE_CONCURRENCY = True
+CONCURRENCY_MIN = 1
+CONCURRENCY_MAX = None
+CONCURRENCY_LATENCY_TARGET = 3.0  # Secondi di latenza media oltre i quali si rallenta
+# Retry delle pagine giocatore fallite: tentativi per URL, backoff esponenziale con
+# jitter (base e massimo in secondi) e circuit breaker che mette in pausa tutte le
+# richieste dopo N fallimenti consecutivi
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BACKOFF_BASE = 2.0
+RETRY_BACKOFF_MAX = 60.0
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_COOLDOWN = 30.0
+# Modalità async: limite globale di richieste al secondo e richieste contemporanee
+ASYNC_RATE_LIMIT = 2.0
+ASYNC_MAX_CONCURRENCY = 10
+# API FSTATS paginata: righe per pagina e pagine scaricate in parallelo
+FSTATS_PAGE_SIZE = 1000
+FSTATS_MAX_WORKERS = 4
+# Token FSTATS salvato su disco: durata se il token non dichiara la scadenza e
+# margine (secondi) entro cui viene rinnovato prima che scada
+FSTATS_TOKEN_TTL = 3600
+FSTATS_TOKEN_REFRESH_MARGIN = 60
 FORCE_SCRAPING_MAIN = True # Forza lo scraping anche se i file esistono
 FORCE_SCRAPE_URLS = True # Forza il re-scraping degli URL dei giocatori
 
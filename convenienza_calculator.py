@@ -1,177 +1,242 @@
 # convenienza_calculator.py
+import numpy as np
 import pandas as pd
-import ast
 from loguru import logger
 from config import ANNO_CORRENTE
+import skills
+from skills import skills_mapping  # noqa: F401 (kept importable from here)
 
 # --- Funzioni per FPEDIA ---
 
-skills_mapping = {
-    "Fuoriclasse": 1,
-    "Titolare": 3,
-    "Buona Media": 2,
-    "Goleador": 4,
-    "Assistman": 2,
-    "Piazzati": 2,
-    "Rigorista": 5,
-    "Giovane talento": 2,
-    "Panchinaro": -4,
-    "Falloso": -2,
-    "Outsider": 2,
+# Pesi della Convenienza FPEDIA: quota della fantamedia della stagione
+# precedente e di quella corrente, fattore del Punteggio
+PESI_FPEDIA = {
+    "stagione_precedente": 0.20,
+    "stagione_corrente": 0.80,
+    "punteggio": 0.30,
 }
 
 
-def calcola_convenienza_fpedia(df: pd.DataFrame) -> pd.DataFrame:
+def _numerico(df: pd.DataFrame, col: str, default: float = 0) -> np.ndarray:
+    """Column as float64 with non-numeric values as 0 (`default` if missing)."""
+    if col not in df.columns:
+        return np.full(len(df), float(default))
+    serie = df[col]
+    if serie.dtype.kind in "biuf":
+        # Already numeric (the processed data): no parsing needed
+        valori = serie.to_numpy(dtype=float)
+        return np.where(np.isnan(valori), 0.0, valori)
+    return pd.to_numeric(serie, errors="coerce").fillna(0).to_numpy(dtype=float)
+
+
+def _vero(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Truth value of each cell, as `if value:` (NaN is true), False if missing."""
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    serie = df[col]
+    if serie.dtype == bool:
+        return serie.to_numpy()
+    if pd.api.types.is_numeric_dtype(
+        serie
+    ) and not pd.api.types.is_extension_array_dtype(serie):
+        valori = serie.to_numpy(dtype=float)
+        return (valori != 0) | np.isnan(valori)
+    return serie.map(bool).to_numpy(dtype=bool)
+
+
+def _uguale(df: pd.DataFrame, col: str, valore: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return (df[col] == valore).to_numpy(dtype=bool)
+
+
+def _dati_fpedia(df: pd.DataFrame) -> dict:
+    """Numeric inputs of the FPEDIA Convenienza, as float64 arrays."""
+    partite_corr = _numerico(df, "Presenze campionato corrente")
+    giocatemax = partite_corr.max()
+    if giocatemax == 0:
+        giocatemax = 1
+    return {
+        "fantamedia_prec": _numerico(
+            df, f"Fantamedia anno {ANNO_CORRENTE-2}-{ANNO_CORRENTE-1}"
+        ),
+        "partite_prec": _numerico(df, "Partite giocate"),
+        "fantamedia_corr": _numerico(
+            df, f"Fantamedia anno {ANNO_CORRENTE-1}-{ANNO_CORRENTE}"
+        ),
+        "partite_corr": partite_corr,
+        "giocatemax": giocatemax,
+        "punteggio": _numerico(df, "Punteggio", default=1),
+    }
+
+
+def _rettifiche_fpedia(df: pd.DataFrame) -> list:
+    """(mask, points) pairs added to the Convenienza after the skills bonus, in order."""
+    buon_investimento = _numerico(df, "Buon investimento")
+    resistenza = _numerico(df, "Resistenza infortuni")
+
+    # Trend from our own snapshot history when known, else the scraped one
+    trend_up = _uguale(df, "Trend", "UP")
+    if "Trend storico" in df.columns:
+        storico = df["Trend storico"]
+        trend_up = np.where(
+            storico.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool),
+            (storico == "UP").to_numpy(dtype=bool),
+            trend_up,
+        )
+
+    return [
+        (_vero(df, "Nuovo acquisto"), -2),
+        (buon_investimento == 60, 3),
+        (_vero(df, "Consigliato prossima giornata"), 1),
+        (trend_up, 2),
+        (_vero(df, "Infortunato"), -1),
+        (resistenza > 60, 4),
+        (resistenza == 60, 2),
+    ]
+
+
+def calcola_convenienza_fpedia(df: pd.DataFrame, pesi: dict = None) -> pd.DataFrame:
     """
     Calcola due indici di convenienza per i dati di FPEDIA:
     1. 'Convenienza': basata sulle performance stagionali (presenze, fantamedia).
     2. 'Convenienza Potenziale': basata sul valore intrinseco del giocatore (Punteggio, Skills),
        utile soprattutto a inizio campionato o con poche presenze.
+    Entrambi sono calcolati per colonne, con le stesse operazioni (e lo stesso
+    ordine) della versione riga per riga. `pesi` sostituisce quelli di PESI_FPEDIA.
     """
     if df.empty:
         logger.warning("DataFrame FPEDIA è vuoto. Calcolo saltato.")
         return df
+    pesi = {**PESI_FPEDIA, **(pesi or {})}
 
     # --- Calcolo Convenienza (basata su presenze) ---
-    res_convenienza = []
-    df_calc = df.copy()
-
-    numeric_cols = [
-        f"Fantamedia anno {ANNO_CORRENTE-2}-{ANNO_CORRENTE-1}",
-        "Partite giocate",
-        f"Fantamedia anno {ANNO_CORRENTE-1}-{ANNO_CORRENTE}",
-        "Presenze campionato corrente",
-        "Punteggio",
-        "Buon investimento",
-        "Resistenza infortuni",
-    ]
-    for col in numeric_cols:
-        df_calc[col] = pd.to_numeric(df_calc[col], errors="coerce").fillna(0)
+    d = _dati_fpedia(df)
+    fantamedia_prec, partite_prec = d["fantamedia_prec"], d["partite_prec"]
+    fantamedia_corr, partite_corr = d["fantamedia_corr"], d["partite_corr"]
+    punteggio = d["punteggio"]
 
-    giocatemax = df_calc["Presenze campionato corrente"].max()
-    if giocatemax == 0:
-        giocatemax = 1
+    precedente = np.where(
+        partite_prec > 0,
+        fantamedia_prec * (partite_prec / 38) * pesi["stagione_precedente"],
+        0.0,
+    )
+    appetibilita = np.where(
+        partite_corr > 5,
+        precedente
+        + fantamedia_corr
+        * (partite_corr / d["giocatemax"])
+        * pesi["stagione_corrente"],
+        np.where(partite_prec > 0, fantamedia_prec * (partite_prec / 38), precedente),
+    )
+    appetibilita = appetibilita * punteggio * pesi["punteggio"]
+    pt = np.where(punteggio != 0, punteggio, 1)
+    appetibilita = (appetibilita / pt) * 100 / 40
 
-    for _, row in df_calc.iterrows():
-        appetibilita = 0
-        fantamedia_prec = row.get(
-            f"Fantamedia anno {ANNO_CORRENTE-2}-{ANNO_CORRENTE-1}", 0
-        )
-        partite_prec = row.get("Partite giocate", 0)
-        fantamedia_corr = row.get(
-            f"Fantamedia anno {ANNO_CORRENTE-1}-{ANNO_CORRENTE}", 0
-        )
-        partite_corr = row.get("Presenze campionato corrente", 0)
-        punteggio = row.get("Punteggio", 1)
-
-        if partite_prec > 0:
-            appetibilita += fantamedia_prec * (partite_prec / 38) * 0.20
-        if partite_corr > 5:
-            appetibilita += fantamedia_corr * (partite_corr / giocatemax) * 0.80
-        elif partite_prec > 0:
-            appetibilita = fantamedia_prec * (partite_prec / 38)
-
-        appetibilita = appetibilita * punteggio * 0.30
-        pt = punteggio if punteggio != 0 else 1
-        appetibilita = (appetibilita / pt) * 100 / 40
-
-        try:
-            skills_list = ast.literal_eval(row.get("Skills", "[]"))
-            plus = sum(skills_mapping.get(skill, 0) for skill in skills_list)
-            appetibilita += plus
-        except (ValueError, SyntaxError):
-            pass
-
-        if row.get("Nuovo acquisto", False):
-            appetibilita -= 2
-        if row.get("Buon investimento", 0) == 60:
-            appetibilita += 3
-        if row.get("Consigliato prossima giornata", False):
-            appetibilita += 1
-        if row.get("Trend", "") == "UP":
-            appetibilita += 2
-        if row.get("Infortunato", False):
-            appetibilita -= 1
-        if row.get("Resistenza infortuni", 0) > 60:
-            appetibilita += 4
-        elif row.get("Resistenza infortuni", 0) == 60:
-            appetibilita += 2
-
-        res_convenienza.append(appetibilita)
-
-    df["Convenienza"] = res_convenienza
+    plus = skills.bonus(df)
+    appetibilita = appetibilita + plus
+    for maschera, punti in _rettifiche_fpedia(df):
+        appetibilita = np.where(maschera, appetibilita + punti, appetibilita)
+
+    df["Convenienza"] = appetibilita
     logger.debug("Indice 'Convenienza' calcolato per FPEDIA.")
 
     # --- Calcolo Convenienza Potenziale (indipendente da presenze) ---
-    res_potenziale = []
-    for _, row in df_calc.iterrows():
-        potenziale = row.get("Punteggio", 0)
-        try:
-            skills_list = ast.literal_eval(row.get("Skills", "[]"))
-            plus = sum(skills_mapping.get(skill, 0) for skill in skills_list)
-            potenziale += plus * 2  # Diamo più peso alle skill nel potenziale
-        except (ValueError, SyntaxError):
-            pass
-        res_potenziale.append(potenziale)
-
-    df["Convenienza Potenziale"] = res_potenziale
+    potenziale = _numerico(df, "Punteggio")
+    df["Convenienza Potenziale"] = (
+        potenziale + plus * 2
+    )  # Diamo più peso alle skill nel potenziale
     logger.debug("Indice 'Convenienza Potenziale' calcolato per FPEDIA.")
 
     return df
 
 
+def convenienza_fpedia_batch(df: pd.DataFrame, pesi: np.ndarray) -> np.ndarray:
+    """
+    'Convenienza' FPEDIA of every player for each row of `pesi` (K × 3, columns
+    in the order of PESI_FPEDIA) as a players × K matrix. The index is linear
+    in the season weights times the Punteggio factor, so all K configurations
+    are one (players × 3) @ (3 × K) product; equal to calcola_convenienza_fpedia
+    up to float rounding.
+    """
+    pesi = np.atleast_2d(np.asarray(pesi, dtype=float))
+    d = _dati_fpedia(df)
+    con_prec = d["partite_prec"] > 0
+    corrente = d["partite_corr"] > 5
+    prec = np.where(con_prec, d["fantamedia_prec"] * (d["partite_prec"] / 38), 0.0)
+    corr = np.where(
+        corrente, d["fantamedia_corr"] * (d["partite_corr"] / d["giocatemax"]), 0.0
+    )
+    pt = np.where(d["punteggio"] != 0, d["punteggio"], 1)
+    scala = d["punteggio"] / pt * 100 / 40
+
+    # With few current appearances the previous season counts alone, unweighted
+    componenti = np.column_stack(
+        [
+            scala * np.where(corrente, prec, 0.0),
+            scala * corr,
+            scala * np.where(corrente, 0.0, prec),
+        ]
+    )
+    coefficienti = np.vstack(
+        [pesi[:, 0] * pesi[:, 2], pesi[:, 1] * pesi[:, 2], pesi[:, 2]]
+    )
+    costante = skills.bonus(df)
+    for maschera, punti in _rettifiche_fpedia(df):
+        costante = costante + np.where(maschera, punti, 0)
+    return componenti @ coefficienti + costante[:, None]
+
+
 # --- Funzioni per FSTATS ---
 
+# Pesi della Convenienza FSTATS: fantamedia, bonus, potenziale (xG + xA) e
+# malus per presenza
+PESI_FSTATS = {"fanta_avg": 0.6, "bonus": 0.25, "potenziale": 0.15, "malus": 0.2}
+
 
-def calcola_convenienza_FSTATS(df: pd.DataFrame) -> pd.DataFrame:
+def calcola_convenienza_FSTATS(df: pd.DataFrame, pesi: dict = None) -> pd.DataFrame:
     """
     Calcola due indici di convenienza per i dati di FSTATS:
     1. 'Convenienza': basata sulle performance stagionali (presenze, fantamedia).
     2. 'Convenienza Potenziale': basata sul valore intrinseco (fantacalcioFantaindex) e potenziale
        statistico (xG, xA), utile soprattutto a inizio campionato.
+    `pesi` sostituisce quelli di PESI_FSTATS.
     """
     if df.empty:
         logger.warning("DataFrame FSTATS è vuoto. Calcolo saltato.")
         return df
+    pesi = {**PESI_FSTATS, **(pesi or {})}
 
-    df_calc = df.copy()
-    numeric_cols = [
-        "goals",
-        "assists",
-        "yellowCards",
-        "redCards",
-        "xgFromOpenPlays",
-        "xA",
-        "presences",
-        "fanta_avg",
-        "fantacalcioFantaindex",
-    ]
-    for col in numeric_cols:
-        df_calc[col] = pd.to_numeric(df_calc[col], errors="coerce").fillna(0)
+    # Results are assigned by position: no join on Nome, so homonymous
+    # players keep one row each
+    df = df.copy()
+    presenze = _numerico(df, "presences")
+    xg_xa = _numerico(df, "xgFromOpenPlays") + _numerico(df, "xA")
 
     # --- Calcolo Convenienza (basata su presenze) ---
-    df_con_presenze = df_calc[df_calc["presences"] > 0].reset_index(drop=True)
-    if not df_con_presenze.empty:
-        bonus_score = (df_con_presenze["goals"] * 3) + (df_con_presenze["assists"] * 1)
-        malus_score = (df_con_presenze["yellowCards"] * 0.5) + (
-            df_con_presenze["redCards"] * 1
+    attivi = presenze > 0
+    if attivi.any():
+        presenze_attivi = presenze[attivi]
+        bonus_score = (_numerico(df, "goals")[attivi] * 3) + (
+            _numerico(df, "assists")[attivi] * 1
+        )
+        malus_score = (_numerico(df, "yellowCards")[attivi] * 0.5) + (
+            _numerico(df, "redCards")[attivi] * 1
         )
-        bonus_per_presence = bonus_score / df_con_presenze["presences"]
-        malus_per_presence = malus_score / df_con_presenze["presences"]
-        potential_score = (
-            df_con_presenze["xgFromOpenPlays"] + df_con_presenze["xA"]
-        ) / df_con_presenze["presences"]
+        bonus_per_presence = bonus_score / presenze_attivi
+        malus_per_presence = malus_score / presenze_attivi
+        potential_score = xg_xa[attivi] / presenze_attivi
 
         convenienza = (
-            df_con_presenze["fanta_avg"] * 0.6
-            + bonus_per_presence * 0.25
-            + potential_score * 0.15
-            - malus_per_presence * 0.2
-        )
-        df_con_presenze["Convenienza"] = (
-            (convenienza / convenienza.max()) * 100 if not convenienza.empty else 0
+            _numerico(df, "fanta_avg")[attivi] * pesi["fanta_avg"]
+            + bonus_per_presence * pesi["bonus"]
+            + potential_score * pesi["potenziale"]
+            - malus_per_presence * pesi["malus"]
         )
-        df = df.merge(df_con_presenze[["Nome", "Convenienza"]], on="Nome", how="left")
+        valori = np.zeros(len(df))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            valori[attivi] = (convenienza / convenienza.max()) * 100
+        df["Convenienza"] = np.where(np.isnan(valori), 0.0, valori)
         logger.debug("Indice 'Convenienza' calcolato per FSTATS.")
     else:
         df["Convenienza"] = 0
@@ -180,16 +245,47 @@ def calcola_convenienza_FSTATS(df: pd.DataFrame) -> pd.DataFrame:
         )
 
     # --- Calcolo Convenienza Potenziale (indipendente da presenze) ---
-    potential_stats = (
-        df_calc["xgFromOpenPlays"] + df_calc["xA"]
-    ) * 2  # Pondera il potenziale xG/xA
-    potenziale = df_calc["fantacalcioFantaindex"] + potential_stats
+    potential_stats = xg_xa * 2  # Pondera il potenziale xG/xA
+    potenziale = _numerico(df, "fantacalcioFantaindex") + potential_stats
 
-    df_calc["Convenienza Potenziale"] = (
-        (potenziale / potenziale.max()) * 100 if not potenziale.empty else 0
-    )
-    df = df.merge(df_calc[["Nome", "Convenienza Potenziale"]], on="Nome", how="left")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        potenziale = (potenziale / potenziale.max()) * 100
+    df["Convenienza Potenziale"] = np.where(np.isnan(potenziale), 0.0, potenziale)
     logger.debug("Indice 'Convenienza Potenziale' calcolato per FSTATS.")
 
-    df.fillna({"Convenienza": 0, "Convenienza Potenziale": 0}, inplace=True)
     return df
+
+
+def convenienza_fstats_batch(df: pd.DataFrame, pesi: np.ndarray) -> np.ndarray:
+    """
+    'Convenienza' FSTATS of every player for each row of `pesi` (K × 4,
+    columns in the order of PESI_FSTATS) as a players × K matrix: one
+    (players × 4) @ (4 × K) product, each column scaled to its maximum like
+    calcola_convenienza_FSTATS. Players without presences, and every player
+    of a configuration whose maximum is 0, score 0.
+    """
+    pesi = np.atleast_2d(np.asarray(pesi, dtype=float))
+    presenze = _numerico(df, "presences")
+    attivi = presenze > 0
+    per_presenza = np.where(attivi, 1 / np.where(attivi, presenze, 1), 0.0)
+    bonus_score = _numerico(df, "goals") * 3 + _numerico(df, "assists") * 1
+    malus_score = _numerico(df, "yellowCards") * 0.5 + _numerico(df, "redCards") * 1
+    potential = _numerico(df, "xgFromOpenPlays") + _numerico(df, "xA")
+
+    componenti = np.column_stack(
+        [
+            np.where(attivi, _numerico(df, "fanta_avg"), 0.0),
+            bonus_score * per_presenza,
+            potential * per_presenza,
+            -malus_score * per_presenza,
+        ]
+    )
+    punteggi = componenti @ pesi.T
+    if not attivi.any():
+        return np.zeros_like(punteggi)
+    massimi = punteggi[attivi].max(axis=0)
+    # Configurazioni con massimo 0 (nessun punteggio positivo): tutti a 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        punteggi = np.where(massimi != 0, punteggi / massimi * 100, 0.0)
+    punteggi[~attivi] = 0
+    return punteggi
@@ -2,40 +2,176 @@
 import pandas as pd
 from loguru import logger
 import config
-import os
+import data_store
+import player_history
+import skills
+import snapshot_db
 
+# Schema di caricamento per fonte: tipo compatto delle colonne note (le altre
+# restano come le inferisce pandas). L'analisi completa applica solo i category,
+# per non cambiare gli indici calcolati (float64); le viste usano tutti i tipi.
+SCHEMI = {
+    "fpedia": {
+        "Nome": "string",
+        "Ruolo": "category",
+        "Squadra": "category",
+        "Trend": "category",
+        "Punteggio": "Int16",
+        f"Fantamedia anno {config.ANNO_CORRENTE-2}-{config.ANNO_CORRENTE-1}": "float32",
+        f"Fantamedia anno {config.ANNO_CORRENTE-1}-{config.ANNO_CORRENTE}": "float32",
+        f"FM su tot gare {config.ANNO_CORRENTE-1}-{config.ANNO_CORRENTE}": "float32",
+        "Partite giocate": "Int16",
+        "Presenze campionato corrente": "Int16",
+        "Presenze previste": "Int16",
+        "Gol previsti": "Int16",
+        "Assist previsti": "Int16",
+        "Buon investimento": "Int16",
+        "Resistenza infortuni": "Int16",
+    },
+    "fstats": {
+        "name": "string",
+        "firstname": "string",
+        "lastname": "string",
+        "fantacalcioPosition": "category",
+        "fantacalcio_position": "category",
+        "mantra_position": "category",
+        "fantacalcioTeamName": "category",
+        "foot_name": "category",
+        "appearances": "Int16",
+        "matchesInStart": "Int16",
+        "mins_played": "Int32",
+        "goals": "Int16",
+        "assists": "Int16",
+        "yellowCards": "Int16",
+        "redCards": "Int16",
+        "penalties": "Int16",
+        "successfulPenalties": "Int16",
+        "gkPenaltiesSaved": "Int16",
+        "gkCleanSheets": "Int16",
+        "gkConcededGoals": "Int16",
+        "matchConvocation": "Int16",
+        "matchesWithGrade": "Int16",
+        "pagella": "float32",
+        "fantacalcioRanking": "float32",
+        "fantacalcioFantaindex": "float32",
+        "xgFromOpenPlays": "float32",
+        "xA": "float32",
+        "goals90min": "float32",
+        "xA90min": "float32",
+        "xgFromOpenPlays/90min": "float32",
+        "fantamediaPred": "float32",
+        "expectedFantamediaMean": "float32",
+    },
+}
 
-def load_dataframes() -> tuple[pd.DataFrame, pd.DataFrame]:
+# Colonne caricate da ogni vista (comando che legge solo una parte dei dati)
+VISTE = {
+    "inspect": {
+        "fpedia": [
+            "Nome",
+            "Ruolo",
+            "Squadra",
+            "Punteggio",
+            "Presenze campionato corrente",
+        ],
+        "fstats": [
+            "name",
+            "fantacalcioPosition",
+            "team",
+            "fantacalcioRanking",
+            "appearances",
+        ],
+    },
+    "match": {
+        "fpedia": ["Nome", "Squadra"],
+        "fstats": ["firstname", "lastname", "team"],
+    },
+}
+
+# Colonne FSTATS rinominate nel formato comune all'analisi
+FSTATS_RENAME = {
+    "name": "Nome",
+    "team": "Squadra",
+    "fantacalcioPosition": "Ruolo",  # Using the specific fantacalcio role
+    "appearances": "presences",
+    "pagella": "avg",
+    "fantacalcioRanking": "fanta_avg",
+}
+
+
+def _schema(fonte: str, vista: str = None) -> tuple[list, dict]:
+    """Columns (None = all) and dtypes to load `fonte` with, for `vista`."""
+    if vista is None:
+        tipi = {c: t for c, t in SCHEMI[fonte].items() if t == "category"}
+        return None, tipi
+    return VISTE[vista][fonte], SCHEMI[fonte]
+
+
+def load_source(
+    fonte: str, path: str = None, vista: str = None, snapshot: int = None
+) -> pd.DataFrame:
     """
-    Loads the two CSV files into pandas DataFrames, handling missing or empty files.
+    Loads one source ("fpedia" or "fstats") with its schema from `SCHEMI`:
+    every column for the analysis, or only the columns of `vista` (a key of
+    `VISTE`) with the compact dtypes. With `snapshot` the players come from
+    that snapshot of `snapshot_db` instead of the current files.
     """
-    df_fpedia = pd.DataFrame()
-    df_FSTATS = pd.DataFrame()
-
-    if (
-        os.path.exists(config.GIOCATORI_CSV)
-        and os.path.getsize(config.GIOCATORI_CSV) > 0
-    ):
-        try:
-            df_fpedia = pd.read_csv(config.GIOCATORI_CSV)
-            logger.debug("FPEDIA DataFrame loaded successfully.")
-        except Exception as e:
-            logger.error(f"Error loading {config.GIOCATORI_CSV}: {e}")
-    else:
-        logger.warning(f"{config.GIOCATORI_CSV} not found or is empty.")
-
-    if os.path.exists(config.PLAYERS_CSV) and os.path.getsize(config.PLAYERS_CSV) > 0:
-        try:
-            df_FSTATS = pd.read_csv(config.PLAYERS_CSV, sep=";")
-            logger.debug("FSTATS DataFrame loaded successfully.")
-        except Exception as e:
-            logger.error(f"Error loading {config.PLAYERS_CSV}: {e}")
+    colonne, tipi = _schema(fonte, vista)
+    if snapshot is not None:
+        df = snapshot_db.query(snapshot)
+        if colonne is not None:
+            df = df[[c for c in colonne if c in df.columns]]
+        return data_store.apply_dtypes(df, tipi)
+    if fonte == "fpedia":
+        return data_store.read(
+            path or config.GIOCATORI_CSV, columns=colonne, dtypes=tipi
+        )
+    return data_store.read(
+        path or config.PLAYERS_CSV, sep=";", columns=colonne, dtypes=tipi
+    )
+
+
+def load_dataframes(
+    vista: str = None, snapshots: dict = None, stagioni: list = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Loads the FPEDIA and FSTATS tables (Parquet, or the CSV files) into pandas
+    DataFrames, handling missing or empty files. With `vista` only the columns
+    that view needs are read, see `load_source`; `snapshots` maps a source to
+    the snapshot id to load instead of its files. With `stagioni` FSTATS is
+    read from the partitions of those seasons only, see `load_fstats_seasons`.
+    """
+    snapshots = snapshots or {}
+    df_fpedia = load_source("fpedia", vista=vista, snapshot=snapshots.get("fpedia"))
+    if not df_fpedia.empty:
+        logger.debug("FPEDIA DataFrame loaded successfully.")
+
+    if stagioni:
+        df_FSTATS = load_fstats_seasons(stagioni, vista=vista)
     else:
-        logger.warning(f"{config.PLAYERS_CSV} not found or is empty.")
+        df_FSTATS = load_source("fstats", vista=vista, snapshot=snapshots.get("fstats"))
+    if not df_FSTATS.empty:
+        logger.debug("FSTATS DataFrame loaded successfully.")
 
     return df_fpedia, df_FSTATS
 
 
+def load_fstats_seasons(stagioni: list, vista: str = None) -> pd.DataFrame:
+    """
+    Loads the FSTATS partitions of the given seasons only (start years, e.g.
+    [2022, 2023, 2024]) into one DataFrame, with a 'Stagione' column.
+    """
+    frames = []
+    for anno in stagioni:
+        df = load_source("fstats", config.players_csv(anno), vista=vista)
+        if not df.empty:
+            frames.append(df.assign(Stagione=anno))
+    if not frames:
+        return pd.DataFrame()
+    logger.debug(f"FSTATS seasons {list(stagioni)} loaded.")
+    return pd.concat(frames, ignore_index=True)
+
+
 def process_fpedia_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Processes and cleans the DataFrame from FPEDIA.
@@ -67,9 +203,19 @@ def process_fpedia_data(df: pd.DataFrame) -> pd.DataFrame:
             df[col] = 0
 
     if "Skills" not in df.columns:
-        df["Skills"] = "[]"
+        df["Skills"] = [[] for _ in range(len(df))]
     else:
-        df["Skills"] = df["Skills"].fillna("[]")
+        df["Skills"] = df["Skills"].map(data_store.as_list)
+    # Skills parsed once here: the scorers read the player × skill matrix
+    df[skills.COLONNA] = skills.encode(df["Skills"])
+
+    if config.TREND_DA_STORIA and config.SNAPSHOT_ENABLED:
+        trend = player_history.trend_features()
+        if not trend.empty:
+            df = df.drop(columns=trend.columns, errors="ignore").merge(
+                trend, left_on="Nome", right_index=True, how="left"
+            )
+            logger.debug(f"Trend features from {len(trend)} player histories added.")
 
     logger.info("FPEDIA data processed.")
     return df
@@ -87,15 +233,7 @@ def process_FSTATS_data(df: pd.DataFrame) -> pd.DataFrame:
     logger.debug("Processing FSTATS data...")
 
     # Rename columns for clarity and consistency
-    rename_map = {
-        "name": "Nome",
-        "team": "Squadra",
-        "fantacalcioPosition": "Ruolo",  # Using the specific fantacalcio role
-        "appearances": "presences",
-        "pagella": "avg",
-        "fantacalcioRanking": "fanta_avg",
-    }
-    df = df.rename(columns=rename_map)
+    df = df.rename(columns=FSTATS_RENAME)
 
     # Define the list of columns that should be numeric, using the NEW names
     numeric_cols = [
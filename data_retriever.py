@@ -1,213 +1,753 @@
 # data_retriever.py
+import contextlib
+import csv
+import math
 import os
 import time
-from random import randint
+import asyncio
+from random import uniform
 import requests
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 from loguru import logger
 from dotenv import load_dotenv
-import pandas as pd
 import concurrent.futures
+import queue
+import threading
 
 import config
+from adaptive_concurrency import AIMDController
+import data_store
+import fpedia_parser
+import fstats_auth
+import html_archive
+from retry_policy import CircuitBreaker, RetryPolicy
+from scrape_journal import DeadLetterFile, ScrapeJournal
+import snapshot_db
+import http_cache
+import http_client
 
 load_dotenv()
 
 
-def get_giocatori_urls(force=True) -> list:
-    """Scrapes FPEDIA to get all player URLs."""
-    giocatori_urls = []
-    if not os.path.exists(config.GIOCATORI_URLS_FILE) or force:
-        logger.debug("Scraping player URLs from FPEDIA...")
-        for ruolo in tqdm(config.RUOLI):
-            url = config.FPEDIA_URL + ruolo.lower() + "/"
+def _get_urls_ruolo(ruolo: str) -> list:
+    """Player URLs listed on the FPEDIA page of a single role."""
+    url = config.FPEDIA_URL + ruolo.lower() + "/"
+    response = http_client.get_session().get(url)
+    response.raise_for_status()
+    return fpedia_parser.parse_giocatori_urls(response.content)
+
+
+def iter_giocatori_urls(force=True):
+    """
+    Yields the FPEDIA player URLs as soon as they are discovered.
+    The role pages are fetched concurrently and each URL is yielded once,
+    even when the player is listed under more than one role.
+    """
+    if os.path.exists(config.GIOCATORI_URLS_FILE) and not force:
+        logger.debug("Reading player URLs from cache.")
+        with open(config.GIOCATORI_URLS_FILE, encoding="utf-8") as fp:
+            giocatori_urls = [url.strip() for url in fp]
+        yield from dict.fromkeys(url for url in giocatori_urls if url)
+        return
+
+    logger.debug("Scraping player URLs from FPEDIA...")
+    giocatori_urls = {}
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=len(config.RUOLI)
+    ) as executor:
+        future_to_ruolo = {
+            executor.submit(_get_urls_ruolo, ruolo): ruolo for ruolo in config.RUOLI
+        }
+        for future in concurrent.futures.as_completed(future_to_ruolo):
+            ruolo = future_to_ruolo[future]
             try:
-                response = requests.get(url, headers=config.HEADERS)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, "html.parser")
-                for giocatore in soup.find_all("article"):
-                    calciatore_url = giocatore.find("a").get("href")
-                    if calciatore_url:
-                        giocatori_urls.append(calciatore_url)
+                urls_ruolo = future.result()
             except requests.exceptions.RequestException as e:
                 logger.error(f"Failed to retrieve URLs for role '{ruolo}': {e}")
                 continue
-
-        if not giocatori_urls:
-            logger.warning(
-                "No player URLs were scraped from FPEDIA. "
-                "The website structure may have changed, or the request was blocked."
-            )
-        else:
-            with open(config.GIOCATORI_URLS_FILE, "w", encoding="utf-8") as fp:
-                for item in giocatori_urls:
-                    fp.write(f"{item}\n")
-            logger.debug(f"{len(giocatori_urls)} player URLs saved.")
+            for calciatore_url in urls_ruolo:
+                calciatore_url = (calciatore_url or "").strip()
+                if calciatore_url and calciatore_url not in giocatori_urls:
+                    giocatori_urls[calciatore_url] = None
+                    yield calciatore_url
+
+    if not giocatori_urls:
+        logger.warning(
+            "No player URLs were scraped from FPEDIA. "
+            "The website structure may have changed, or the request was blocked."
+        )
     else:
-        logger.debug("Reading player URLs from cache.")
-        with open(config.GIOCATORI_URLS_FILE, "r", encoding="utf-8") as fp:
-            giocatori_urls = fp.readlines()
-    return [url.strip() for url in giocatori_urls]
+        with open(config.GIOCATORI_URLS_FILE, "w", encoding="utf-8") as fp:
+            for item in giocatori_urls:
+                fp.write(f"{item}\n")
+        logger.debug(f"{len(giocatori_urls)} player URLs saved.")
 
 
-def get_attributi_giocatore(url: str) -> dict:
-    """Scrapes a single player's page on FPEDIA for their attributes."""
-    logger.debug(f"Scraping attributes for player from URL: {url}")
-    time.sleep(randint(1000, 8000) / 1000)
-    attributi = dict()
-    html = requests.get(url.strip())
-    soup = BeautifulSoup(html.content, "html.parser")
+def get_giocatori_urls(force=True) -> list:
+    """Scrapes FPEDIA to get all player URLs."""
+    return list(iter_giocatori_urls(force))
 
-    attributi["Nome"] = soup.select_one("h1").get_text().strip()
 
-    selettore = "div.col_one_fourth:nth-of-type(1) span.stickdan"
-    attributi["Punteggio"] = soup.select_one(selettore).text.strip().replace("/100", "")
+def get_attributi_giocatore(url: str, controller: AIMDController = None) -> dict:
+    """
+    Scrapes a single player's page on FPEDIA for their attributes.
+    With a `controller`, the request waits for one of its in-flight slots.
+    """
+    logger.debug(f"Scraping attributes for player from URL: {url}")
+    time.sleep(uniform(*config.POLITENESS_DELAY))
+    if controller is None:
+        return fetch_attributi_giocatore(url)
+    controller.acquire()
+    return _fetch_attributi_controllato(url, controller)
 
-    selettore = "	div.col_one_fourth:nth-of-type(n+2) div"
-    medie = [el.find("span").text.strip() for el in soup.select(selettore)]
-    anni = [
-        el.find("strong").text.split(" ")[-1].strip() for el in soup.select(selettore)
-    ]
-    i = 0
-    for anno in anni:
-        attributi[f"Fantamedia anno {anno}"] = medie[i]
-        i += 1
-
-    selettore = "div.col_one_third:nth-of-type(2) div"
-    stats_ultimo_anno = soup.select_one(selettore)
-    parametri = [
-        el.text.strip().replace(":", "") for el in stats_ultimo_anno.find_all("strong")
-    ]
-    valori = [el.text.strip() for el in stats_ultimo_anno.find_all("span")]
-    attributi.update(dict(zip(parametri, valori)))
 
-    selettore = ".col_one_third.col_last div"
-    stats_previste = soup.select_one(selettore)
-    parametri = [
-        el.text.strip().replace(":", "") for el in stats_previste.find_all("strong")
-    ]
-    valori = [el.text.strip() for el in stats_previste.find_all("span")]
-    attributi.update(dict(zip(parametri, valori)))
+def _fetch_attributi_controllato(url: str, controller: AIMDController) -> dict:
+    """
+    `fetch_attributi_giocatore` on a slot already taken from `controller`,
+    which is released with the latency, status and Retry-After of the request.
+    """
+    start = time.monotonic()
+    try:
+        attributi = fetch_attributi_giocatore(url)
+    except requests.exceptions.HTTPError as e:
+        controller.release(
+            error=True,
+            status=e.response.status_code,
+            retry_after=e.response.headers.get("Retry-After"),
+        )
+        raise
+    except requests.exceptions.RequestException:
+        controller.release(error=True)
+        raise
+    except Exception:
+        # The page was downloaded fine, only its parsing failed
+        controller.release(latency=time.monotonic() - start)
+        raise
+    controller.release(latency=time.monotonic() - start)
+    return attributi
 
-    selettore = ".label12 span.label"
-    ruolo = soup.select_one(selettore)
-    attributi["Ruolo"] = ruolo.get_text().strip()
 
-    selettore = "span.stickdanpic"
-    skills = [el.text for el in soup.select(selettore)]
-    attributi["Skills"] = skills
+def fetch_attributi_giocatore(url: str) -> dict:
+    """
+    Downloads and parses a player's page, without any politeness delay.
+    With `config.HTTP_CACHE_ENABLED` the page is revalidated against the
+    on-disk HTTP cache: unchanged pages (304) reuse the previous parse.
+    During a scrape the page is also stored in the current HTML archive.
+    """
+    url = url.strip()
+    archive = html_archive.current()
+    if not config.HTTP_CACHE_ENABLED:
+        html = http_client.get_session().get(url)
+        html.raise_for_status()
+        if archive is not None:
+            archive.add(url, html.content)
+        return fpedia_parser.parse_in_pool(html.content)
+
+    cache = http_cache.get_cache()
+    versione = fpedia_parser.parser_version()
+    cached = cache.get(url, parsed_version=versione)
+    if archive is not None:
+        content = cached.content if cached.content is not None else cache.read_body(url)
+        if content is not None:
+            archive.add(url, content)
+    if cached.parsed is not None:
+        return cached.parsed
+    attributi = fpedia_parser.parse_in_pool(cached.content)
+    cache.set_parsed(url, attributi, versione)
+    return attributi
 
-    selettore = "div.progress-percent"
-    investimento = soup.select(selettore)[2]
-    attributi["Buon investimento"] = investimento.text.replace("%", "")
 
-    selettore = "div.progress-percent"
-    investimento = soup.select(selettore)[3]
-    attributi["Resistenza infortuni"] = investimento.text.replace("%", "")
+class AsyncRateLimiter:
+    """
+    Global token bucket shared by all the coroutines of an async scrape:
+    request starts are spaced so that at most `rate` requests per second
+    are sent, regardless of how many coroutines are waiting.
+    """
 
-    selettore = "img.inf_calc"
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def _get_attributi_giocatore_async(
+    url: str, limiter: AsyncRateLimiter, controller: AIMDController
+) -> dict:
+    """Async counterpart of `get_attributi_giocatore`, paced by the rate limiter."""
+    await controller.acquire_async()
     try:
-        consigliato = soup.select_one(selettore).get("title")
-        if "Consigliato per la giornata" in consigliato:
-            attributi["Consigliato prossima giornata"] = True
-        else:
-            attributi["Consigliato prossima giornata"] = False
+        await limiter.acquire()
+    except BaseException:
+        controller.release()
+        raise
+    logger.debug(f"Scraping attributes for player from URL: {url}")
+    return await asyncio.to_thread(_fetch_attributi_controllato, url, controller)
 
-    except:
-        attributi["Consigliato prossima giornata"] = False
 
-    selettore = "span.new_calc"
-    nuovo = soup.select_one(selettore)
-    if not nuovo == None:
-        attributi["Nuovo acquisto"] = True
-    else:
-        attributi["Nuovo acquisto"] = False
+_FINE_SCOPERTA = object()
 
-    selettore = "img.inf_calc"
-    try:
-        infortunato = soup.select_one(selettore).get("title")
-        if "Infortunato" in infortunato:
-            attributi["Infortunato"] = True
-        else:
-            attributi["Infortunato"] = False
 
-    except:
-        attributi["Infortunato"] = False
+class _GestoreEsiti:
+    """
+    Settles every attempt at a player page: successes go to `on_result`,
+    transient failures are retried with exponential backoff and jitter within
+    the per-URL attempt budget, and the rest go to `on_failure`. Transient
+    failures also feed a circuit breaker that pauses the whole pool
+    (through `controller`) when the host looks unhealthy.
+    """
 
-    selettore = "#content > div > div.section.nobg.nomargin > div > div > div:nth-child(2) > div.col_three_fifth > div.promo.promo-border.promo-light.row > div:nth-child(3) > div:nth-child(1) > div > img"
-    squadra = soup.select_one(selettore).get("title").split(":")[1].strip()
-    attributi["Squadra"] = squadra
+    def __init__(self, on_result, on_failure, controller: AIMDController):
+        self.on_result = on_result
+        self.on_failure = on_failure
+        self.policy = RetryPolicy(
+            config.RETRY_MAX_ATTEMPTS,
+            config.RETRY_BACKOFF_BASE,
+            config.RETRY_BACKOFF_MAX,
+        )
+        self.breaker = CircuitBreaker(
+            config.CIRCUIT_BREAKER_THRESHOLD,
+            config.CIRCUIT_BREAKER_COOLDOWN,
+            controller.pause,
+        )
 
-    selettore = "	div.col_one_fourth:nth-of-type(n+2) div"
-    try:
-        trend = soup.select(selettore)[0].find("i").get("class")[1]
-        if trend == "icon-arrow-up":
-            attributi["Trend"] = "UP"
-        else:
-            attributi["Trend"] = "DOWN"
-    except:
-        attributi["Trend"] = "STABLE"
+    def esito(self, url: str, tentativo: int, attributi: dict, exc: Exception):
+        """Returns the delay before retrying `url`, or None once it is settled."""
+        if exc is None:
+            self.breaker.record_success()
+            if attributi:
+                self.on_result(url, attributi)
+            return None
+
+        if self.policy.is_retryable(exc):
+            self.breaker.record_failure()
+        if self.policy.should_retry(exc, tentativo):
+            ritardo = self.policy.delay(tentativo)
+            logger.debug(
+                f"{url} failed (attempt {tentativo}/{self.policy.max_attempts}): "
+                f"{exc}. Retrying in {ritardo:.1f}s."
+            )
+            return ritardo
 
-    selettore = "div.col_one_fourth:nth-of-type(2) span.rouge"
-    presenze_attuali = soup.select_one(selettore).text
-    attributi["Presenze campionato corrente"] = presenze_attuali
+        logger.error(f"{url} generated an exception: {exc}")
+        self.on_failure(url, tentativo, exc)
+        return None
 
-    return attributi
+
+async def _scrape_giocatori_async(
+    urls, esiti: _GestoreEsiti, rate: float, controller: AIMDController
+):
+    """
+    Scrapes the player pages concurrently, bounded by `rate` requests/s and by
+    the in-flight limit of `controller`, while `urls` is still being discovered:
+    each URL becomes a task as soon as it is yielded. Every attempt is settled
+    by `esiti` as soon as it is done; retries are rescheduled after their backoff.
+    """
+    limiter = AsyncRateLimiter(rate)
+    # asyncio.to_thread runs on the default executor: size it on the ceiling
+    # (plus the discovery thread) so that it never caps the in-flight requests
+    asyncio.get_running_loop().set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(max_workers=controller.ceiling + 1)
+    )
+    completati = asyncio.Queue()
+    tasks = set()
+
+    def _avvia(url, tentativo=1, ritardo=0.0):
+        task = asyncio.ensure_future(_scrape(url, tentativo, ritardo))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def _scrape(url, tentativo, ritardo):
+        if ritardo:
+            await asyncio.sleep(ritardo)
+        try:
+            attributi = await _get_attributi_giocatore_async(url, limiter, controller)
+            await completati.put((url, tentativo, attributi, None))
+        except Exception as exc:
+            await completati.put((url, tentativo, None, exc))
+
+    async def _scopri():
+        iteratore = iter(urls)
+        try:
+            while True:
+                # The iterator blocks on the role pages: advance it off the loop
+                url = await asyncio.to_thread(next, iteratore, None)
+                if url is None:
+                    break
+                _avvia(url)
+                progress_bar.total += 1
+                progress_bar.refresh()
+        finally:
+            await completati.put(_FINE_SCOPERTA)
+
+    with tqdm(total=0) as progress_bar:
+        scoperta = asyncio.ensure_future(_scopri())
+        scoperta_finita = False
+        while not (scoperta_finita and progress_bar.n == progress_bar.total):
+            elemento = await completati.get()
+            if elemento is _FINE_SCOPERTA:
+                scoperta_finita = True
+                continue
+            url, tentativo, attributi, exc = elemento
+            ritardo = esiti.esito(url, tentativo, attributi, exc)
+            if ritardo is None:
+                progress_bar.update(1)
+            else:
+                _avvia(url, tentativo + 1, ritardo)
+        scoperta.result()
 
 
-def scrape_fpedia(force: bool = False):
+def _scrape_giocatori_threaded(urls, esiti: _GestoreEsiti, controller: AIMDController):
+    """
+    Scrapes the player pages with a pool of threads, bounded by the in-flight
+    limit of `controller`, while `urls` is still being discovered: each URL is
+    submitted as soon as it is yielded, and every attempt is settled by `esiti`.
+    Retries are resubmitted by a timer once their backoff expires.
+    """
+    completati = queue.Queue()
+    errori_scoperta = []
+    timers = []
+
+    with (
+        concurrent.futures.ThreadPoolExecutor(
+            max_workers=controller.ceiling
+        ) as executor,
+        tqdm(total=0) as progress_bar,
+    ):
+
+        def _invia(url, tentativo=1):
+            future = executor.submit(get_attributi_giocatore, url, controller)
+            future.add_done_callback(lambda f: completati.put((url, tentativo, f)))
+
+        def _scopri():
+            try:
+                for url in urls:
+                    _invia(url)
+                    progress_bar.total += 1
+                    progress_bar.refresh()
+            except Exception as exc:
+                errori_scoperta.append(exc)
+            finally:
+                completati.put(_FINE_SCOPERTA)
+
+        scoperta = threading.Thread(target=_scopri, daemon=True)
+        scoperta.start()
+        scoperta_finita = False
+        while not (scoperta_finita and progress_bar.n == progress_bar.total):
+            elemento = completati.get()
+            if elemento is _FINE_SCOPERTA:
+                scoperta_finita = True
+                continue
+            url, tentativo, future = elemento
+            exc = future.exception()
+            attributi = future.result() if exc is None else None
+            ritardo = esiti.esito(url, tentativo, attributi, exc)
+            if ritardo is None:
+                progress_bar.update(1)
+            else:
+                timer = threading.Timer(ritardo, _invia, (url, tentativo + 1))
+                timer.daemon = True
+                timer.start()
+                timers.append(timer)
+        scoperta.join()
+
+    if errori_scoperta:
+        raise errori_scoperta[0]
+
+
+def _crea_controller(initial: int) -> AIMDController:
+    """
+    In-flight limit for the player pages: adaptive between `config.CONCURRENCY_MIN`
+    and `config.CONCURRENCY_MAX` (default `initial`, so it never ramps above the
+    configured workers) with `config.ADAPTIVE_CONCURRENCY`, else fixed.
+    """
+    if not config.ADAPTIVE_CONCURRENCY:
+        return AIMDController(initial, initial, initial, float("inf"))
+    return AIMDController(
+        initial,
+        config.CONCURRENCY_MIN,
+        config.CONCURRENCY_MAX or initial,
+        config.CONCURRENCY_LATENCY_TARGET,
+    )
+
+
+def scrape_fpedia(
+    force: bool = False,
+    use_async: bool = False,
+    rate: float = None,
+    resume: bool = False,
+    retry_failed: bool = False,
+):
     """
     Orchestrates the scraping of FPEDIA.
-    Fetches all player URLs and then scrapes each player's page for their attributes in parallel.
-    Saves the data to a CSV file.
+    Discovers the player URLs and scrapes each player's page for their attributes
+    in parallel, starting as soon as the first role page has been read.
+    With `use_async` the pages are fetched by an asyncio engine throttled by a global
+    rate limit (`rate` requests per second, default `config.ASYNC_RATE_LIMIT`)
+    instead of the thread pool with per-request sleeps.
+    Every scraped player is appended to a JSONL journal, periodically compacted
+    into the CSV file; with `resume` the URLs already in the journal are skipped.
+    Pages that keep failing after their retries are written to a dead-letter file;
+    `retry_failed` scrapes only those and adds them to the existing journal.
     """
-    if os.path.exists(config.GIOCATORI_CSV):
+    if data_store.exists(config.GIOCATORI_CSV) and not (resume or retry_failed):
         if force:
             logger.debug(f"Force flag is set. Re-scraping {config.GIOCATORI_CSV}.")
-            os.remove(config.GIOCATORI_CSV)
+            data_store.remove(config.GIOCATORI_CSV)
         else:
             logger.debug(f"{config.GIOCATORI_CSV} already exists. Skipping scraping.")
             return
 
-    urls = get_giocatori_urls(config.FORCE_SCRAPE_URLS)
-    giocatori = []
+    journal = ScrapeJournal(
+        config.GIOCATORI_JOURNAL, config.GIOCATORI_CSV, config.JOURNAL_COMPACT_EVERY
+    )
+    dead_letter = DeadLetterFile(config.GIOCATORI_FAILED)
+    if retry_failed:
+        urls = dead_letter.urls()
+        if not urls:
+            logger.info("No failed FPEDIA players to retry.")
+            return
+        logger.info(f"Retrying {len(urls)} failed FPEDIA players.")
+        resume = True
+    else:
+        urls = iter_giocatori_urls(config.FORCE_SCRAPE_URLS)
+    if resume and not retry_failed:
+        already_scraped = journal.scraped_urls()
+        urls = (url for url in urls if url not in already_scraped)
+        logger.info(
+            f"Resuming FPEDIA scrape: {len(already_scraped)} players already "
+            "in the journal will be skipped."
+        )
     logger.debug("Scraping individual player data from website...")
 
-    with concurrent.futures.ThreadPoolExecutor(
-        max_workers=config.MAX_WORKERS
-    ) as executor:
-        future_to_url = {
-            executor.submit(get_attributi_giocatore, url): url for url in urls
+    controller = _crea_controller(
+        config.ASYNC_MAX_CONCURRENCY if use_async else config.MAX_WORKERS
+    )
+    esiti = _GestoreEsiti(journal.append, dead_letter.append, controller)
+    journal.open(resume=resume)
+    dead_letter.open()
+    html_archive.start(resume=resume)
+    # The parser processes start before any fetch thread
+    fpedia_parser.start_pool()
+    completato = False
+    try:
+        if use_async:
+            rate = rate or config.ASYNC_RATE_LIMIT
+            logger.debug(f"Using async engine at {rate} requests/s.")
+            asyncio.run(_scrape_giocatori_async(urls, esiti, rate, controller))
+        else:
+            _scrape_giocatori_threaded(urls, esiti, controller)
+        completato = True
+    finally:
+        html_archive.stop()
+        # An interrupted run keeps the earlier failures it did not retry yet
+        dead_letter.close(completed=completato)
+        if dead_letter.count:
+            logger.warning(
+                f"{dead_letter.count} FPEDIA players failed permanently and were "
+                f"saved to {config.GIOCATORI_FAILED}. "
+                "Run 'scrape --retry-failed' to retry only those."
+            )
+        if config.ADAPTIVE_CONCURRENCY:
+            controller.log_trace()
+        journal.close()
+        fpedia_parser.shutdown_pool()
+        if config.HTTP_CACHE_ENABLED:
+            http_cache.get_cache().flush()
+    logger.debug("FPEDIA data saved to CSV.")
+    snapshot_db.record_table("fpedia", config.ANNO_CORRENTE, config.GIOCATORI_CSV)
+
+
+def _reparse_pagina(pagina: tuple) -> tuple:
+    """Parses one archived page in a worker process: (url, attributes, error)."""
+    url, (pack_path, offset, length), backend = pagina
+    try:
+        content = html_archive.read_blob(pack_path, offset, length)
+        return url, fpedia_parser.parse_attributi_giocatore(content, backend), None
+    except Exception as e:
+        return url, None, f"{type(e).__name__}: {e}"
+
+
+def reparse_fpedia(run_id: str = None, processes: int = None) -> int:
+    """
+    Rebuilds the FPEDIA journal and CSV from the archived pages, without any
+    request, parsing on `processes` cores (default: all). `run_id` selects an
+    archived scrape, by default the latest full one plus its resumed runs.
+    Returns the number of players written.
+    """
+    archived = html_archive.pages(run_id)
+    if not archived:
+        logger.warning(f"No archived FPEDIA pages in {config.HTML_ARCHIVE_DIR}.")
+        return 0
+    logger.info(f"Re-parsing {len(archived)} archived FPEDIA pages...")
+
+    # Build next to the current files and swap only when complete
+    journal = ScrapeJournal(
+        f"{config.GIOCATORI_JOURNAL}.reparse",
+        f"{config.GIOCATORI_CSV}.reparse",
+        compact_every=len(archived) + 1,
+    )
+    journal.open()
+    scritti, errori = 0, 0
+    pagine = [
+        (url, posizione, config.HTML_PARSER) for url, posizione in archived.items()
+    ]
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes or os.cpu_count(),
+            mp_context=fpedia_parser.pool_context(),
+        ) as executor:
+            for url, attributi, errore in tqdm(
+                executor.map(_reparse_pagina, pagine, chunksize=16), total=len(pagine)
+            ):
+                if errore:
+                    logger.error(f"{url} could not be parsed: {errore}")
+                    errori += 1
+                elif attributi:
+                    journal.append(url, attributi)
+                    scritti += 1
+    finally:
+        journal.close()
+
+    if errori:
+        logger.warning(f"{errori} archived pages could not be parsed.")
+    if not scritti:
+        logger.error("No archived page could be parsed: data left untouched.")
+        return 0
+    os.replace(journal.path, config.GIOCATORI_JOURNAL)
+    data_store.replace(journal.csv_path, config.GIOCATORI_CSV)
+    logger.info(f"{config.GIOCATORI_CSV} rebuilt with {scritti} players.")
+    # inspect and the trend history read the latest snapshot: it must be this one
+    snapshot_db.record_table("fpedia", config.ANNO_CORRENTE, config.GIOCATORI_CSV)
+    return scritti
+
+
+def _fstats_page_url(anno: int, page: int) -> str:
+    stagione = f"{anno}%2F{str(anno + 1)[-2:]}"
+    return (
+        config.FSTATS_PLAYERS_URL.format(stagione=stagione)
+        + f"&page_size={config.FSTATS_PAGE_SIZE}&page={page}"
+    )
+
+
+def _iter_fstats_results(response):
+    """
+    Yields the players of a streamed FSTATS page while the body is still
+    being downloaded, with ijson when installed; otherwise the page is
+    decoded in one go.
+    """
+    try:
+        import ijson
+    except ImportError:
+        yield from response.json()["results"]
+        return
+    response.raw.decode_content = True
+    yield from ijson.items(response.raw, "results.item", use_float=True)
+
+
+def _con_retry(richiesta, descrizione: str):
+    """Calls `richiesta()`, retrying transient HTTP errors with backoff."""
+    policy = RetryPolicy(
+        config.RETRY_MAX_ATTEMPTS, config.RETRY_BACKOFF_BASE, config.RETRY_BACKOFF_MAX
+    )
+    tentativo = 1
+    while True:
+        try:
+            return richiesta()
+        except requests.exceptions.RequestException as e:
+            if not policy.should_retry(e, tentativo):
+                raise
+            ritardo = policy.delay(tentativo)
+            logger.debug(f"{descrizione} failed: {e}. Retrying in {ritardo:.1f}s.")
+            time.sleep(ritardo)
+            tentativo += 1
+
+
+def _get_fstats_page(session, anno: int, page: int, headers: dict) -> list:
+    """Players of one FSTATS page, decoded while it streams in."""
+
+    def richiesta():
+        url = _fstats_page_url(anno, page)
+        with session.get(url, headers=headers, stream=True) as r:
+            r.raise_for_status()
+            return list(_iter_fstats_results(r))
+
+    return _con_retry(richiesta, f"FSTATS {anno} page {page}")
+
+
+def _get_fstats_first_page(session, anno: int, headers: dict) -> dict:
+    """First FSTATS page, decoded whole for its 'count' of players."""
+
+    def richiesta():
+        response = session.get(_fstats_page_url(anno, 1), headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    return _con_retry(richiesta, f"FSTATS {anno} page 1")
+
+
+class _FstatsWriter:
+    """
+    Writes FSTATS players to a `;`-separated CSV as the pages arrive (when `f`
+    is given) and/or collects them as Arrow tables for the Parquet store. The
+    CSV columns are those of the first player, as the API returns uniform rows.
+    """
+
+    def __init__(self, f=None, arrow: bool = False):
+        self._f = f
+        self._writer = None
+        self._colonne_ignorate = set()
+        self.tables = [] if arrow else None
+        self.rows = 0
+
+    def write(self, players: list):
+        if not players:
+            return
+        self.rows += len(players)
+        if self.tables is not None:
+            self.tables.append(data_store.fstats_table(players))
+        if self._f is None:
+            return
+        if self._writer is None:
+            self._writer = csv.DictWriter(
+                self._f,
+                fieldnames=list(players[0]),
+                delimiter=";",
+                lineterminator="\n",
+                extrasaction="ignore",
+            )
+            self._writer.writeheader()
+        for player in players:
+            nuove = (
+                player.keys() - set(self._writer.fieldnames) - self._colonne_ignorate
+            )
+            if nuove:
+                logger.warning(f"Ignoring unexpected FSTATS columns: {sorted(nuove)}")
+                self._colonne_ignorate |= nuove
+            self._writer.writerow(player)
+
+
+def _scarica_fstats(session, auth_headers: dict, anno: int, path: str):
+    """
+    Fetches every page of the FSTATS players of season `anno` into `path`.
+    The first page tells how many players there are; the others are fetched
+    concurrently and written in the order they complete, one page in memory
+    per worker. `path` (CSV and/or Parquet, see `data_store`) is replaced only
+    when every page was fetched.
+    """
+    payload = _get_fstats_first_page(session, anno, auth_headers)
+    count = payload.get("count")
+    if count is None:
+        logger.warning("FSTATS response has no 'count': fetching the first page only.")
+        pagine = 1
+    else:
+        pagine = max(math.ceil(count / config.FSTATS_PAGE_SIZE), 1)
+    logger.debug(f"FSTATS {anno}: {count} players in {pagine} pages.")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        rows = _scrivi_pagine_fstats(
+            session, auth_headers, anno, payload, pagine, tmp_path
+        )
+    except BaseException:
+        data_store.remove(tmp_path)
+        raise
+    if count is not None and rows != count:
+        logger.warning(f"FSTATS {anno} announced {count} players but returned {rows}.")
+    data_store.replace(tmp_path, path)
+    return rows
+
+
+def _scrivi_pagine_fstats(
+    session, auth_headers: dict, anno: int, payload: dict, pagine: int, path: str
+) -> int:
+    with contextlib.ExitStack() as stack:
+        f = None
+        if data_store.csv_enabled():
+            f = stack.enter_context(open(path, "w", encoding="utf-8", newline=""))
+        writer = _FstatsWriter(f, arrow=data_store.parquet_enabled())
+        writer.write(payload["results"])
+        del payload
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.FSTATS_MAX_WORKERS
+        ) as executor:
+            futures = [
+                executor.submit(_get_fstats_page, session, anno, page, auth_headers)
+                for page in range(2, pagine + 1)
+            ]
+            try:
+                for future in tqdm(
+                    concurrent.futures.as_completed(futures),
+                    total=len(futures),
+                    desc=f"FSTATS {anno}",
+                    disable=not futures,
+                ):
+                    writer.write(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    if writer.tables:
+        data_store.write_fstats(writer.tables, data_store.parquet_path(path))
+    return writer.rows
+
+
+def _scarica_stagioni(session, auth_headers: dict, stagioni: list) -> dict:
+    """
+    Fetches the given seasons concurrently over the same session.
+    Returns season -> exception for the seasons that failed.
+    """
+    falliti = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(stagioni)) as executor:
+        future_to_anno = {
+            executor.submit(
+                _scarica_fstats, session, auth_headers, anno, config.players_csv(anno)
+            ): anno
+            for anno in stagioni
         }
-        for future in tqdm(
-            concurrent.futures.as_completed(future_to_url), total=len(urls)
-        ):
-            url = future_to_url[future]
+        for future in concurrent.futures.as_completed(future_to_anno):
+            anno = future_to_anno[future]
             try:
-                attributi = future.result()
-                if attributi:
-                    giocatori.append(attributi)
-            except Exception as exc:
-                logger.error(f"{url} generated an exception: {exc}")
-
-    df = pd.DataFrame(giocatori)
-    df.to_csv(config.GIOCATORI_CSV, index=False)
-    logger.debug("FPEDIA data saved to CSV.")
+                rows = future.result()
+                logger.debug(f"FSTATS {anno} saved ({rows} players).")
+                snapshot_db.record_table(
+                    "fstats", anno, config.players_csv(anno), sep=";"
+                )
+            except requests.exceptions.RequestException as e:
+                falliti[anno] = e
+    return falliti
 
 
-def fetch_FSTATS_data(force: bool = False):
+def fetch_FSTATS_data(force: bool = False, stagioni: list = None):
     """
-    Logs into FSTATS, fetches player data from the API,
-    and saves it to a CSV file.
+    Logs into FSTATS (or reuses the stored token), fetches player data of
+    each season in `stagioni` (default `config.FSTATS_STAGIONI`) from the API,
+    and saves it to one partition per season. Past seasons are final:
+    `force` re-downloads only the current one, the others only when missing.
     """
-    if os.path.exists(config.PLAYERS_CSV):
-        if force:
-            logger.debug(f"Force flag is set. Re-scraping {config.PLAYERS_CSV}.")
-            os.remove(config.PLAYERS_CSV)
+    da_scaricare = []
+    for anno in sorted(set(stagioni or config.FSTATS_STAGIONI)):
+        path = config.players_csv(anno)
+        if not data_store.exists(path):
+            da_scaricare.append(anno)
+        elif force and anno == config.FSTATS_ANNO:
+            logger.debug(f"Force flag is set. Re-scraping {path}.")
+            da_scaricare.append(anno)
         else:
-            logger.debug(f"{config.PLAYERS_CSV} already exists. Skipping scraping.")
-            return
+            logger.debug(f"{path} already exists. Skipping scraping.")
+    if not da_scaricare:
+        return
 
     user = os.getenv("FSTATS_MAIL")
     password = os.getenv("FSTATS_PASSWORD")
@@ -216,31 +756,33 @@ def fetch_FSTATS_data(force: bool = False):
         logger.error("FSTATS credentials not found in .env file. Skipping download.")
         return
 
-    # 1. Login and get token
-    logger.debug("Logging into FSTATS...")
-    login_payload = {"username": user, "password": password}
-    headers = {"content-type": "application/json"}
-    try:
-        response = requests.post(
-            config.FSTATS_LOGIN_URL, json=login_payload, headers=headers
-        )
-        response.raise_for_status()
-        token = response.json()["access_token"]
-        logger.debug("Login successful.")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"FSTATS login failed: {e}")
-        return
+    session = http_client.get_session()
+    store = fstats_auth.get_token_store()
 
-    # 2. Fetch player data
-    logger.debug("Fetching player data from FSTATS API...")
-    auth_headers = {"authorization": f"Bearer {token}"}
-    try:
-        response = requests.get(config.FSTATS_PLAYERS_URL, headers=auth_headers)
-        response.raise_for_status()
-        players_data = response.json()["results"]
+    for tentativo in (1, 2):
+        # 1. Login and get token (reused across runs until it expires)
+        try:
+            token = store.get_token(session, user, password)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"FSTATS login failed: {e}")
+            return
 
-        df = pd.DataFrame(players_data)
-        df.to_csv(config.PLAYERS_CSV, index=False, sep=";")
-        logger.debug("FSTATS data saved to CSV.")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"FSTATS data fetch failed: {e}")
+        # 2. Fetch player data, all seasons at once
+        logger.debug(f"Fetching FSTATS seasons {da_scaricare} from the API...")
+        auth_headers = {"authorization": f"Bearer {token}"}
+        falliti = _scarica_stagioni(session, auth_headers, da_scaricare)
+
+        rifiutati = [
+            anno
+            for anno, e in falliti.items()
+            if getattr(e.response, "status_code", None) == 401
+        ]
+        if rifiutati and tentativo == 1:
+            logger.debug("FSTATS token rejected (401). Logging in again.")
+            store.invalidate()
+            da_scaricare = rifiutati
+            falliti = {a: e for a, e in falliti.items() if a not in rifiutati}
+        for anno, e in sorted(falliti.items()):
+            logger.error(f"FSTATS data fetch failed for season {anno}: {e}")
+        if not rifiutati or tentativo == 2:
+            return
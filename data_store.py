@@ -0,0 +1,418 @@
+# data_store.py
+import ast
+import os
+from collections.abc import Iterable
+from typing import Any
+
+import pandas as pd
+from loguru import logger
+
+import config
+
+# Tipi dichiarati delle colonne FPEDIA. Le "Fantamedia anno ..." sono float64;
+# le altre colonne della pagina sono numeriche se tutti i valori lo sono.
+TIPI_FPEDIA = {
+    "Nome": "string",
+    "Punteggio": "int64",
+    "Ruolo": "string",
+    "Skills": "list<string>",
+    "Buon investimento": "int64",
+    "Resistenza infortuni": "int64",
+    "Consigliato prossima giornata": "bool",
+    "Nuovo acquisto": "bool",
+    "Infortunato": "bool",
+    "Squadra": "string",
+    "Trend": "string",
+    "Presenze campionato corrente": "int64",
+    "Partite giocate": "int64",
+}
+PREFISSI_FPEDIA = {"Fantamedia anno ": "float64"}
+# Giocatori FPEDIA per row group del Parquet: la memoria della scrittura non
+# dipende dal numero di giocatori
+PARQUET_BATCH = 1000
+
+# Tipi dichiarati delle colonne FSTATS usate dall'analisi; le altre (ad es. la
+# struct "team") mantengono il tipo del JSON dell'API
+TIPI_FSTATS = {
+    "name": "string",
+    "firstname": "string",
+    "lastname": "string",
+    "fantacalcioPosition": "string",
+    "goals": "float64",
+    "assists": "float64",
+    "yellowCards": "float64",
+    "redCards": "float64",
+    "xgFromOpenPlays": "float64",
+    "xA": "float64",
+    "appearances": "float64",
+    "pagella": "float64",
+    "fantacalcioRanking": "float64",
+    "fantacalcioFantaindex": "float64",
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def parquet_enabled() -> bool:
+    """True when the typed store is configured and pyarrow is installed."""
+    return config.DATA_STORE == "parquet" and _pyarrow() is not None
+
+
+def csv_enabled() -> bool:
+    """CSV files are written as export, or as the store without pyarrow."""
+    return config.EXPORT_CSV or not parquet_enabled()
+
+
+def parquet_path(csv_path: str) -> str:
+    """Parquet file stored next to the CSV table `csv_path`."""
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def stored_path(csv_path: str) -> str | None:
+    """
+    File that `read` loads for the table of `csv_path`: the Parquet one when
+    readable and at least as recent as the CSV, else the CSV; None if neither
+    is stored.
+    """
+    parquet = parquet_path(csv_path)
+    candidati = [
+        p
+        for p in ((parquet,) if _pyarrow() is not None else ()) + (csv_path,)
+        if os.path.exists(p) and os.path.getsize(p) > 0
+    ]
+    if not candidati:
+        return None
+    return max(candidati, key=lambda p: (os.path.getmtime(p), p == parquet))
+
+
+def exists(csv_path: str) -> bool:
+    """Whether the table of `csv_path` is stored, as CSV or as Parquet."""
+    return stored_path(csv_path) is not None
+
+
+def remove(csv_path: str):
+    """Deletes a table, both its CSV and its Parquet file."""
+    for path in (csv_path, parquet_path(csv_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def replace(src_csv: str, dst_csv: str):
+    """Moves a table (CSV and/or Parquet) to its final path."""
+    for src, dst in (
+        (src_csv, dst_csv),
+        (parquet_path(src_csv), parquet_path(dst_csv)),
+    ):
+        if os.path.exists(src):
+            os.replace(src, dst)
+
+
+def as_list(value: Any) -> list:
+    """A list column value: native list or array, or a stringified list from CSV."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+        return list(value) if isinstance(value, (list, tuple)) else []
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+    try:
+        return list(value)
+    except TypeError:
+        return []
+
+
+def _as_struct(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith("{"):
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+    return value
+
+
+def _numero(value: Any, tipo: str) -> float | None:
+    if value is None:
+        return None
+    try:
+        numero = float(value)
+    except (TypeError, ValueError):
+        return None
+    if pd.isna(numero):
+        return None
+    if tipo == "int64":
+        return int(numero) if numero.is_integer() else None
+    return numero
+
+
+def _unisci_tipo(tipo: str | None, valore: Any) -> str | None:
+    """
+    Type of a column after one more value: int64/float64 while every
+    non-empty value is a number (like read_csv), bool or list<string> while
+    all are, string otherwise; None while the column is all empty.
+    """
+    if valore is None or valore == "":
+        return tipo
+    if isinstance(valore, bool):
+        nuovo = "bool"
+    elif isinstance(valore, (list, tuple)):
+        nuovo = "list<string>"
+    elif isinstance(valore, dict):
+        nuovo = "string"
+    else:
+        try:
+            nuovo = "int64" if float(valore).is_integer() else "float64"
+        except (TypeError, ValueError):
+            nuovo = "string"
+    if tipo is None or tipo == nuovo:
+        return nuovo
+    if {tipo, nuovo} == {"int64", "float64"}:
+        return "float64"
+    return "string"
+
+
+def _tipo_fpedia(colonna: str) -> str | None:
+    if colonna in TIPI_FPEDIA:
+        return TIPI_FPEDIA[colonna]
+    for prefisso, tipo in PREFISSI_FPEDIA.items():
+        if colonna.startswith(prefisso):
+            return tipo
+    return None
+
+
+def _array(pa, valori: list, tipo: str):
+    if tipo == "list<string>":
+        return pa.array(
+            [[str(s) for s in as_list(v)] for v in valori], pa.list_(pa.string())
+        )
+    if tipo == "bool":
+        return pa.array([None if v is None else bool(v) for v in valori], pa.bool_())
+    if tipo in ("int64", "float64"):
+        return pa.array([_numero(v, tipo) for v in valori], getattr(pa, tipo)())
+    if tipo == "string":
+        return pa.array([None if v is None else str(v) for v in valori], pa.string())
+    return pa.array(valori)
+
+
+def _write(table, path: str):
+    pa = _pyarrow()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pa.parquet.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def fpedia_types(records: Iterable[dict]) -> dict:
+    """
+    Columns of FPEDIA players (attribute dicts, as returned by the parser) in
+    order of first appearance, with their type: the one of `TIPI_FPEDIA`, or
+    inferred from the values. An int64 column holding a non-integral number
+    becomes float64, so that the Parquet copy keeps the values of the CSV.
+    One streaming pass, constant memory.
+    """
+    tipi = {}
+    for record in records:
+        for colonna, valore in record.items():
+            dichiarato = _tipo_fpedia(colonna)
+            if dichiarato is None:
+                tipi[colonna] = _unisci_tipo(tipi.get(colonna), valore)
+            elif dichiarato == "int64" and _unisci_tipo("int64", valore) == "float64":
+                if tipi.get(colonna) != "float64":
+                    logger.warning(
+                        f"FPEDIA column '{colonna}' has non-integral values "
+                        f"(e.g. {valore!r}): stored as float64 instead of int64."
+                    )
+                tipi[colonna] = "float64"
+            else:
+                tipi.setdefault(colonna, None)
+    return {
+        c: t if t == "float64" else _tipo_fpedia(c) or t or "string"
+        for c, t in tipi.items()
+    }
+
+
+def _pa_type(pa, tipo: str):
+    if tipo == "list<string>":
+        return pa.list_(pa.string())
+    return {"bool": pa.bool_(), "int64": pa.int64(), "float64": pa.float64()}.get(
+        tipo, pa.string()
+    )
+
+
+def write_fpedia(records: Iterable[dict], csv_path: str, tipi: dict):
+    """
+    Writes FPEDIA players to the Parquet table of `csv_path`, with the
+    columns and types of `tipi` (see `fpedia_types`): Skills stays a
+    list<string> column. Rows are written in row groups of `PARQUET_BATCH`,
+    so memory does not grow with the number of players.
+    """
+    pa = _pyarrow()
+    schema = pa.schema(
+        [(colonna, _pa_type(pa, tipo)) for colonna, tipo in tipi.items()]
+    )
+    path = parquet_path(csv_path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+
+    def scrivi(writer, batch):
+        arrays = [
+            _array(pa, [record.get(colonna) for record in batch], tipo)
+            for colonna, tipo in tipi.items()
+        ]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    with pa.parquet.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= PARQUET_BATCH:
+                scrivi(writer, batch)
+                batch = []
+        if batch:
+            scrivi(writer, batch)
+    os.replace(tmp_path, path)
+
+
+def fstats_table(players: list):
+    """Arrow table of a page of FSTATS players, nested values kept as struct/list."""
+    return _pyarrow().Table.from_pylist(players)
+
+
+def write_fstats(tables: list, path: str):
+    """
+    Concatenates the page tables of `fstats_table` (unifying their schemas,
+    e.g. a column null on the first page) and casts the columns of
+    `TIPI_FSTATS` to their declared type before writing `path`.
+    """
+    pa = _pyarrow()
+    table = pa.concat_tables(tables, promote_options="permissive")
+    for colonna, tipo in TIPI_FSTATS.items():
+        if colonna not in table.column_names:
+            continue
+        indice = table.column_names.index(colonna)
+        try:
+            colonna_tipizzata = table[colonna].cast(pa.type_for_alias(tipo))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            logger.warning(
+                f"FSTATS column '{colonna}' kept as {table[colonna].type}: {e}"
+            )
+            continue
+        table = table.set_column(indice, colonna, colonna_tipizzata)
+    _write(table, path)
+
+
+def read_parquet(path: str, columns: list | None = None) -> pd.DataFrame:
+    """
+    Parquet file as a DataFrame, list columns as Python lists. With `columns`
+    only those (the ones present in the file) are read from disk.
+    """
+    pa = _pyarrow()
+    if columns is not None:
+        presenti = set(pa.parquet.read_schema(path).names)
+        columns = [c for c in columns if c in presenti]
+    table = pa.parquet.read_table(path, columns=columns)
+    df = table.to_pandas()
+    # Lists come back as numpy arrays: hand them over as Python lists
+    for campo in table.schema:
+        if pa.types.is_list(campo.type) or pa.types.is_large_list(campo.type):
+            df[campo.name] = [
+                v if v is not None else [] for v in table[campo.name].to_pylist()
+            ]
+    return df
+
+
+def apply_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """
+    Casts the columns of `df` found in `dtypes`; numeric targets coerce bad
+    values to NaN. A column that cannot be cast keeps its type, with a warning.
+    """
+    for colonna, tipo in dtypes.items():
+        if colonna not in df.columns or df[colonna].dtype == tipo:
+            continue
+        try:
+            if tipo in ("category", "string", "bool"):
+                df[colonna] = df[colonna].astype(tipo)
+            else:
+                df[colonna] = pd.to_numeric(df[colonna], errors="coerce").astype(tipo)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Column '{colonna}' kept as {df[colonna].dtype}: {e}")
+    return df
+
+
+def _read_csv(csv_path: str, sep: str, columns: list | None, dtypes: dict):
+    usecols = None
+    if columns is not None:
+        colonne = set(columns)
+        usecols = lambda c: c in colonne  # noqa: E731 (missing columns are fine)
+    try:
+        return pd.read_csv(csv_path, sep=sep, usecols=usecols, dtype=dtypes or None)
+    except (TypeError, ValueError):
+        # A value the parser cannot cast (e.g. "3.5" in an Int16 column)
+        df = pd.read_csv(csv_path, sep=sep, usecols=usecols)
+        return apply_dtypes(df, dtypes)
+
+
+def read(
+    csv_path: str,
+    sep: str = ",",
+    columns: list | None = None,
+    dtypes: dict | None = None,
+) -> pd.DataFrame:
+    """
+    Loads the table of `csv_path` from `stored_path`: only `columns` (those
+    present, default all), cast to the types in `dtypes`. CSV tables get their
+    nested columns (stringified Skills list and team dict) decoded, so callers
+    always see native lists and dicts. Missing tables give an empty DataFrame.
+    """
+    dtypes = dtypes or {}
+    path = stored_path(csv_path)
+    if path is None:
+        logger.warning(f"{csv_path} not found or is empty.")
+        return pd.DataFrame()
+    if path != csv_path:
+        try:
+            return apply_dtypes(read_parquet(path, columns), dtypes)
+        except Exception as e:
+            logger.error(f"Error loading {path}: {e}")
+            if not os.path.exists(csv_path):
+                return pd.DataFrame()
+
+    # Nested columns are decoded below, never cast by the CSV parser
+    csv_dtypes = {c: t for c, t in dtypes.items() if c not in ("Skills", "team")}
+    try:
+        df = _read_csv(csv_path, sep, columns, csv_dtypes)
+    except Exception as e:
+        logger.error(f"Error loading {csv_path}: {e}")
+        return pd.DataFrame()
+    if "Skills" in df.columns:
+        df["Skills"] = df["Skills"].map(as_list)
+    if "team" in df.columns:
+        df["team"] = df["team"].map(_as_struct)
+    return df
+
+
+def to_export(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of `df` with list and dict cells written as in the CSV files
+    ("['a', 'b']"), for Excel (which cannot hold them) and JSON exports.
+    Categorical columns are turned back into plain values.
+    """
+    df = df.copy()
+    for colonna in df.columns[df.dtypes == "category"]:
+        df[colonna] = df[colonna].astype(object)
+    for colonna in df.columns[df.dtypes == "object"]:
+        if df[colonna].map(lambda v: isinstance(v, (list, dict))).any():
+            df[colonna] = df[colonna].map(
+                lambda v: str(v) if isinstance(v, (list, dict)) else v
+            )
+    return df
@@ -0,0 +1,309 @@
+# fpedia_parser.py
+import concurrent.futures
+import hashlib
+import multiprocessing
+import re
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+import config
+
+# Backend HTML supportati: i due di BeautifulSoup e selectolax (lexbor).
+# lxml e selectolax sono dipendenze opzionali (extra "parsers").
+BACKENDS = ("html.parser", "lxml", "selectolax")
+
+# Selettori CSS della pagina giocatore, ognuno valutato una sola volta per pagina
+# e condiviso da tutti i campi che ne hanno bisogno.
+SELETTORI = {
+    "nome": "h1",
+    "punteggio": "div.col_one_fourth:nth-of-type(1) span.stickdan",
+    "fantamedie": "div.col_one_fourth:nth-of-type(n+2) div",
+    "stats_ultimo_anno": "div.col_one_third:nth-of-type(2) div",
+    "stats_previste": ".col_one_third.col_last div",
+    "ruolo": ".label12 span.label",
+    "skills": "span.stickdanpic",
+    "percentuali": "div.progress-percent",
+    "inf_calc": "img.inf_calc",
+    "nuovo_acquisto": "span.new_calc",
+    "squadra": "#content > div > div.section.nobg.nomargin > div > div > div:nth-child(2) > div.col_three_fifth > div.promo.promo-border.promo-light.row > div:nth-child(3) > div:nth-child(1) > div > img",
+    "presenze": "div.col_one_fourth:nth-of-type(2) span.rouge",
+}
+
+_OBBLIGATORIO = object()
+
+
+@dataclass(frozen=True)
+class Campo:
+    """
+    A field of the player page: `trasforma` receives the nodes matched by
+    `selettore` (in document order). With `nome=None` it returns a dict of
+    columns instead of a single value. When `default` is given, any error
+    raised by the transform yields the default instead of failing the page.
+    """
+
+    nome: str | None
+    selettore: str
+    trasforma: Callable[[list], Any]
+    default: Any = _OBBLIGATORIO
+
+
+def _coppie_strong_span(nodi: list) -> dict:
+    """'<strong>Parametro:</strong><span>valore</span>' pairs of the first node."""
+    parametri = [el.text.strip().replace(":", "") for el in nodi[0].find_all("strong")]
+    valori = [el.text.strip() for el in nodi[0].find_all("span")]
+    return dict(zip(parametri, valori, strict=False))
+
+
+def _fantamedie(nodi: list) -> dict:
+    return {
+        f"Fantamedia anno {el.find('strong').text.split(' ')[-1].strip()}": el.find(
+            "span"
+        ).text.strip()
+        for el in nodi
+    }
+
+
+def _trend(nodi: list) -> str:
+    if nodi[0].find("i").get("class")[1] == "icon-arrow-up":
+        return "UP"
+    return "DOWN"
+
+
+CAMPI = [
+    Campo("Nome", "nome", lambda n: n[0].get_text().strip()),
+    Campo("Punteggio", "punteggio", lambda n: n[0].text.strip().replace("/100", "")),
+    Campo(None, "fantamedie", _fantamedie),
+    Campo(None, "stats_ultimo_anno", _coppie_strong_span),
+    Campo(None, "stats_previste", _coppie_strong_span),
+    Campo("Ruolo", "ruolo", lambda n: n[0].get_text().strip()),
+    Campo("Skills", "skills", lambda n: [el.text for el in n]),
+    Campo("Buon investimento", "percentuali", lambda n: n[2].text.replace("%", "")),
+    Campo("Resistenza infortuni", "percentuali", lambda n: n[3].text.replace("%", "")),
+    Campo(
+        "Consigliato prossima giornata",
+        "inf_calc",
+        lambda n: "Consigliato per la giornata" in n[0].get("title"),
+        default=False,
+    ),
+    Campo("Nuovo acquisto", "nuovo_acquisto", lambda n: len(n) > 0),
+    Campo(
+        "Infortunato",
+        "inf_calc",
+        lambda n: "Infortunato" in n[0].get("title"),
+        default=False,
+    ),
+    Campo("Squadra", "squadra", lambda n: n[0].get("title").split(":")[1].strip()),
+    Campo("Trend", "fantamedie", _trend, default="STABLE"),
+    Campo("Presenze campionato corrente", "presenze", lambda n: n[0].text),
+]
+
+
+def _tag_finale(selettore: str) -> str | None:
+    """Tag name of the rightmost compound selector, None if it matches any tag."""
+    ultimo = re.split(r"[\s>+~]+", selettore.strip())[-1]
+    match = re.match(r"[a-zA-Z][a-zA-Z0-9]*", ultimo)
+    return match.group(0).lower() if match else None
+
+
+def _compila(selettori: dict) -> tuple[dict, list]:
+    """Groups the compiled selectors by the tag name they can match."""
+    per_tag = {}
+    qualsiasi = []
+    for chiave, selettore in selettori.items():
+        compilato = (chiave, soupsieve.compile(selettore))
+        tag = _tag_finale(selettore)
+        if tag:
+            per_tag.setdefault(tag, []).append(compilato)
+        else:
+            qualsiasi.append(compilato)
+    return per_tag, qualsiasi
+
+
+_SELETTORI_PER_TAG, _SELETTORI_QUALSIASI = _compila(SELETTORI)
+
+
+def trova_nodi(soup: BeautifulSoup) -> dict:
+    """
+    Evaluates every selector of `SELETTORI` in a single traversal of the
+    document: each tag is tested only against the selectors ending in its
+    name. Returns selector key -> matched nodes in document order.
+    """
+    nodi = {chiave: [] for chiave in SELETTORI}
+    for tag in soup.find_all(True):
+        for chiave, selettore in _SELETTORI_PER_TAG.get(tag.name, ()):
+            if selettore.match(tag):
+                nodi[chiave].append(tag)
+        for chiave, selettore in _SELETTORI_QUALSIASI:
+            if selettore.match(tag):
+                nodi[chiave].append(tag)
+    return nodi
+
+
+class NodoLexbor:
+    """
+    Minimal BeautifulSoup-like view of a selectolax node, exposing only what
+    the transforms of `CAMPI` use, so the same spec runs on both backends.
+    """
+
+    __slots__ = ("_nodo",)
+
+    def __init__(self, nodo):
+        self._nodo = nodo
+
+    @property
+    def text(self) -> str:
+        return self._nodo.text(deep=True)
+
+    def get_text(self) -> str:
+        return self.text
+
+    def find_all(self, tag: str) -> list:
+        # Like BeautifulSoup, search the descendants only, not the node itself
+        return [NodoLexbor(n) for n in self._nodo.css(tag) if n != self._nodo]
+
+    def find(self, tag: str) -> "NodoLexbor | None":
+        trovati = self.find_all(tag)
+        return trovati[0] if trovati else None
+
+    def get(self, attributo: str):
+        valore = self._nodo.attributes.get(attributo)
+        if attributo == "class" and valore is not None:
+            return valore.split()
+        return valore
+
+
+def _albero_lexbor(content: bytes):
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError as e:
+        raise ImportError(
+            "The 'selectolax' HTML parser backend requires the selectolax package "
+            "(poetry install -E parsers)."
+        ) from e
+    return LexborHTMLParser(content)
+
+
+def trova_nodi_lexbor(albero) -> dict:
+    """selectolax counterpart of `trova_nodi`: one lexbor query per selector."""
+    return {
+        chiave: [NodoLexbor(n) for n in albero.css(selettore)]
+        for chiave, selettore in SELETTORI.items()
+    }
+
+
+def estrai_campi(nodi: dict, campi: list = CAMPI) -> dict:
+    """Applies the field spec to the nodes found by `trova_nodi`."""
+    attributi = {}
+    for campo in campi:
+        try:
+            valore = campo.trasforma(nodi[campo.selettore])
+        except Exception:
+            if campo.default is _OBBLIGATORIO:
+                raise
+            valore = campo.default
+        if campo.nome is None:
+            attributi.update(valore)
+        else:
+            attributi[campo.nome] = valore
+    return attributi
+
+
+def _check_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown HTML parser backend '{backend}'. Use one of {BACKENDS}."
+        )
+
+
+def parse_attributi_giocatore(content: bytes, backend: str = None) -> dict:
+    """
+    Extracts a player's attributes from the HTML of their FPEDIA page, using
+    `backend` (default `config.HTML_PARSER`).
+    """
+    backend = backend or config.HTML_PARSER
+    _check_backend(backend)
+    if backend == "selectolax":
+        return estrai_campi(trova_nodi_lexbor(_albero_lexbor(content)))
+    return estrai_campi(trova_nodi(BeautifulSoup(content, backend)))
+
+
+def parse_giocatori_urls(content: bytes, backend: str = None) -> list:
+    """Player page URLs listed on an FPEDIA role page."""
+    backend = backend or config.HTML_PARSER
+    _check_backend(backend)
+    if backend == "selectolax":
+        articoli = [NodoLexbor(n) for n in _albero_lexbor(content).css("article")]
+    else:
+        articoli = BeautifulSoup(content, backend).find_all("article")
+    return [articolo.find("a").get("href") for articolo in articoli]
+
+
+_versione_codice = None
+
+
+def parser_version() -> str:
+    """
+    Version of the parse of a player page: hash of this module's source and
+    of `config.HTML_PARSER`. Cached parses of another version are stale.
+    """
+    global _versione_codice
+    if _versione_codice is None:
+        with open(__file__, "rb") as f:
+            _versione_codice = hashlib.sha1(f.read(), usedforsecurity=False).hexdigest()
+    return f"{_versione_codice}:{config.HTML_PARSER}"
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool_context():
+    """
+    Start method of the parser processes: forkserver where available, so
+    workers are never forked from a process already running fetch threads
+    (locks held by loguru or urllib3 would stay locked in the child).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def start_pool():
+    """
+    Starts the shared parser processes (`config.PARSER_PROCESSES`); call it
+    before starting the fetch threads and pair it with `shutdown_pool`.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None and config.PARSER_PROCESSES:
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=config.PARSER_PROCESSES, mp_context=pool_context()
+            )
+
+
+def parse_in_pool(content: bytes) -> dict:
+    """
+    Parses a player page in the shared process pool started by `start_pool`,
+    so parsing is not serialized on the GIL with the fetch threads. Without
+    a running pool (or with `config.PARSER_PROCESSES = 0`) the page is
+    parsed in the calling thread.
+    """
+    with _pool_lock:
+        pool = _pool
+    if pool is None:
+        return parse_attributi_giocatore(content)
+    return pool.submit(parse_attributi_giocatore, content, config.HTML_PARSER).result()
+
+
+def shutdown_pool():
+    """Stops the parser processes, if they were started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,102 @@
+# fstats_auth.py
+import base64
+import json
+import os
+import threading
+import time
+
+from loguru import logger
+
+import config
+
+
+def _jwt_expiry(token: str) -> float | None:
+    """`exp` claim of a JWT access token, None if the token is not a JWT."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenStore:
+    """
+    FSTATS access token persisted in a JSON file with its expiry, so that
+    consecutive runs reuse it instead of logging in again. The expiry comes
+    from the JWT `exp` claim, or from `expires_in` in the login response, or
+    else from `config.FSTATS_TOKEN_TTL`. A token is refreshed proactively when
+    it has less than `config.FSTATS_TOKEN_REFRESH_MARGIN` seconds left.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable FSTATS token file {self.path}: {e}")
+            return {}
+
+    def _save(self, data: dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        # The token is a credential: readable by the owner only
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def _login(self, session, user: str, password: str) -> dict:
+        logger.debug("Logging into FSTATS...")
+        response = session.post(
+            config.FSTATS_LOGIN_URL,
+            json={"username": user, "password": password},
+            headers={"content-type": "application/json"},
+        )
+        response.raise_for_status()
+        body = response.json()
+        token = body["access_token"]
+        expires_at = _jwt_expiry(token)
+        if expires_at is None:
+            expires_at = time.time() + float(
+                body.get("expires_in") or config.FSTATS_TOKEN_TTL
+            )
+        logger.debug("Login successful.")
+        return {"username": user, "access_token": token, "expires_at": expires_at}
+
+    def get_token(self, session, user: str, password: str) -> str:
+        """Returns a valid access token for `user`, logging in only when needed."""
+        with self._lock:
+            data = self._load()
+            scadenza = data.get("expires_at", 0) - config.FSTATS_TOKEN_REFRESH_MARGIN
+            if data.get("username") == user and time.time() < scadenza:
+                logger.debug("Reusing cached FSTATS token.")
+                return data["access_token"]
+            data = self._login(session, user, password)
+            self._save(data)
+            return data["access_token"]
+
+    def invalidate(self):
+        """Forgets the stored token, e.g. after the API rejected it with a 401."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_token_store() -> TokenStore:
+    """Returns the process-wide store at `config.FSTATS_TOKEN_FILE`."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TokenStore(config.FSTATS_TOKEN_FILE)
+        return _store
@@ -5,6 +5,9 @@ from typing import Dict, List, Tuple, Optional
 from fuzzywuzzy import fuzz, process
 from unidecode import unidecode
 
+import config
+import data_processor
+
 OUTPUT_FILE = "player_mapping.json"
 
 
@@ -18,8 +21,10 @@ def normalize_name(name: str) -> str:
     return name
 
 
-def normalize_team_name(team: str) -> str:
-    if pd.isna(team):
+def normalize_team_name(team) -> str:
+    if isinstance(team, dict):
+        team = team.get("name", "")
+    if team is None or (isinstance(team, float) and pd.isna(team)):
         return ""
     if isinstance(team, str) and team.startswith("{"):
         import ast
@@ -68,8 +73,8 @@ def find_best_match(
 def load_and_preprocess_data(
     giocatori_file: str, players_file: str
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    df_giocatori = pd.read_csv(giocatori_file)
-    df_players = pd.read_csv(players_file, sep=";")
+    df_giocatori = data_processor.load_source("fpedia", giocatori_file, vista="match")
+    df_players = data_processor.load_source("fstats", players_file, vista="match")
 
     df_giocatori["nome_normalized"] = df_giocatori["Nome"].apply(normalize_name)
     df_giocatori["squadra_normalized"] = df_giocatori["Squadra"].apply(
@@ -86,8 +91,8 @@ def load_and_preprocess_data(
 
 
 def create_fuzzy_mapping(
-    giocatori_file: str = "data/_giocatori.csv",
-    players_file: str = "data/_players.csv",
+    giocatori_file: str = config.GIOCATORI_CSV,
+    players_file: str = config.PLAYERS_CSV,
     min_similarity: float = 60.0,
     use_team_filter: bool = True,
 ) -> Tuple[Dict[str, str], List[str], List[str]]:
@@ -279,11 +284,11 @@ def save_mapping_to_json(
 
 
 def start_matching(
-    df_giocatori_path: str = "data/_giocatori.csv",
-    df_players_path: str = "data/_players.csv",
+    df_giocatori_path: str = config.GIOCATORI_CSV,
+    df_players_path: str = config.PLAYERS_CSV,
 ):
     mapping, unmapped_1, unmapped_2 = create_fuzzy_mapping(
-        min_similarity=60.0, use_team_filter=True
+        df_giocatori_path, df_players_path, min_similarity=60.0, use_team_filter=True
     )
 
     # Carica i dati per il partial matching
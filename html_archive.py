@@ -0,0 +1,181 @@
+# html_archive.py
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from loguru import logger
+
+import config
+
+PACK_EXT = ".pack"
+INDEX_EXT = ".idx.jsonl"
+
+
+class HTMLArchive:
+    """
+    Pack file of the raw pages fetched by one scrape. Every distinct body is
+    stored once, gzip-compressed and addressed by its SHA-256, appended to
+    `<run>.pack`; `<run>.idx.jsonl` maps each URL to its blob (hash, offset,
+    length). Both files are append-only and flushed per page, so the pack of
+    an interrupted scrape stays readable.
+    """
+
+    def __init__(self, directory: str, run_id: str, resume: bool = False):
+        self.directory = directory
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._blobs = {}
+        os.makedirs(directory, exist_ok=True)
+        self._pack = open(os.path.join(directory, run_id + PACK_EXT), "ab")
+        self._index = open(
+            os.path.join(directory, run_id + INDEX_EXT), "a", encoding="utf-8"
+        )
+        self._write_index({"run": run_id, "resume": resume})
+
+    def _write_index(self, record: dict):
+        self._index.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._index.flush()
+
+    def add(self, url: str, content: bytes):
+        sha = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            known = sha in self._blobs
+        blob = None if known else gzip.compress(content, compresslevel=6)
+        with self._lock:
+            if sha not in self._blobs:
+                offset = self._pack.tell()
+                self._pack.write(blob)
+                self._pack.flush()
+                self._blobs[sha] = (offset, len(blob))
+            offset, length = self._blobs[sha]
+            self._write_index(
+                {"url": url, "sha256": sha, "offset": offset, "length": length}
+            )
+
+    def close(self):
+        with self._lock:
+            self._pack.close()
+            self._index.close()
+        logger.debug(
+            f"HTML archive {self.run_id}: {len(self._blobs)} distinct pages stored."
+        )
+
+
+def read_blob(pack_path: str, offset: int, length: int) -> bytes:
+    with open(pack_path, "rb") as f:
+        f.seek(offset)
+        return gzip.decompress(f.read(length))
+
+
+def _read_index(index_path: str) -> tuple[dict, list]:
+    """Header and page records of a pack index, skipping a truncated last line."""
+    header, records = {}, []
+    with open(index_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping corrupted line in {index_path}.")
+                continue
+            if "run" in record:
+                header = record
+            else:
+                records.append(record)
+    return header, records
+
+
+def list_packs(directory: str = None) -> list:
+    """Run ids of the archived scrapes, oldest first."""
+    directory = directory or config.HTML_ARCHIVE_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name[: -len(INDEX_EXT)]
+        for name in os.listdir(directory)
+        if name.endswith(INDEX_EXT)
+    )
+
+
+def pages(run_id: str = None, directory: str = None) -> dict:
+    """
+    URL -> (pack path, offset, length) of the archived pages. With `run_id`
+    only that pack is read; by default the latest full scrape is merged with
+    the `--resume`/`--retry-failed` runs after it, newer pages winning.
+    """
+    directory = directory or config.HTML_ARCHIVE_DIR
+    runs = list_packs(directory)
+    if run_id is not None:
+        if run_id not in runs:
+            raise FileNotFoundError(f"No archived scrape '{run_id}' in {directory}.")
+        runs = [run_id]
+    else:
+        headers = {
+            run: _read_index(os.path.join(directory, run + INDEX_EXT))[0]
+            for run in runs
+        }
+        full = [run for run in runs if not headers[run].get("resume")]
+        if full:
+            runs = runs[runs.index(full[-1]) :]
+
+    archived = {}
+    for run in runs:
+        pack_path = os.path.join(directory, run + PACK_EXT)
+        _, records = _read_index(os.path.join(directory, run + INDEX_EXT))
+        for record in records:
+            archived[record["url"]] = (pack_path, record["offset"], record["length"])
+    return archived
+
+
+def _prune(directory: str, keep: int):
+    """Deletes the packs older than the last `keep` full scrapes."""
+    runs = list_packs(directory)
+    full = [
+        run
+        for run in runs
+        if not _read_index(os.path.join(directory, run + INDEX_EXT))[0].get("resume")
+    ]
+    if len(full) <= keep:
+        return
+    oldest_kept = runs.index(full[-keep])
+    for run in runs[:oldest_kept]:
+        for ext in (PACK_EXT, INDEX_EXT):
+            try:
+                os.remove(os.path.join(directory, run + ext))
+            except OSError:
+                pass
+        logger.debug(f"Pruned archived scrape {run}.")
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def start(resume: bool = False) -> HTMLArchive | None:
+    """
+    Opens the pack of a new scrape at `config.HTML_ARCHIVE_DIR`, used by
+    `current()` until `stop()`. Returns None with `config.HTML_ARCHIVE_ENABLED` off.
+    """
+    global _current
+    if not config.HTML_ARCHIVE_ENABLED:
+        return None
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+    with _current_lock:
+        _current = HTMLArchive(config.HTML_ARCHIVE_DIR, run_id, resume=resume)
+        return _current
+
+
+def current() -> HTMLArchive | None:
+    return _current
+
+
+def stop():
+    """Closes the pack of the current scrape and prunes the oldest ones."""
+    global _current
+    with _current_lock:
+        archive, _current = _current, None
+    if archive is not None:
+        archive.close()
+        _prune(archive.directory, config.HTML_ARCHIVE_KEEP)
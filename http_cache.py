@@ -0,0 +1,247 @@
+# http_cache.py
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from loguru import logger
+
+import config
+import http_client
+
+INDEX_FILE = "index.json"
+STATS_FILE = "stats.json"
+
+
+@dataclass
+class CachedResponse:
+    """Body of a cached GET with its outcome: 'hit', 'not_modified' or 'miss'."""
+
+    url: str
+    status: str
+    content: bytes | None = None
+    parsed: Any = None
+
+
+class HTTPCache:
+    """
+    Persistent cache of GET responses, one gzip-compressed body per URL plus
+    a JSON index with the ETag/Last-Modified validators. Stale entries are
+    revalidated with a conditional request, so a 304 costs neither the
+    download nor the re-parse (the parsed value is stored next to the body).
+    When the bodies exceed `max_bytes` the least recently used are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float = 0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.counters = {"hit": 0, "not_modified": 0, "miss": 0}
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._load_json(INDEX_FILE)
+
+    def _load_json(self, name: str) -> dict:
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable HTTP cache file {path}: {e}")
+            return {}
+
+    def _write_json(self, name: str, data: dict):
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _body_path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode("utf-8"), usedforsecurity=False).hexdigest()
+        return os.path.join(self.directory, f"{key}.gz")
+
+    def read_body(self, url: str) -> bytes | None:
+        """Stored body of `url`, None if it is not on disk."""
+        try:
+            with gzip.open(self._body_path(url), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _count(self, status: str):
+        with self._lock:
+            self.counters[status] += 1
+
+    def get(self, url: str, parsed_version: str = None, **kwargs) -> CachedResponse:
+        """
+        GETs `url` through the shared session, using the cache when possible.
+        A stored parse is returned only if it was made by `parsed_version`.
+        """
+        with self._lock:
+            entry = dict(self.index.get(url, {}))
+        if entry.get("parsed_version") != parsed_version:
+            # Parsed by another parser: serve the body, to be parsed again
+            entry.pop("parsed", None)
+
+        if entry and self.ttl and time.time() - entry["stored_at"] < self.ttl:
+            cached = self._reuse(url, entry, "hit")
+            if cached:
+                return cached
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = http_client.get_session().get(url, headers=headers, **kwargs)
+        if response.status_code == 304 and entry:
+            cached = self._reuse(url, entry, "not_modified")
+            if cached:
+                return cached
+            # Body lost from disk: fall back to a full download
+            response = http_client.get_session().get(url, **kwargs)
+
+        response.raise_for_status()
+        self._count("miss")
+        self._store(url, response)
+        return CachedResponse(url, "miss", response.content)
+
+    def _reuse(self, url: str, entry: dict, status: str) -> CachedResponse | None:
+        """Serves `entry` from disk; the body is read only if nothing was parsed yet."""
+        content = None
+        if "parsed" not in entry:
+            content = self.read_body(url)
+            if content is None:
+                return None
+        self._touch(url, refreshed=status == "not_modified")
+        self._count(status)
+        return CachedResponse(url, status, content, entry.get("parsed"))
+
+    def set_parsed(self, url: str, parsed: Any, version: str = None):
+        """
+        Attaches the parsed value of a cached body, made by parser `version`,
+        reused on hits and 304s as long as the parser version is the same.
+        """
+        with self._lock:
+            if url in self.index:
+                self.index[url]["parsed"] = parsed
+                self.index[url]["parsed_version"] = version
+
+    def _touch(self, url: str, refreshed: bool = False):
+        with self._lock:
+            if url in self.index:
+                self.index[url]["last_used"] = time.time()
+                if refreshed:
+                    self.index[url]["stored_at"] = time.time()
+
+    def _store(self, url: str, response):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified and not self.ttl:
+            return
+
+        body_path = self._body_path(url)
+        tmp_path = f"{body_path}.tmp"
+        with gzip.open(tmp_path, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp_path, body_path)
+
+        now = time.time()
+        with self._lock:
+            self.index[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "size": os.path.getsize(body_path),
+                "stored_at": now,
+                "last_used": now,
+            }
+            self._evict()
+
+    def _evict(self):
+        """Drops least recently used bodies until the cache fits in `max_bytes`."""
+        total = sum(entry["size"] for entry in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self.index.items(), key=lambda i: i[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+            total -= entry["size"]
+            del self.index[url]
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(entry["size"] for entry in self.index.values())
+
+    def flush(self):
+        """Persists the index and the hit/miss/304 counters of this run."""
+        with self._lock:
+            self._write_json(INDEX_FILE, self.index)
+            stats = self._load_json(STATS_FILE)
+            totals = stats.get("total", {})
+            for status, count in self.counters.items():
+                totals[status] = totals.get(status, 0) + count
+            self._write_json(
+                STATS_FILE,
+                {
+                    "last_run": {
+                        **self.counters,
+                        "at": datetime.now().isoformat(timespec="seconds"),
+                    },
+                    "total": totals,
+                },
+            )
+        logger.info(
+            f"HTTP cache: {self.counters['hit']} hits, "
+            f"{self.counters['not_modified']} not modified (304), "
+            f"{self.counters['miss']} misses."
+        )
+        self.counters = dict.fromkeys(self.counters, 0)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> HTTPCache:
+    """Returns the process-wide cache rooted at `config.HTTP_CACHE_DIR`."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HTTPCache(
+                config.HTTP_CACHE_DIR,
+                config.HTTP_CACHE_MAX_MB * 1024 * 1024,
+                config.HTTP_CACHE_TTL,
+            )
+        return _cache
+
+
+def read_stats(directory: str = None) -> dict:
+    """Summary for `cli.py status`: stored pages, size and last run counters."""
+    directory = directory or config.HTTP_CACHE_DIR
+    cache_stats = {"pages": 0, "size": 0, "last_run": None}
+    index_path = os.path.join(directory, INDEX_FILE)
+    stats_path = os.path.join(directory, STATS_FILE)
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        cache_stats["pages"] = len(index)
+        cache_stats["size"] = sum(entry["size"] for entry in index.values())
+        with open(stats_path, encoding="utf-8") as f:
+            cache_stats["last_run"] = json.load(f).get("last_run")
+    except (OSError, ValueError):
+        pass
+    return cache_stats
@@ -0,0 +1,117 @@
+# http_client.py
+import threading
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+import config
+
+
+class _ConnectionStats:
+    """Thread-safe counters of requests sent and TCP/TLS connections opened."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def add_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    @property
+    def reused_connections(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.new_connections = 0
+
+
+stats = _ConnectionStats()
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        stats.add_connection()
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        stats.add_connection()
+        super().connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that keeps up to `pool_maxsize` keep-alive connections per host
+    and records in `stats` how many requests reused an already open connection.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        stats.add_request()
+        return super().send(request, *args, **kwargs)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide session shared by all the retrievers.
+    The underlying urllib3 pools are thread-safe, so the session can be used
+    concurrently by the scraping threads. `config.HEADERS` are sent by default
+    and gzip (plus brotli, when the `brotli` package is installed) responses
+    are decoded transparently.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update({"Accept-Encoding": ACCEPT_ENCODING})
+            session.headers.update(config.HEADERS)
+            adapter = PooledHTTPAdapter(
+                pool_connections=config.HTTP_POOL_CONNECTIONS,
+                pool_maxsize=config.HTTP_POOL_MAXSIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def log_stats():
+    """Logs how many requests were served over reused keep-alive connections."""
+    if not stats.requests:
+        return
+    logger.info(
+        f"HTTP connections: {stats.requests} requests, "
+        f"{stats.new_connections} new connections, "
+        f"{stats.reused_connections} reused."
+    )
@@ -0,0 +1,135 @@
+# http_recorder.py
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import datetime
+
+from loguru import logger
+
+import http_client
+
+INDEX_FILE = "index.jsonl"
+
+# Response headers kept in the fixtures, the ones the retrievers look at
+HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+# JSON fields never written to disk
+REDACTED_FIELDS = ("access_token", "refresh_token")
+
+
+def _redact(content: bytes) -> bytes:
+    try:
+        body = json.loads(content)
+    except ValueError:
+        return content
+    if not isinstance(body, dict) or not any(k in body for k in REDACTED_FIELDS):
+        return content
+    for field in REDACTED_FIELDS:
+        if field in body:
+            body[field] = "REDACTED"
+    return json.dumps(body).encode("utf-8")
+
+
+class HTTPRecorder:
+    """
+    Captures the responses of the shared session into a fixture directory
+    for `replay_server.py`: one gzip body per distinct content (named by its
+    SHA-256) plus `index.jsonl` with method, URL, status and the relevant
+    headers. Tokens in JSON bodies are redacted; request headers and bodies
+    (credentials) are never stored.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.count = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index = open(os.path.join(directory, INDEX_FILE), "a", encoding="utf-8")
+
+    def hook(self, response, *args, **kwargs):
+        """`requests` response hook: records `response` and returns it."""
+        if response.status_code == 304:
+            return response
+        content = response.content
+        # Streaming consumers (ijson) read `raw`: hand them the body again
+        response.raw = io.BytesIO(content)
+        self.record(response.request.method, response.url, response, content)
+        return response
+
+    def record(self, method: str, url: str, response, content: bytes):
+        content = _redact(content)
+        sha = hashlib.sha256(content).hexdigest()
+        body_path = os.path.join(self.directory, f"{sha}.gz")
+        if not os.path.exists(body_path):
+            tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, body_path)
+        entry = {
+            "method": method,
+            "url": url,
+            "status": response.status_code,
+            "headers": {
+                h: response.headers[h] for h in HEADERS if h in response.headers
+            },
+            "body": f"{sha}.gz",
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._index.close()
+
+
+_recorder = None
+
+
+def start(directory: str) -> HTTPRecorder:
+    """Starts recording every response of `http_client.get_session()`."""
+    global _recorder
+    stop()
+    _recorder = HTTPRecorder(directory)
+    http_client.get_session().hooks["response"].append(_recorder.hook)
+    logger.info(f"Recording HTTP responses into {directory}.")
+    return _recorder
+
+
+def stop():
+    global _recorder
+    if _recorder is None:
+        return
+    hooks = http_client.get_session().hooks["response"]
+    if _recorder.hook in hooks:
+        hooks.remove(_recorder.hook)
+    _recorder.close()
+    logger.info(f"{_recorder.count} HTTP responses recorded in {_recorder.directory}.")
+    _recorder = None
+
+
+def load_index(directory: str) -> dict:
+    """(method, url) -> latest recorded entry of the fixture directory."""
+    entries = {}
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return entries
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping corrupted line in {path}.")
+                continue
+            entries[(entry["method"], entry["url"])] = entry
+    return entries
+
+
+def read_body(directory: str, entry: dict) -> bytes:
+    with gzip.open(os.path.join(directory, entry["body"]), "rb") as f:
+        return f.read()
@@ -5,21 +5,37 @@ import pandas as pd
 import json
 
 import data_retriever
+import data_store
+import http_client
 import data_processor
 import convenienza_calculator
 import fuzzy_matcher
+import player_history
+import rankings
+import scoring_profiles
+import skills
+import snapshot_db
+import stage_cache
 import config
 
 
+def output_paths(base_name):
+    """Excel and JSON files written by save_analysis_results"""
+    return [
+        os.path.join(config.OUTPUT_DIR, f"{base_name}.xlsx"),
+        os.path.join(config.OUTPUT_DIR, f"{base_name}.json"),
+    ]
+
+
 def save_analysis_results(df, base_name, source_name):
     """Save analysis results in both Excel and JSON formats"""
+    df = data_store.to_export(df)
+    excel_path, json_path = output_paths(base_name)
 
     # Excel output
-    excel_path = os.path.join(config.OUTPUT_DIR, f"{base_name}.xlsx")
     df.to_excel(excel_path, index=False)
 
     # JSON output
-    json_path = os.path.join(config.OUTPUT_DIR, f"{base_name}.json")
     data = {
         "metadata": {
             "source": source_name,
@@ -61,7 +77,8 @@ def merge_datasets_with_mapping(
     logger.info(f"Found {len(all_mapping)} player mappings")
 
     # MERGING
-    df_fpedia_merge = df_fpedia_final.copy()
+    # The packed skills matrix is internal to the scorers
+    df_fpedia_merge = df_fpedia_final.drop(columns=[skills.COLONNA], errors="ignore")
     df_fstats_merge = df_fstats_final.copy()
 
     fpedia_cols = {
@@ -133,14 +150,23 @@ def main():
     logger.info("Step 1: Retrieving data from all sources...")
     data_retriever.scrape_fpedia(force=config.FORCE_SCRAPING_MAIN)
     data_retriever.fetch_FSTATS_data(force=config.FORCE_SCRAPING_MAIN)
+    http_client.log_stats()
     logger.info("Data retrieval complete.")
 
     # 2. Generate fuzzy mapping
     logger.info("Step 2: Generating fuzzy name mapping...")
     try:
-        fuzzy_matcher.start_matching(
-            df_giocatori_path=config.GIOCATORI_CSV,
-            df_players_path=config.PLAYERS_CSV,
+        stage_cache.cached(
+            "matching",
+            fuzzy_matcher.start_matching,
+            config.GIOCATORI_CSV,
+            config.PLAYERS_CSV,
+            outputs=[fuzzy_matcher.OUTPUT_FILE],
+            extra=[
+                stage_cache.file_digest(config.GIOCATORI_CSV),
+                stage_cache.file_digest(config.PLAYERS_CSV),
+            ],
+            modules=[data_processor],
         )
         logger.info("Fuzzy mapping complete.")
     except Exception as e:
@@ -156,8 +182,36 @@ def main():
     if not df_fpedia.empty:
         logger.info("--- Starting FPEDIA Pipeline ---")
 
-        df_processed = data_processor.process_fpedia_data(df_fpedia)
-        df_final = convenienza_calculator.calcola_convenienza_fpedia(df_processed)
+        # The trend features depend on the snapshot history too
+        df_processed = stage_cache.cached(
+            "process_fpedia",
+            data_processor.process_fpedia_data,
+            df_fpedia,
+            extra=[snapshot_db.latest("fpedia")],
+            modules=[player_history, skills, data_store],
+        )
+        df_final = stage_cache.cached(
+            "convenienza_fpedia",
+            convenienza_calculator.calcola_convenienza_fpedia,
+            df_processed,
+            modules=[skills, data_store],
+        )
+        df_final = stage_cache.cached(
+            "profili_fpedia",
+            scoring_profiles.add_profile_columns,
+            df_final,
+            "fpedia",
+            extra=[stage_cache.file_digest(config.SCORING_PROFILES_FILE)],
+        )
+        # Per-role and per-team percentiles, z-scores and ranks
+        df_final = stage_cache.cached(
+            "ranking_fpedia",
+            rankings.add_rankings,
+            df_final,
+            "fpedia",
+            extra=[stage_cache.file_digest(config.SCORING_PROFILES_FILE)],
+            modules=[scoring_profiles],
+        )
 
         df_final = df_final.sort_values(by="Convenienza Potenziale", ascending=False)
 
@@ -179,6 +233,7 @@ def main():
             "Partite giocate",
             # Qualitative Info
             "Trend",
+            "Trend storico",
             "Skills",
             "Consigliato prossima giornata",
             "Buon investimento",
@@ -191,11 +246,18 @@ def main():
             "Assist previsti",
             "Nuovo acquisto",
         ]
+        output_columns += scoring_profiles.profile_columns("fpedia")
+        output_columns += rankings.ranking_columns(df_final, "fpedia")
         final_columns = [col for col in output_columns if col in df_final.columns]
 
         # Save both Excel and JSON
-        excel_path, json_path = save_analysis_results(
-            df_final[final_columns], "fpedia_analysis", "fpedia"
+        excel_path, json_path = stage_cache.cached(
+            "export_fpedia",
+            save_analysis_results,
+            df_final[final_columns],
+            "fpedia_analysis",
+            "fpedia",
+            outputs=output_paths("fpedia_analysis"),
         )
 
         df_fpedia_final = df_final.copy()  # Salva per il merge
@@ -209,8 +271,30 @@ def main():
     if not df_FSTATS.empty:
         logger.info("--- Starting FSTATS Pipeline ---")
 
-        df_processed = data_processor.process_FSTATS_data(df_FSTATS)
-        df_final = convenienza_calculator.calcola_convenienza_FSTATS(df_processed)
+        df_processed = stage_cache.cached(
+            "process_fstats", data_processor.process_FSTATS_data, df_FSTATS
+        )
+        df_final = stage_cache.cached(
+            "convenienza_fstats",
+            convenienza_calculator.calcola_convenienza_FSTATS,
+            df_processed,
+        )
+        df_final = stage_cache.cached(
+            "profili_fstats",
+            scoring_profiles.add_profile_columns,
+            df_final,
+            "fstats",
+            extra=[stage_cache.file_digest(config.SCORING_PROFILES_FILE)],
+        )
+        # Per-role and per-team percentiles, z-scores and ranks
+        df_final = stage_cache.cached(
+            "ranking_fstats",
+            rankings.add_rankings,
+            df_final,
+            "fstats",
+            extra=[stage_cache.file_digest(config.SCORING_PROFILES_FILE)],
+            modules=[scoring_profiles],
+        )
 
         df_final = df_final.sort_values(by="Convenienza Potenziale", ascending=False)
 
@@ -294,11 +378,18 @@ def main():
             "firstname",
             "lastname",
         ]
+        output_columns += scoring_profiles.profile_columns("fstats")
+        output_columns += rankings.ranking_columns(df_final, "fstats")
         final_columns = [col for col in output_columns if col in df_final.columns]
 
         # Save both Excel and JSON
-        excel_path, json_path = save_analysis_results(
-            df_final[final_columns], "FSTATS_analysis", "fstats"
+        excel_path, json_path = stage_cache.cached(
+            "export_fstats",
+            save_analysis_results,
+            df_final[final_columns],
+            "FSTATS_analysis",
+            "fstats",
+            outputs=output_paths("FSTATS_analysis"),
         )
 
         df_fstats_final = df_final.copy()  # Salva per il merge
@@ -311,12 +402,24 @@ def main():
     # 4. Create unified analysis if both datasets are available
     if df_fpedia_final is not None and df_fstats_final is not None:
         logger.info("--- Creating Unified Analysis ---")
-        df_unified = merge_datasets_with_mapping(df_fpedia_final, df_fstats_final)
+        df_unified = stage_cache.cached(
+            "merge",
+            merge_datasets_with_mapping,
+            df_fpedia_final,
+            df_fstats_final,
+            fuzzy_matcher.OUTPUT_FILE,
+            extra=[stage_cache.file_digest(fuzzy_matcher.OUTPUT_FILE)],
+        )
 
         if not df_unified.empty:
             # Save both Excel and JSON
-            excel_path, json_path = save_analysis_results(
-                df_unified, "unified_analysis", "unified"
+            excel_path, json_path = stage_cache.cached(
+                "export_unified",
+                save_analysis_results,
+                df_unified,
+                "unified_analysis",
+                "unified",
+                outputs=output_paths("unified_analysis"),
             )
             logger.info(f"Unified analysis complete. Results saved to {excel_path}")
             logger.info(f"Unified JSON export saved to {json_path}")
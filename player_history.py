@@ -0,0 +1,180 @@
+# player_history.py
+import os
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+import config
+import snapshot_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS delta (
+    nome TEXT NOT NULL,
+    campo TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    delta REAL NOT NULL,
+    PRIMARY KEY (nome, campo, snapshot_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS delta_snapshot (
+    snapshot_id INTEGER PRIMARY KEY,
+    creato_il TEXT NOT NULL
+);
+"""
+
+# Campi numerici FPEDIA di cui si tiene la storia
+CAMPI = [
+    "Punteggio",
+    f"Fantamedia anno {config.ANNO_CORRENTE-1}-{config.ANNO_CORRENTE}",
+    "Presenze campionato corrente",
+    "Buon investimento",
+    "Resistenza infortuni",
+]
+# Campo da cui si ricava il "Trend storico" (UP/DOWN/STABLE)
+CAMPO_TREND = f"Fantamedia anno {config.ANNO_CORRENTE-1}-{config.ANNO_CORRENTE}"
+
+
+def _valori(df: pd.DataFrame) -> pd.DataFrame:
+    """Long (nome, campo, valore) table of the tracked fields of a snapshot."""
+    campi = [c for c in CAMPI if c in df.columns]
+    if "Nome" not in df.columns or not campi:
+        return pd.DataFrame(columns=["nome", "campo", "valore"])
+    valori = (
+        df[["Nome", *campi]]
+        .drop_duplicates("Nome")
+        .melt(id_vars="Nome", var_name="campo", value_name="valore")
+    )
+    valori["valore"] = pd.to_numeric(valori["valore"], errors="coerce")
+    return valori.rename(columns={"Nome": "nome"}).dropna()
+
+
+def update(path: str = None) -> int:
+    """
+    Delta-encodes the FPEDIA snapshots not encoded yet, oldest first: for
+    every player and field of `CAMPI` only the change since its previous
+    value is stored (its value, the first time), nothing when unchanged.
+    Returns the number of snapshots encoded.
+    """
+    with closing(snapshot_db.connect(path)) as conn:
+        conn.executescript(SCHEMA)
+        fatti = {r[0] for r in conn.execute("SELECT snapshot_id FROM delta_snapshot")}
+        correnti = pd.read_sql_query(
+            "SELECT nome, campo, SUM(delta) AS valore FROM delta GROUP BY nome, campo",
+            conn,
+            index_col=["nome", "campo"],
+        )["valore"].astype(float)
+    nuovi = [s for s in snapshot_db.snapshots("fpedia", path) if s["id"] not in fatti]
+    if not nuovi:
+        return 0
+
+    for snapshot in nuovi:
+        valori = _valori(snapshot_db.query(snapshot["id"], path=path))
+        valori = valori.set_index(["nome", "campo"])["valore"]
+        precedenti = correnti.reindex(valori.index)
+        delta = (valori - precedenti.fillna(0)).round(9)
+        cambiati = delta[precedenti.isna() | (delta != 0)]
+        with closing(snapshot_db.connect(path)) as conn, conn:
+            conn.executemany(
+                "INSERT INTO delta (nome, campo, snapshot_id, delta) VALUES (?, ?, ?, ?)",
+                [
+                    (nome, campo, snapshot["id"], d)
+                    for (nome, campo), d in cambiati.items()
+                ],
+            )
+            conn.execute(
+                "INSERT INTO delta_snapshot (snapshot_id, creato_il) VALUES (?, ?)",
+                (snapshot["id"], snapshot["creato_il"]),
+            )
+        correnti = valori.combine_first(correnti)
+        logger.debug(
+            f"Snapshot {snapshot['id']} delta-encoded: {len(cambiati)} changed values."
+        )
+    return len(nuovi)
+
+
+def history(path: str = None) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Values of every tracked field over the encoded snapshots: a DataFrame
+    indexed by (nome, campo) with one column per snapshot (NaN before a
+    player first appears, the last value carried over the snapshots that
+    miss the player), and the snapshot times as a Series.
+    """
+    with closing(snapshot_db.connect(path)) as conn:
+        conn.executescript(SCHEMA)
+        delta = pd.read_sql_query(
+            "SELECT nome, campo, snapshot_id, delta FROM delta", conn
+        )
+        tempi = pd.read_sql_query(
+            "SELECT snapshot_id, creato_il FROM delta_snapshot ORDER BY snapshot_id",
+            conn,
+        )
+    tempi = pd.to_datetime(tempi.set_index("snapshot_id")["creato_il"])
+    if delta.empty:
+        return pd.DataFrame(columns=tempi.index), tempi
+    variazioni = delta.pivot(
+        index=["nome", "campo"], columns="snapshot_id", values="delta"
+    ).reindex(columns=tempi.index)
+    presente = variazioni.notna().cumsum(axis=1) > 0
+    valori = variazioni.fillna(0).cumsum(axis=1).round(9).where(presente)
+    return valori, tempi
+
+
+def trend_features(finestra: int = None, path: str = None) -> pd.DataFrame:
+    """
+    Trend features of each player over the last `finestra` snapshots
+    (default `config.TREND_FINESTRA`), computed on the whole history matrix
+    at once: per field the least-squares slope (per day), the moving average
+    and the volatility (standard deviation of the changes), plus a
+    "Trend storico" label from the slope of `CAMPO_TREND`. Indexed by Nome;
+    empty until `config.TREND_MIN_SNAPSHOT` snapshots are encoded.
+    """
+    finestra = finestra or config.TREND_FINESTRA
+    if not os.path.exists(path or config.SNAPSHOT_DB):
+        return pd.DataFrame()
+    update(path)
+    valori, tempi = history(path)
+    if len(tempi) < config.TREND_MIN_SNAPSHOT or valori.empty:
+        return pd.DataFrame()
+
+    valori = valori.iloc[:, -finestra:]
+    y = valori.to_numpy(dtype=float)
+    giorni = (
+        tempi.iloc[-finestra:] - tempi.iloc[0]
+    ).dt.total_seconds().to_numpy() / 86400
+    x = np.where(np.isnan(y), np.nan, giorni)
+    osservazioni = (~np.isnan(y)).sum(axis=1)
+
+    # Every row has its last value (values are carried forward once seen)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dx = x - np.nanmean(x, axis=1, keepdims=True)
+        dy = y - np.nanmean(y, axis=1, keepdims=True)
+        pendenza = np.nansum(dx * dy, axis=1) / np.nansum(dx * dx, axis=1)
+    pendenza = np.where(np.isfinite(pendenza), pendenza, 0.0)
+    media = valori.mean(axis=1).to_numpy()
+    volatilita = valori.diff(axis=1).std(axis=1, ddof=0).fillna(0).to_numpy()
+
+    features = pd.DataFrame(
+        {
+            "trend": pendenza,
+            "media mobile": media,
+            "volatilità": volatilita,
+            "n": osservazioni,
+        },
+        index=valori.index,
+    )
+    wide = features.drop(columns="n").unstack("campo")
+    wide.columns = [f"{campo} {misura}" for misura, campo in wide.columns]
+    wide = wide[sorted(wide.columns)]
+
+    if CAMPO_TREND in valori.index.get_level_values("campo"):
+        trend = features.xs(CAMPO_TREND, level="campo")
+        etichetta = np.select(
+            [trend["trend"] > 0, trend["trend"] < 0], ["UP", "DOWN"], "STABLE"
+        )
+        wide["Trend storico"] = pd.Series(etichetta, index=trend.index).where(
+            trend["n"] >= config.TREND_MIN_SNAPSHOT
+        )
+    wide.index.name = "Nome"
+    return wide
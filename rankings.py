@@ -0,0 +1,104 @@
+# rankings.py
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+import scoring_profiles
+
+# Gruppi entro cui si normalizzano i punteggi: nome nelle colonne -> colonna
+GRUPPI = {"ruolo": "Ruolo", "squadra": "Squadra"}
+# Misure calcolate per ogni punteggio e gruppo
+MISURE = ("percentile", "z", "rank")
+# Punteggi di ogni fonte, oltre ai profili di scoring_profiles
+PUNTEGGI = ["Convenienza", "Convenienza Potenziale"]
+
+
+def score_columns(df: pd.DataFrame, fonte: str) -> list:
+    """Score columns of `df` that get ranked: the Convenienza indexes and the profiles."""
+    colonne = PUNTEGGI + scoring_profiles.profile_columns(fonte)
+    return [c for c in colonne if c in df.columns]
+
+
+def column(punteggio: str, misura: str, gruppo: str) -> str:
+    """Name of a ranking column, e.g. "Convenienza percentile ruolo"."""
+    return f"{punteggio} {misura} {gruppo}"
+
+
+def ranking_columns(df: pd.DataFrame, fonte: str) -> list:
+    """Ranking columns `add_rankings` adds to `df`, grouped by score."""
+    return [
+        column(punteggio, misura, gruppo)
+        for punteggio in score_columns(df, fonte)
+        for gruppo in GRUPPI
+        for misura in MISURE
+    ]
+
+
+def _chiavi(df: pd.DataFrame, colonna: str) -> pd.Series:
+    """Group key of each player; FSTATS teams are {"id", "name"} dicts."""
+    chiavi = df[colonna]
+    if chiavi.dtype == object:
+        chiavi = chiavi.map(lambda v: v.get("name") if isinstance(v, dict) else v)
+    return chiavi
+
+
+def add_rankings(df: pd.DataFrame, fonte: str) -> pd.DataFrame:
+    """
+    Per-role and per-team percentile (0-100), z-score and dense rank (1 =
+    best) of every score column, so that goalkeepers and strikers are no
+    longer compared on one scale. Each grouping is one groupby over all the
+    score columns at once; players without a role or team get NaN.
+    """
+    punteggi = score_columns(df, fonte)
+    if df.empty or not punteggi:
+        return df
+
+    valori = df[punteggi].apply(pd.to_numeric, errors="coerce")
+    colonne = {}
+    for gruppo, colonna in GRUPPI.items():
+        if colonna not in df.columns:
+            continue
+        gruppi = valori.groupby(_chiavi(df, colonna), observed=True, sort=False)
+        percentili = gruppi.rank(pct=True) * 100
+        media = gruppi.transform("mean")
+        deviazione = gruppi.transform("std", ddof=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = ((valori - media) / deviazione).where(deviazione > 0, 0.0)
+        z = z.where(valori.notna() & media.notna())
+        ranghi = gruppi.rank(method="dense", ascending=False)
+        for punteggio in punteggi:
+            colonne[column(punteggio, "percentile", gruppo)] = percentili[punteggio]
+            colonne[column(punteggio, "z", gruppo)] = z[punteggio]
+            colonne[column(punteggio, "rank", gruppo)] = ranghi[punteggio].astype(
+                "Int64"
+            )
+
+    ordine = [c for c in ranking_columns(df, fonte) if c in colonne]
+    df = df.drop(columns=ordine, errors="ignore")
+    df = pd.concat([df, pd.DataFrame(colonne, index=df.index)[ordine]], axis=1)
+    logger.debug(f"{len(ordine)} ranking columns computed for {fonte.upper()}.")
+    return df
+
+
+def select(
+    df: pd.DataFrame,
+    punteggio: str,
+    gruppo: str = "ruolo",
+    ruolo: str | None = None,
+    squadra: str | None = None,
+) -> pd.DataFrame:
+    """
+    Players of `df` (with rankings) of the given role and team, best first
+    by the `gruppo` rank of `punteggio`: filters and a sort on precomputed
+    columns, no scoring.
+    """
+    if ruolo and "Ruolo" in df.columns:
+        df = df[df["Ruolo"].astype(str).str.lower() == ruolo.lower()]
+    if squadra and "Squadra" in df.columns:
+        df = df[_chiavi(df, "Squadra").astype(str).str.contains(squadra, case=False)]
+    rank = column(punteggio, "rank", gruppo)
+    if rank not in df.columns:
+        raise ValueError(f"No ranking for '{punteggio}' by {gruppo}")
+    return df.sort_values(
+        [rank, punteggio], ascending=[True, False], na_position="last"
+    )
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for FPEDIA and FSTATS serving the responses captured with
+`cli.py scrape --record`, with injectable latency, errors and 429s.
+
+    poetry run python replay_server.py --port 8080 --latency 0.2 --error-rate 0.05
+    FPEDIA_BASE_URL=http://127.0.0.1:8080 FSTATS_BASE_URL=http://127.0.0.1:8080/api \\
+        poetry run python cli.py scrape --force
+"""
+
+import base64
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import click
+from loguru import logger
+
+import config
+import http_recorder
+
+# Tipi di route a cui si possono applicare i guasti
+ROUTES = ("listing", "player", "login", "api")
+
+
+@dataclass
+class FaultProfile:
+    """
+    Faults injected on the routes in `routes`: a delay of `latency` seconds
+    (± `jitter`), then a 429 with Retry-After with probability `rate_429`,
+    or else a 503 with probability `error_rate`.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_429: float = 0.0
+    retry_after: float = 1.0
+    routes: tuple = ROUTES
+    seed: int = None
+    _random: random.Random = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        self._random = random.Random(self.seed)  # noqa: S311 (fault injection)
+
+    def draw(self) -> tuple[float, int]:
+        """Delay and injected status (None to serve the fixture) of a request."""
+        with self._lock:
+            delay = max(self.latency + self._random.uniform(-1, 1) * self.jitter, 0.0)
+            sorteggio = self._random.random()
+        if sorteggio < self.rate_429:
+            return delay, 429
+        if sorteggio < self.rate_429 + self.error_rate:
+            return delay, 503
+        return delay, None
+
+
+def _path(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def route_of(path: str) -> str:
+    """Route type of a request path, after the URLs in `config`."""
+    if path.startswith(urlsplit(config.FSTATS_LOGIN_URL).path):
+        return "login"
+    if path.startswith(urlsplit(config.BASEURL_FSTATS).path + "/"):
+        return "api"
+    if path.startswith(urlsplit(config.FPEDIA_URL).path):
+        return "listing"
+    return "player"
+
+
+def _fake_token() -> str:
+    """Unsigned JWT valid for an hour, enough for `fstats_auth.TokenStore`."""
+
+    def parte(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    return f"{parte({'alg': 'none'})}.{parte({'exp': int(time.time()) + 3600})}.replay"
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Serves the recorded responses by method and path (origins are dropped, so
+    both sites share one local origin). Absolute links to the recorded origins
+    are rewritten to this server, logins get a fake token and unknown paths
+    a 404.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, fixtures_dir: str, faults: FaultProfile):
+        super().__init__(address, _Handler)
+        self.fixtures_dir = fixtures_dir
+        self.faults = faults
+        self.counters = {"served": 0, "not_found": 0, "429": 0, "503": 0}
+        self._lock = threading.Lock()
+        self.entries = {}
+        self.origins = set()
+        for (method, url), entry in http_recorder.load_index(fixtures_dir).items():
+            self.entries[(method, _path(url))] = entry
+            self.origins.add(_origin(url))
+        self._bodies = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def body(self, entry: dict) -> bytes:
+        """Recorded body with the recorded origins pointing at this server."""
+        nome = entry["body"]
+        with self._lock:
+            if nome in self._bodies:
+                return self._bodies[nome]
+        content = http_recorder.read_body(self.fixtures_dir, entry)
+        for origin in self.origins:
+            content = content.replace(origin.encode(), self.url.encode())
+        with self._lock:
+            self._bodies[nome] = content
+        return content
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: ReplayServer
+
+    def log_message(self, format, *args):  # noqa: A002 (BaseHTTPRequestHandler API)
+        logger.debug(f"replay: {self.address_string()} {format % args}")
+
+    def _send(self, status: int, content: bytes = b"", headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(content)
+
+    def _replay(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        route = route_of(self.path)
+        if route in self.server.faults.routes:
+            delay, status = self.server.faults.draw()
+            time.sleep(delay)
+            if status == 429:
+                self.server.count("429")
+                retry_after = f"{self.server.faults.retry_after:g}"
+                return self._send(429, headers={"Retry-After": retry_after})
+            if status == 503:
+                self.server.count("503")
+                return self._send(503)
+
+        if route == "login":
+            # Recorded tokens are redacted: hand out a fresh fake one
+            self.server.count("served")
+            content = json.dumps({"access_token": _fake_token()}).encode()
+            return self._send(200, content, {"Content-Type": "application/json"})
+        entry = self.server.entries.get((self.command, self.path))
+        if entry is None:
+            self.server.count("not_found")
+            return self._send(404)
+
+        headers = dict(entry["headers"])
+        etag = headers.get("ETag")
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.server.count("served")
+            return self._send(304, headers={"ETag": etag})
+        content = self.server.body(entry)
+        self.server.count("served")
+        self._send(entry["status"], content, headers)
+
+    # Method names required by BaseHTTPRequestHandler
+    do_GET = _replay  # noqa: N815
+    do_POST = _replay  # noqa: N815
+    do_HEAD = _replay  # noqa: N815
+
+
+def start(
+    fixtures_dir: str,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    faults: FaultProfile = None,
+) -> ReplayServer:
+    """Starts a replay server on a background thread (port 0 = any free port)."""
+    server = ReplayServer((host, port), fixtures_dir, faults or FaultProfile())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.debug(
+        f"Replay server on {server.url}: {len(server.entries)} recorded responses."
+    )
+    return server
+
+
+@click.command()
+@click.option(
+    "--fixtures",
+    type=click.Path(exists=True, file_okay=False),
+    default=config.HTTP_FIXTURES_DIR,
+    show_default=True,
+    help="Directory recorded with 'cli.py scrape --record'",
+)
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8080, show_default=True)
+@click.option(
+    "--latency", type=float, default=0.0, help="Seconds added to every response"
+)
+@click.option(
+    "--jitter", type=float, default=0.0, help="Random ± seconds on the latency"
+)
+@click.option("--error-rate", type=float, default=0.0, help="Share of 503 responses")
+@click.option("--rate-429", type=float, default=0.0, help="Share of 429 responses")
+@click.option("--retry-after", type=float, default=1.0, help="Retry-After of the 429s")
+@click.option(
+    "--route",
+    "routes",
+    type=click.Choice(ROUTES),
+    multiple=True,
+    help="Inject faults only on these routes (repeatable, default: all)",
+)
+@click.option("--seed", type=int, default=None, help="Seed of the injected faults")
+def main(
+    fixtures,
+    host,
+    port,
+    latency,
+    jitter,
+    error_rate,
+    rate_429,
+    retry_after,
+    routes,
+    seed,
+):
+    """Serves the recorded FPEDIA and FSTATS responses locally."""
+    faults = FaultProfile(
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        rate_429=rate_429,
+        retry_after=retry_after,
+        routes=routes or ROUTES,
+        seed=seed,
+    )
+    server = ReplayServer((host, port), fixtures, faults)
+    click.echo(f"Replaying {len(server.entries)} responses on {server.url} ({faults})")
+    click.echo(
+        f"  FPEDIA_BASE_URL={server.url} FSTATS_BASE_URL={server.url}"
+        f"{urlsplit(config.BASEURL_FSTATS).path}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        click.echo(f"Served: {server.counters}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# retry_policy.py
+import random
+import threading
+from collections.abc import Callable
+
+import requests
+from loguru import logger
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter and a per-URL attempt budget.
+    Only transient failures are retried: network errors, 5xx and 429.
+    Other HTTP errors (404...) and parsing errors fail at the first attempt.
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float):
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def is_retryable(exc: Exception) -> bool:
+        if isinstance(exc, requests.exceptions.HTTPError):
+            status = exc.response.status_code if exc.response is not None else None
+            return status is None or status == 429 or status >= 500
+        return isinstance(exc, requests.exceptions.RequestException)
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retrying after the `attempt`-th failure."""
+        limite = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, limite)  # noqa: S311 (jitter, not security)
+
+    def should_retry(self, exc: Exception, attempt: int) -> bool:
+        return attempt < self.max_attempts and self.is_retryable(exc)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive transient failures, calling
+    `on_open(cooldown)` to pause the whole pool. After the cooldown a single
+    further failure reopens it, while any success closes it again.
+    """
+
+    def __init__(
+        self, threshold: int, cooldown: float, on_open: Callable[[float], None]
+    ):
+        self.threshold = max(threshold, 1)
+        self.cooldown = cooldown
+        self.on_open = on_open
+        self.openings = 0
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures < self.threshold:
+                return
+            # Half-open after the cooldown: the next failure reopens the circuit
+            self._failures = self.threshold - 1
+            self.openings += 1
+        logger.warning(
+            f"Host looks unhealthy ({self.threshold} consecutive failures): "
+            f"pausing all requests for {self.cooldown:.0f}s."
+        )
+        self.on_open(self.cooldown)
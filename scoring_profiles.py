@@ -0,0 +1,256 @@
+# scoring_profiles.py
+import ast
+import os
+import re
+from dataclasses import dataclass
+from types import CodeType
+
+import numpy as np
+import pandas as pd
+import yaml
+from loguru import logger
+
+import config
+import skills
+
+# Funzioni utilizzabili nelle formule, tutte vettoriali (numpy)
+FUNZIONI = {
+    "where": np.where,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+    "clip": np.clip,
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "log": np.log,
+    "log1p": np.log1p,
+    "exp": np.exp,
+}
+
+_NODI = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.operator,
+    ast.unaryop,
+    ast.cmpop,
+)
+_BACKTICK = re.compile(r"`([^`]+)`")
+
+
+@dataclass
+class Profile:
+    """A scoring formula compiled to a code object over numpy arrays."""
+
+    nome: str
+    fonte: str
+    colonna: str
+    formula: str
+    codice: CodeType
+    nomi: dict  # identifier in the code -> column, skill, function or profile
+
+    def __call__(self, namespace: dict) -> np.ndarray:
+        return eval(self.codice, {"__builtins__": {}}, namespace)  # noqa: S307
+
+
+def _costanti() -> dict:
+    """Placeholders usable in formulas, e.g. `Fantamedia anno {ANNO_PRECEDENTE}-{ANNO_CORRENTE}`."""
+    return {
+        "ANNO_CORRENTE": config.ANNO_CORRENTE,
+        "ANNO_PRECEDENTE": config.ANNO_CORRENTE - 1,
+        "ANNO_PRECEDENTE_2": config.ANNO_CORRENTE - 2,
+    }
+
+
+def skill_variable(skill: str) -> str:
+    """Name of the 0/1 variable of a skill in FPEDIA formulas, e.g. skill_Buona_Media."""
+    return "skill_" + re.sub(r"\W", "_", skill)
+
+
+_SKILL_VARIABILI = {skill_variable(s): i for i, s in enumerate(skills.VOCABOLARIO)}
+
+
+def compile_formula(nome: str, fonte: str, formula: str, precedenti: list) -> Profile:
+    """
+    Validates `formula` and compiles it once. Column names with spaces go in
+    backticks; bare names are columns, skill variables (FPEDIA), functions of
+    `FUNZIONI` or profiles in `precedenti`. Only arithmetic, comparisons,
+    `&`/`|`/`~` and calls to `FUNZIONI` are allowed.
+    """
+    try:
+        testo = str(formula).format_map(_costanti())
+    except (KeyError, ValueError) as e:
+        raise ValueError(
+            f"Profile '{nome}': unknown placeholder {e} in {formula!r}"
+        ) from e
+    profili = {p.colonna: p.nome for p in precedenti} | {
+        p.nome: p.nome for p in precedenti
+    }
+    nomi = {}
+
+    def colonna(match):
+        identificatore = f"_colonna_{len(nomi)}"
+        nome_colonna = match.group(1)
+        if nome_colonna in profili:
+            nomi[identificatore] = ("profilo", profili[nome_colonna])
+        else:
+            nomi[identificatore] = ("colonna", nome_colonna)
+        return identificatore
+
+    testo = _BACKTICK.sub(colonna, testo)
+    try:
+        albero = ast.parse(testo.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(
+            f"Profile '{nome}': invalid formula {formula!r}: {e.msg}"
+        ) from e
+
+    for nodo in ast.walk(albero):
+        if not isinstance(nodo, _NODI):
+            raise ValueError(
+                f"Profile '{nome}': {type(nodo).__name__} not allowed in {formula!r} "
+                "(use & | ~ instead of and/or/not, where() instead of if)"
+            )
+        if isinstance(nodo, ast.Compare) and len(nodo.ops) > 1:
+            raise ValueError(f"Profile '{nome}': split chained comparisons with &")
+        if isinstance(nodo, ast.Call) and not (
+            isinstance(nodo.func, ast.Name) and nodo.func.id in FUNZIONI
+        ):
+            raise ValueError(
+                f"Profile '{nome}': only {sorted(FUNZIONI)} can be called in {formula!r}"
+            )
+        if isinstance(nodo, ast.Name) and nodo.id not in nomi:
+            if nodo.id in FUNZIONI:
+                nomi[nodo.id] = ("funzione", nodo.id)
+            elif nodo.id in profili:
+                nomi[nodo.id] = ("profilo", profili[nodo.id])
+            elif fonte == "fpedia" and nodo.id in _SKILL_VARIABILI:
+                nomi[nodo.id] = ("skill", _SKILL_VARIABILI[nodo.id])
+            else:
+                nomi[nodo.id] = ("colonna", nodo.id)
+    return Profile(
+        nome=nome,
+        fonte=fonte,
+        colonna=f"Profilo {nome}",
+        formula=str(formula),
+        codice=compile(albero, f"<profile {nome}>", "eval"),
+        nomi=nomi,
+    )
+
+
+def load_profiles(path: str = None) -> dict:
+    """
+    Profiles of the YAML file `path` (default `config.SCORING_PROFILES_FILE`)
+    compiled per source: {"fpedia": [Profile, ...], "fstats": [...]}. Each
+    profile is a formula, or a mapping with `formula` and optional `colonna`
+    (output column, default "Profilo <name>"). A missing file means no
+    profiles; an invalid one raises ValueError.
+    """
+    path = path or config.SCORING_PROFILES_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        try:
+            contenuto = yaml.safe_load(f) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid scoring profiles file {path}: {e}") from e
+
+    profili = {}
+    for fonte, definizioni in contenuto.items():
+        if fonte not in ("fpedia", "fstats"):
+            raise ValueError(f"{path}: unknown source '{fonte}' (fpedia or fstats)")
+        compilati = []
+        for nome, definizione in (definizioni or {}).items():
+            if not isinstance(definizione, dict):
+                definizione = {"formula": definizione}
+            if "formula" not in definizione:
+                raise ValueError(f"{path}: profile '{nome}' has no formula")
+            profilo = compile_formula(
+                str(nome), fonte, definizione["formula"], compilati
+            )
+            profilo.colonna = definizione.get("colonna", profilo.colonna)
+            compilati.append(profilo)
+        profili[fonte] = compilati
+    return profili
+
+
+def _valori(df: pd.DataFrame, colonna: str) -> np.ndarray:
+    """Column as numpy: numbers as float64 (NaN = 0), bools kept, text as objects."""
+    serie = df[colonna]
+    if serie.dtype == bool:
+        return serie.to_numpy()
+    if pd.api.types.is_numeric_dtype(serie):
+        return pd.to_numeric(serie, errors="coerce").fillna(0).to_numpy(dtype=float)
+    return serie.astype(object).to_numpy()
+
+
+def apply_profiles(
+    df: pd.DataFrame, fonte: str, profili: list | None = None
+) -> pd.DataFrame:
+    """
+    Evaluates every profile of `fonte` (default: those of `load_profiles`) in
+    one pass: the referenced columns are converted once into a shared
+    namespace, each compiled formula runs on whole arrays, and the results
+    are added together as columns.
+    """
+    if profili is None:
+        profili = load_profiles().get(fonte, [])
+    if df.empty or not profili:
+        return df
+
+    # Every column, skill and profile result is turned into an array once
+    # and shared by all the formulas that use it
+    valori = {}
+    matrice = None
+    for profilo in profili:
+        namespace = {}
+        for identificatore, (tipo, valore) in profilo.nomi.items():
+            if (tipo, valore) not in valori:
+                if tipo == "colonna":
+                    if valore not in df.columns:
+                        raise ValueError(
+                            f"Profile '{profilo.nome}': column '{valore}' not in {fonte} data"
+                        )
+                    valori[tipo, valore] = _valori(df, valore)
+                elif tipo == "skill":
+                    if matrice is None:
+                        matrice = skills.matrix(df)
+                    valori[tipo, valore] = matrice[:, valore]
+                elif tipo == "funzione":
+                    valori[tipo, valore] = FUNZIONI[valore]
+            namespace[identificatore] = valori[tipo, valore]
+        try:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                risultato = np.asarray(profilo(namespace), dtype=float)
+        except (TypeError, ValueError) as e:
+            raise ValueError(
+                f"Profile '{profilo.nome}' failed on {fonte} data: {e}"
+            ) from e
+        valori["profilo", profilo.nome] = np.broadcast_to(risultato, (len(df),)).copy()
+
+    colonne = {p.colonna: valori["profilo", p.nome] for p in profili}
+    df = df.drop(columns=list(colonne), errors="ignore")
+    df = pd.concat([df, pd.DataFrame(colonne, index=df.index)], axis=1)
+    logger.debug(f"{len(profili)} scoring profiles applied to {fonte.upper()}.")
+    return df
+
+
+def add_profile_columns(df: pd.DataFrame, fonte: str) -> pd.DataFrame:
+    """Pipeline step: `apply_profiles`, logging and skipping invalid profiles."""
+    try:
+        return apply_profiles(df, fonte)
+    except ValueError as e:
+        logger.error(f"Scoring profiles not applied to {fonte.upper()}: {e}")
+        return df
+
+
+def profile_columns(fonte: str) -> list:
+    """Output columns of the profiles of `fonte`, [] if none or invalid."""
+    try:
+        return [p.colonna for p in load_profiles().get(fonte, [])]
+    except ValueError:
+        return []
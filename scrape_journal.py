@@ -0,0 +1,182 @@
+# scrape_journal.py
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+
+from loguru import logger
+
+import data_store
+
+
+class ScrapeJournal:
+    """
+    Append-only JSONL journal of scraped players. Every completed page is
+    written (and flushed) as soon as it arrives, so an interrupted scrape
+    loses nothing; the journal is periodically compacted into the final CSV
+    table by streaming it twice (header union, then rows), keeping memory
+    flat regardless of the number of players.
+    """
+
+    def __init__(self, path: str, csv_path: str, compact_every: int = 50):
+        self.path = path
+        self.csv_path = csv_path
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._file = None
+        self._since_compaction = 0
+
+    def _records(self):
+        """Yields the journal records, skipping a truncated last line."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping corrupted line in {self.path}.")
+
+    def scraped_urls(self) -> set:
+        """URLs already in the journal, used by `--resume` to skip them."""
+        return {record["url"] for record in self._records()}
+
+    def open(self, resume: bool = False):
+        """Starts a run: a fresh journal, or the existing one with `resume`."""
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self._since_compaction = 0
+
+    def append(self, url: str, attributi: dict):
+        with self._lock:
+            self._file.write(
+                json.dumps({"url": url, "attributi": attributi}, ensure_ascii=False)
+                + "\n"
+            )
+            self._file.flush()
+            self._since_compaction += 1
+            if self._since_compaction >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _unique_records(self):
+        """Journal records, one per URL (the first one)."""
+        seen = set()
+        for record in self._records():
+            if record["url"] in seen:
+                continue
+            seen.add(record["url"])
+            yield record
+
+    def _compact(self):
+        """
+        Rewrites the players table from the journal, one player per URL:
+        the Parquet store and/or the CSV file, see `data_store`.
+        """
+        # Columns and their types in one streaming pass
+        tipi = data_store.fpedia_types(
+            record["attributi"] for record in self._records()
+        )
+        if not tipi:
+            return
+
+        if data_store.csv_enabled():
+            tmp_path = f"{self.csv_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(tipi), lineterminator="\n")
+                writer.writeheader()
+                for record in self._unique_records():
+                    writer.writerow(record["attributi"])
+            os.replace(tmp_path, self.csv_path)
+        # Written last, so `data_store.read` sees it as the most recent copy
+        if data_store.parquet_enabled():
+            data_store.write_fpedia(
+                (record["attributi"] for record in self._unique_records()),
+                self.csv_path,
+                tipi,
+            )
+        self._since_compaction = 0
+        logger.debug(f"Journal compacted into {self.csv_path}.")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.compact()
+
+
+class DeadLetterFile:
+    """
+    JSONL file of the player pages that failed permanently during a scrape,
+    so that `scrape --retry-failed` can process just those URLs later.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self.count = 0
+
+    def urls(self) -> list:
+        if not os.path.exists(self.path):
+            return []
+        urls = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    urls.append(json.loads(line)["url"])
+                except (ValueError, KeyError):
+                    logger.warning(f"Skipping corrupted line in {self.path}.")
+        return list(dict.fromkeys(urls))
+
+    @property
+    def _tmp_path(self) -> str:
+        return f"{self.path}.tmp"
+
+    def open(self):
+        """
+        Starts a run. Its failures go to a temporary file: the list of the
+        previous run stays in place until `close(completed=True)`.
+        """
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self.count = 0
+
+    def append(self, url: str, attempts: int, exc: Exception):
+        with self._lock:
+            self._file.write(
+                json.dumps(
+                    {
+                        "url": url,
+                        "attempts": attempts,
+                        "error": f"{type(exc).__name__}: {exc}",
+                        "failed_at": datetime.now().isoformat(timespec="seconds"),
+                    },
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+            self._file.flush()
+            self.count += 1
+
+    def close(self, completed: bool = True):
+        """
+        Ends a run: a completed one replaces the previous failures with its
+        own, an interrupted one adds its failures to them, so that the pages
+        not retried yet are not lost.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if completed or not os.path.exists(self.path):
+            os.replace(self._tmp_path, self.path)
+            return
+        with (
+            open(self._tmp_path, encoding="utf-8") as src,
+            open(self.path, "a", encoding="utf-8") as dst,
+        ):
+            dst.writelines(src)
+        os.remove(self._tmp_path)
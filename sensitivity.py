@@ -0,0 +1,99 @@
+# sensitivity.py
+import numpy as np
+import pandas as pd
+
+import convenienza_calculator
+
+# Pesi di base e punteggio vettoriale (giocatori × configurazioni) per fonte
+PESI = {
+    "fpedia": convenienza_calculator.PESI_FPEDIA,
+    "fstats": convenienza_calculator.PESI_FSTATS,
+}
+BATCH = {
+    "fpedia": convenienza_calculator.convenienza_fpedia_batch,
+    "fstats": convenienza_calculator.convenienza_fstats_batch,
+}
+
+
+def sample_weights(
+    fonte: str, n: int, spread: float = 0.5, seed: int = 0
+) -> pd.DataFrame:
+    """
+    `n` weight configurations for `fonte`: the first is the base one, the
+    others scale every base weight by a random factor in [1 - spread, 1 + spread].
+    """
+    base = pd.Series(PESI[fonte], dtype=float)
+    rng = np.random.default_rng(seed)
+    fattori = rng.uniform(1 - spread, 1 + spread, size=(n, len(base)))
+    fattori[0] = 1
+    return pd.DataFrame(fattori * base.to_numpy(), columns=base.index)
+
+
+def load_weights(path: str, fonte: str) -> pd.DataFrame:
+    """
+    Weight configurations from a CSV file with one column per weight name of
+    `fonte` (missing ones take the base value), the base one prepended.
+    """
+    base = pd.Series(PESI[fonte], dtype=float)
+    pesi = pd.read_csv(path)
+    sconosciuti = sorted(set(pesi.columns) - set(base.index))
+    if sconosciuti:
+        raise ValueError(
+            f"Unknown {fonte} weights {sconosciuti}; expected {list(base.index)}"
+        )
+    pesi = pesi.reindex(columns=base.index).astype(float).fillna(base)
+    return pd.concat([base.to_frame().T, pesi], ignore_index=True)
+
+
+def _ranghi(punteggi: np.ndarray) -> np.ndarray:
+    """Rank (1 = best) of each row within every column of a players × K matrix."""
+    ordine = np.argsort(-punteggi, axis=0, kind="stable")
+    ranghi = np.empty_like(ordine)
+    posizioni = np.broadcast_to(np.arange(1, len(punteggi) + 1)[:, None], ordine.shape)
+    np.put_along_axis(ranghi, ordine, posizioni, axis=0)
+    return ranghi
+
+
+def rank_stability(
+    df: pd.DataFrame, fonte: str, pesi: pd.DataFrame, top: int = 10
+) -> pd.DataFrame:
+    """
+    Scores the processed players of `fonte` under every row of `pesi` (the
+    first being the base configuration) in one batch, then ranks them within
+    their role for each configuration. Per player: base score and rank, the
+    best, median and worst rank, and the share of configurations that keep
+    the player in the top `top` of the role.
+    """
+    punteggi = BATCH[fonte](df, pesi[list(PESI[fonte])].to_numpy())
+    ranghi = np.empty_like(punteggi, dtype=np.int64)
+    ruoli = (
+        df["Ruolo"].astype(str).to_numpy()
+        if "Ruolo" in df.columns
+        else np.full(len(df), "")
+    )
+    for ruolo in np.unique(ruoli):
+        righe = np.flatnonzero(ruoli == ruolo)
+        ranghi[righe] = _ranghi(punteggi[righe])
+
+    colonne = [c for c in ("Nome", "Ruolo", "Squadra") if c in df.columns]
+    risultato = df[colonne].reset_index(drop=True)
+    if "Squadra" in colonne:
+        # FSTATS teams are {"id", "name"} dicts
+        risultato["Squadra"] = risultato["Squadra"].map(
+            lambda v: v.get("name") if isinstance(v, dict) else v
+        )
+    risultato = risultato.assign(
+        **{
+            "Convenienza base": punteggi[:, 0],
+            "Rank base": ranghi[:, 0],
+            "Rank min": ranghi.min(axis=1),
+            "Rank mediano": np.median(ranghi, axis=1),
+            "Rank max": ranghi.max(axis=1),
+            f"Top {top} %": (ranghi <= top).mean(axis=1) * 100,
+        }
+    )
+    return risultato.sort_values(
+        [c for c in ("Ruolo",) if c in colonne] + [f"Top {top} %", "Rank base"],
+        ascending=[True] * ("Ruolo" in colonne) + [False, True],
+        ignore_index=True,
+    )
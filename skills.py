@@ -0,0 +1,72 @@
+# skills.py
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from data_store import as_list
+
+# Bonus di ogni skill FPEDIA nel calcolo della Convenienza
+skills_mapping = {
+    "Fuoriclasse": 1,
+    "Titolare": 3,
+    "Buona Media": 2,
+    "Goleador": 4,
+    "Assistman": 2,
+    "Piazzati": 2,
+    "Rigorista": 5,
+    "Giovane talento": 2,
+    "Panchinaro": -4,
+    "Falloso": -2,
+    "Outsider": 2,
+}
+
+# Colonne della matrice giocatore × skill, nell'ordine dei bit della maschera
+VOCABOLARIO = tuple(skills_mapping)
+# Colonna dei dati elaborati con la matrice impacchettata (un bit per skill)
+COLONNA = "Skills mask"
+
+_BIT = {skill: 1 << i for i, skill in enumerate(VOCABOLARIO)}
+
+
+def encode(skills: pd.Series) -> np.ndarray:
+    """
+    Parses each player's Skills list once into a bit mask over `VOCABOLARIO`
+    (bit i set = has skill i): one int64 per player, skills outside the
+    vocabulary dropped, a repeated skill counted once.
+    """
+    liste = [as_list(v) for v in skills]
+    lunghezze = np.fromiter(map(len, liste), dtype=np.int64, count=len(liste))
+    bit = np.fromiter(
+        (_BIT.get(skill, 0) for skill in chain.from_iterable(liste)),
+        dtype=np.int64,
+        count=int(lunghezze.sum()),
+    )
+    maschere = np.zeros(len(liste), dtype=np.int64)
+    np.bitwise_or.at(maschere, np.repeat(np.arange(len(liste)), lunghezze), bit)
+    return maschere
+
+
+def matrix(df: pd.DataFrame) -> np.ndarray:
+    """
+    Player × skill boolean matrix of `df`, unpacked from its `COLONNA`
+    (encoded from Skills when the data was not processed).
+    """
+    if COLONNA in df.columns:
+        maschere = df[COLONNA].to_numpy(dtype=np.int64)
+    elif "Skills" in df.columns:
+        maschere = encode(df["Skills"])
+    else:
+        maschere = np.zeros(len(df), dtype=np.int64)
+    return (maschere[:, None] >> np.arange(len(VOCABOLARIO))) & 1 == 1
+
+
+def bonus(df: pd.DataFrame, pesi: dict | None = None) -> np.ndarray:
+    """
+    Skill bonus of each player for the weights `pesi` (default
+    `skills_mapping`) as one matrix-vector product; skills outside
+    `VOCABOLARIO` weigh nothing.
+    """
+    pesi = skills_mapping if pesi is None else pesi
+    vettore = np.array([pesi.get(skill, 0) for skill in VOCABOLARIO], dtype=float)
+    return matrix(df) @ vettore
@@ -0,0 +1,197 @@
+# snapshot_db.py
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+from loguru import logger
+
+import config
+import data_store
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    id INTEGER PRIMARY KEY,
+    fonte TEXT NOT NULL,
+    stagione INTEGER NOT NULL,
+    creato_il TEXT NOT NULL,
+    giocatori INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshot_fonte ON snapshot (fonte, stagione, id);
+
+CREATE TABLE IF NOT EXISTS giocatore (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshot (id) ON DELETE CASCADE,
+    nome TEXT,
+    squadra TEXT,
+    ruolo TEXT,
+    dati TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS giocatore_snapshot ON giocatore (snapshot_id);
+-- I filtri per sottostringa (LIKE '%x%') non possono usare indici su queste colonne
+DROP INDEX IF EXISTS giocatore_nome;
+DROP INDEX IF EXISTS giocatore_squadra;
+DROP INDEX IF EXISTS giocatore_ruolo;
+"""
+
+# Colonne di ogni fonte copiate nelle colonne di filtro (nome, squadra, ruolo)
+CHIAVI = {
+    "fpedia": ("Nome", "Squadra", "Ruolo"),
+    "fstats": ("name", "team", "fantacalcioPosition"),
+}
+
+
+def connect(path: str = None) -> sqlite3.Connection:
+    """Connection to the snapshot database (default `config.SNAPSHOT_DB`)."""
+    path = path or config.SNAPSHOT_DB
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _testo(value) -> str | None:
+    if isinstance(value, dict):
+        value = value.get("name")
+    return None if value is None else str(value)
+
+
+def record(fonte: str, stagione: int, df: pd.DataFrame, path: str = None) -> int:
+    """
+    Appends the players of `df` as a new snapshot of `fonte` for `stagione`:
+    one row per player, with name, team and role in indexed columns and the
+    whole record as JSON. Returns the snapshot id.
+    """
+    # to_json turns numpy values, NaN, lists and dicts into plain JSON
+    records = json.loads(
+        df.to_json(orient="records", force_ascii=False, double_precision=15)
+    )
+    chiavi = CHIAVI[fonte]
+    righe = [
+        (
+            *(_testo(record.get(c)) for c in chiavi),
+            json.dumps(record, ensure_ascii=False),
+        )
+        for record in records
+    ]
+    with closing(connect(path)) as conn, conn:
+        cursor = conn.execute(
+            "INSERT INTO snapshot (fonte, stagione, creato_il, giocatori) VALUES (?, ?, ?, ?)",
+            (fonte, stagione, datetime.now().isoformat(timespec="seconds"), len(righe)),
+        )
+        snapshot_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO giocatore (snapshot_id, nome, squadra, ruolo, dati) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(snapshot_id, *riga) for riga in righe],
+        )
+    logger.debug(f"Snapshot {snapshot_id}: {len(righe)} {fonte} players of {stagione}.")
+    return snapshot_id
+
+
+def record_table(fonte: str, stagione: int, csv_path: str, sep: str = ","):
+    """
+    Snapshots the table just written at `csv_path`, if `config.SNAPSHOT_ENABLED`.
+    Errors are logged: the scraped files are already saved.
+    """
+    if not config.SNAPSHOT_ENABLED:
+        return None
+    df = data_store.read(csv_path, sep=sep)
+    if df.empty:
+        return None
+    try:
+        return record(fonte, stagione, df)
+    except sqlite3.Error as e:
+        logger.error(f"Could not snapshot {csv_path} into {config.SNAPSHOT_DB}: {e}")
+        return None
+
+
+def snapshots(fonte: str = None, path: str = None) -> list:
+    """Snapshots as dicts (id, fonte, stagione, creato_il, giocatori), oldest first."""
+    path = path or config.SNAPSHOT_DB
+    if not os.path.exists(path):
+        return []
+    sql = "SELECT id, fonte, stagione, creato_il, giocatori FROM snapshot"
+    parametri = ()
+    if fonte is not None:
+        sql += " WHERE fonte = ?"
+        parametri = (fonte,)
+    with closing(connect(path)) as conn:
+        conn.row_factory = sqlite3.Row
+        return [dict(row) for row in conn.execute(sql + " ORDER BY id", parametri)]
+
+
+def latest(fonte: str, stagione: int = None, path: str = None) -> int | None:
+    """Id of the newest snapshot of `fonte` (for `stagione`), None if there is none."""
+    path = path or config.SNAPSHOT_DB
+    if not os.path.exists(path):
+        return None
+    sql = "SELECT MAX(id) FROM snapshot WHERE fonte = ?"
+    parametri = [fonte]
+    if stagione is not None:
+        sql += " AND stagione = ?"
+        parametri.append(stagione)
+    with closing(connect(path)) as conn:
+        return conn.execute(sql, parametri).fetchone()[0]
+
+
+def _like(testo: str) -> str:
+    """LIKE pattern matching `testo` anywhere, wildcards in it escaped."""
+    testo = testo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{testo}%"
+
+
+def _filtri(
+    snapshot_id: int, nome: str = None, squadra: str = None, ruolo: str = None
+) -> tuple[str, list]:
+    """WHERE clause on fixed column names, with every value bound as a parameter."""
+    condizioni = ["snapshot_id = ?"]
+    parametri = [snapshot_id]
+    for colonna, valore in (("nome", nome), ("squadra", squadra), ("ruolo", ruolo)):
+        if valore:
+            # LIKE is case-insensitive (ASCII), as the filters of cli.py inspect
+            condizioni.append(f"{colonna} LIKE ? ESCAPE '\\'")
+            parametri.append(_like(valore))
+    return " AND ".join(condizioni), parametri
+
+
+def count(
+    snapshot_id: int,
+    nome: str = None,
+    squadra: str = None,
+    ruolo: str = None,
+    path: str = None,
+) -> int:
+    """Players of a snapshot matching the filters, counted in the database."""
+    where, parametri = _filtri(snapshot_id, nome, squadra, ruolo)
+    with closing(connect(path)) as conn:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM giocatore WHERE {where}",  # noqa: S608 (see _filtri)
+            parametri,
+        ).fetchone()[0]
+
+
+def query(
+    snapshot_id: int,
+    nome: str = None,
+    squadra: str = None,
+    ruolo: str = None,
+    limit: int = None,
+    path: str = None,
+) -> pd.DataFrame:
+    """
+    Players of a snapshot as a DataFrame, in scrape order. The filters match
+    substrings of name, team and role, case-insensitively, and are evaluated
+    by SQLite together with `limit` while scanning the snapshot's rows (found
+    through the snapshot_id index), so only the matching records are decoded.
+    """
+    where, parametri = _filtri(snapshot_id, nome, squadra, ruolo)
+    sql = f"SELECT dati FROM giocatore WHERE {where} ORDER BY rowid"  # noqa: S608
+    if limit is not None:
+        sql += " LIMIT ?"
+        parametri.append(limit)
+    with closing(connect(path)) as conn:
+        records = [json.loads(dati) for (dati,) in conn.execute(sql, parametri)]
+    return pd.DataFrame.from_records(records)
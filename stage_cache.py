@@ -0,0 +1,255 @@
+# stage_cache.py
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import pandas as pd
+from loguru import logger
+
+import config
+import data_store
+
+INDEX_FILE = "index.json"
+
+
+class StageCache:
+    """
+    On-disk memo of the analysis stages: one pickle per key (the stage
+    result and the files it wrote) plus a JSON index with sizes and last use.
+    When the entries exceed `max_bytes` the least recently used are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self) -> dict:
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable stage cache index {path}: {e}")
+            return {}
+
+    def _write_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, path)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """(True, value) for a stored key, (False, None) otherwise."""
+        with self._lock:
+            if key not in self.index:
+                return False, None
+            try:
+                with open(self._entry_path(key), "rb") as f:
+                    # Only entries this module wrote itself, under the cache dir
+                    value = pickle.load(f)  # noqa: S301
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+                logger.warning(f"Dropping unreadable stage cache entry {key}: {e}")
+                del self.index[key]
+                self._write_index()
+                return False, None
+            self.index[key]["last_used"] = time.time()
+            self._write_index()
+            return True, value
+
+    def put(self, key: str, stage: str, value: Any):
+        with self._lock:
+            path = self._entry_path(key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self.index[key] = {
+                "stage": stage,
+                "size": os.path.getsize(path),
+                "last_used": time.time(),
+            }
+            self._evict()
+            self._write_index()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits in `max_bytes`."""
+        total = sum(entry["size"] for entry in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda i: i[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+            total -= entry["size"]
+            del self.index[key]
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(entry["size"] for entry in self.index.values())
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> StageCache:
+    """Returns the process-wide cache rooted at `config.STAGE_CACHE_DIR`."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = StageCache(
+                config.STAGE_CACHE_DIR, config.STAGE_CACHE_MAX_MB * 1024 * 1024
+            )
+        return _cache
+
+
+def read_stats(directory: str = None) -> dict:
+    """Summary for `cli.py status`: stored entries and their size."""
+    directory = directory or config.STAGE_CACHE_DIR
+    try:
+        with open(os.path.join(directory, INDEX_FILE), encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    return {
+        "entries": len(index),
+        "size": sum(entry["size"] for entry in index.values()),
+    }
+
+
+def file_digest(csv_path: str) -> str:
+    """Content hash of the stored table of `csv_path` (or of a plain file)."""
+    path = data_store.stored_path(csv_path) if csv_path.endswith(".csv") else csv_path
+    if path is None or not os.path.exists(path):
+        return "missing"
+    h = hashlib.sha1(usedforsecurity=False)
+    with open(path, "rb") as f:
+        for blocco in iter(lambda: f.read(1 << 20), b""):
+            h.update(blocco)
+    return h.hexdigest()
+
+
+def _update(h, value: Any):
+    if isinstance(value, pd.DataFrame):
+        h.update(repr((list(value.columns), [str(t) for t in value.dtypes])).encode())
+        # Lists and dicts (Skills, team) are hashed as their text
+        righe = pd.util.hash_pandas_object(data_store.to_export(value), index=True)
+        h.update(righe.to_numpy().tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update(h, item)
+    else:
+        h.update(repr(value).encode("utf-8"))
+
+
+def fingerprint(*values: Any) -> str:
+    """Hash of DataFrames (content, columns and dtypes) and plain values."""
+    h = hashlib.sha1(usedforsecurity=False)
+    for value in values:
+        _update(h, value)
+    return h.hexdigest()
+
+
+def _config_state() -> list:
+    """The constants of config.py (settings, paths, seasons) that stages read."""
+    return sorted(
+        (nome, repr(valore))
+        for nome, valore in vars(config).items()
+        if nome.isupper()
+        and isinstance(valore, (str, int, float, bool, list, tuple, dict, type(None)))
+    )
+
+
+_code_versions = {}
+
+
+def _code_version(files: Iterable[str]) -> str:
+    """Hash of the source files implementing a stage, computed once per run."""
+    versione = []
+    for path in sorted(set(files)):
+        if path not in _code_versions:
+            with open(path, "rb") as f:
+                _code_versions[path] = hashlib.sha1(
+                    f.read(), usedforsecurity=False
+                ).hexdigest()
+        versione.append(_code_versions[path])
+    return "".join(versione)
+
+
+def _read_outputs(outputs: Iterable[str]) -> dict:
+    contenuti = {}
+    for path in outputs:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                contenuti[path] = f.read()
+    return contenuti
+
+
+def _restore_outputs(contenuti: dict):
+    """Writes back the output files of a stage that are missing or changed."""
+    for path, dati in contenuti.items():
+        if os.path.exists(path) and os.path.getsize(path) == len(dati):
+            with open(path, "rb") as f:
+                if f.read() == dati:
+                    continue
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(dati)
+
+
+def cached(
+    stage: str,
+    func: Callable,
+    *args: Any,
+    outputs: Iterable[str] = (),
+    extra: Iterable[Any] = (),
+    modules: Iterable[Any] = (),
+) -> Any:
+    """
+    Returns `func(*args)`, memoized on disk when `config.STAGE_CACHE_ENABLED`.
+    The key hashes the arguments (DataFrames by content), the `extra` values
+    standing for inputs read elsewhere (e.g. `file_digest` of a file), the
+    constants of config.py and the source of the module of `func` and of
+    `modules`. The `outputs` files the stage writes are stored with its result
+    and rewritten on a hit if missing or changed.
+    """
+    if not config.STAGE_CACHE_ENABLED:
+        return func(*args)
+
+    files = [inspect.getfile(func), __file__] + [inspect.getfile(m) for m in modules]
+    outputs = list(outputs)
+    key = fingerprint(
+        stage, _code_version(files), _config_state(), outputs, list(extra), *args
+    )
+    cache = get_cache()
+    trovato, valore = cache.get(key)
+    if trovato:
+        risultato, contenuti = valore
+        _restore_outputs(contenuti)
+        logger.debug(f"Stage '{stage}' loaded from cache.")
+        return risultato
+
+    risultato = func(*args)
+    try:
+        cache.put(key, stage, (risultato, _read_outputs(outputs)))
+    except (OSError, pickle.PicklingError, TypeError) as e:
+        logger.warning(f"Stage '{stage}' result not cached: {e}")
+    return risultato
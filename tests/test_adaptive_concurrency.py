@@ -0,0 +1,25 @@
+# tests/test_adaptive_concurrency.py
+import config
+import data_retriever
+
+
+def _richieste_veloci(controller, n):
+    for _ in range(n):
+        controller.acquire()
+        controller.release(latency=0.01)
+
+
+def test_default_ceiling_is_the_configured_workers(monkeypatch):
+    monkeypatch.setattr(config, "ADAPTIVE_CONCURRENCY", True)
+    monkeypatch.setattr(config, "CONCURRENCY_MAX", None)
+    controller = data_retriever._crea_controller(config.MAX_WORKERS)
+    _richieste_veloci(controller, 200)
+    assert controller.limit == config.MAX_WORKERS
+
+
+def test_explicit_ceiling_allows_ramping_up(monkeypatch):
+    monkeypatch.setattr(config, "ADAPTIVE_CONCURRENCY", True)
+    monkeypatch.setattr(config, "CONCURRENCY_MAX", 8)
+    controller = data_retriever._crea_controller(5)
+    _richieste_veloci(controller, 200)
+    assert controller.limit == 8
@@ -0,0 +1,114 @@
+# tests/test_convenienza_calculator.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark
+import convenienza_calculator
+from config import ANNO_CORRENTE
+
+FM_PRECEDENTE = f"Fantamedia anno {ANNO_CORRENTE-2}-{ANNO_CORRENTE-1}"
+FM_CORRENTE = f"Fantamedia anno {ANNO_CORRENTE-1}-{ANNO_CORRENTE}"
+INDICI = ["Convenienza", "Convenienza Potenziale"]
+
+
+def _giocatori():
+    """Players hitting every branch: no appearances at all, few current ones, bad values."""
+    return pd.DataFrame(
+        {
+            "Nome": ["A", "B", "C", "D", "E", "F"],
+            "Punteggio": [80, 0, "45", None, 60, 70],
+            FM_PRECEDENTE: [6.5, 0, "n.d.", 7.0, 5.5, 6.0],
+            "Partite giocate": [30, 0, 10, 0, 38, 20],
+            FM_CORRENTE: [7.0, 0, 6.0, 6.5, None, 6.2],
+            "Presenze campionato corrente": [20, 0, 3, 6, 0, 12],
+            "Buon investimento": [60, 0, 40, 60, 80, None],
+            "Resistenza infortuni": [80, 0, 60, 40, 60, 61],
+            "Skills": [
+                ["Rigorista", "Titolare"],
+                [],
+                ["Sconosciuta"],
+                "['Goleador', 'Sconosciuta']",
+                None,
+                ["Panchinaro", "Fuori lista"],
+            ],
+            "Nuovo acquisto": [True, False, np.nan, False, True, False],
+            "Consigliato prossima giornata": [False, True, False, np.nan, True, False],
+            "Infortunato": [False, False, True, False, np.nan, False],
+            "Trend": ["UP", "DOWN", "STABLE", np.nan, "UP", "UP"],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "senza",
+    [
+        [],
+        ["Trend"],
+        ["Nuovo acquisto", "Consigliato prossima giornata", "Infortunato"],
+        ["Skills"],
+    ],
+    ids=["all columns", "no Trend", "no flags", "no Skills"],
+)
+def test_fpedia_matches_row_by_row(senza):
+    df = _giocatori().drop(columns=senza)
+    atteso = benchmark._calcola_convenienza_fpedia_legacy(df.copy())
+    risultato = convenienza_calculator.calcola_convenienza_fpedia(df.copy())
+    for colonna in INDICI:
+        pd.testing.assert_series_equal(
+            risultato[colonna].astype(float), atteso[colonna].astype(float)
+        )
+
+
+def test_fpedia_trend_storico_overrides_trend():
+    df = _giocatori().assign(Trend="DOWN")
+    df["Trend storico"] = ["UP", np.nan, "UP", "DOWN", np.nan, "UP"]
+    atteso = benchmark._calcola_convenienza_fpedia_legacy(df.copy())
+    risultato = convenienza_calculator.calcola_convenienza_fpedia(df.copy())
+    pd.testing.assert_series_equal(risultato["Convenienza"], atteso["Convenienza"])
+
+
+def test_fstats_batch_zero_maximum_scores_zero():
+    df = benchmark._giocatori_fstats_sintetici(10).assign(
+        goals=0,
+        assists=0,
+        xgFromOpenPlays=0,
+        xA=0,
+        yellowCards=0,
+        redCards=0,
+        fanta_avg=0,
+    )
+    pesi = np.array([list(convenienza_calculator.PESI_FSTATS.values())])
+    with np.errstate(all="raise"):
+        punteggi = convenienza_calculator.convenienza_fstats_batch(df, pesi)
+    singolo = convenienza_calculator.calcola_convenienza_FSTATS(df.copy())
+    np.testing.assert_array_equal(punteggi[:, 0], np.zeros(len(df)))
+    np.testing.assert_array_equal(singolo["Convenienza"].to_numpy(), punteggi[:, 0])
+
+
+def test_fstats_homonyms_keep_one_row_each():
+    df = benchmark._giocatori_fstats_sintetici(12)
+    df.index = df.index * 10  # Non-default index, kept as is
+    unici = convenienza_calculator.calcola_convenienza_FSTATS(df.copy())
+
+    omonimi = df.copy()
+    omonimi.loc[omonimi.index[1], "Nome"] = omonimi["Nome"].iloc[0]
+    risultato = convenienza_calculator.calcola_convenienza_FSTATS(omonimi.copy())
+
+    assert len(risultato) == len(df)
+    pd.testing.assert_index_equal(risultato.index, df.index)
+    pd.testing.assert_series_equal(
+        risultato["fantacalcioPlayerId"], df["fantacalcioPlayerId"]
+    )
+    for colonna in INDICI:
+        pd.testing.assert_series_equal(risultato[colonna], unici[colonna])
+
+
+def test_fstats_matches_join_version_with_unique_names():
+    df = benchmark._giocatori_fstats_sintetici(12)
+    atteso = benchmark._calcola_convenienza_fstats_legacy(df.copy())
+    risultato = convenienza_calculator.calcola_convenienza_FSTATS(df.copy())
+    for colonna in INDICI:
+        pd.testing.assert_series_equal(
+            risultato[colonna].astype(float), atteso[colonna].astype(float)
+        )
@@ -0,0 +1,34 @@
+# tests/test_data_processor.py
+import os
+
+import pandas as pd
+
+import config
+import data_processor
+
+
+def _partizione(anno, nomi):
+    path = config.players_csv(anno)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame(
+        {
+            "name": nomi,
+            "fantacalcioPosition": "A",
+            "team": "{'id': 1, 'name': 'Milan'}",
+            "fantacalcioRanking": 6.5,
+            "appearances": 10,
+        }
+    ).to_csv(path, sep=";", index=False)
+
+
+def test_load_dataframes_reads_only_requested_seasons(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "FSTATS_DIR", str(tmp_path / "fstats"))
+    monkeypatch.setattr(config, "GIOCATORI_CSV", str(tmp_path / "_giocatori.csv"))
+    _partizione(2022, ["A", "B"])
+    _partizione(2023, ["C"])
+    _partizione(2024, ["D", "E", "F"])
+
+    _, df = data_processor.load_dataframes(vista="inspect", stagioni=[2022, 2024])
+
+    assert df["name"].tolist() == ["A", "B", "D", "E", "F"]
+    assert df["Stagione"].tolist() == [2022, 2022, 2024, 2024, 2024]
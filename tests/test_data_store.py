@@ -0,0 +1,44 @@
+# tests/test_data_store.py
+import pytest
+
+import data_store
+
+pyarrow = pytest.importorskip("pyarrow")
+
+
+def _giocatori(n):
+    for i in range(n):
+        yield {
+            "Nome": f"GIOCATORE {i}",
+            "Punteggio": str(50 + i % 10),
+            "Skills": ["Titolare"] if i % 2 else [],
+            "Infortunato": i % 3 == 0,
+            "Extra": "1" if i < 5 else "2.5",
+        }
+
+
+def test_write_fpedia_in_row_groups(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, "PARQUET_BATCH", 4)
+    csv_path = str(tmp_path / "_giocatori.csv")
+    tipi = data_store.fpedia_types(_giocatori(10))
+    data_store.write_fpedia(_giocatori(10), csv_path, tipi)
+
+    path = data_store.parquet_path(csv_path)
+    assert pyarrow.parquet.ParquetFile(path).num_row_groups == 3
+    df = data_store.read_parquet(path)
+    assert list(df.columns) == ["Nome", "Punteggio", "Skills", "Infortunato", "Extra"]
+    assert df["Punteggio"].dtype == "int64"
+    assert df["Extra"].dtype == "float64"
+    assert df["Skills"].tolist()[:2] == [[], ["Titolare"]]
+    assert df["Infortunato"].tolist() == [i % 3 == 0 for i in range(10)]
+
+
+def test_write_fpedia_widens_non_integral_int_columns(tmp_path):
+    giocatori = [{"Nome": "A", "Punteggio": "60"}, {"Nome": "B", "Punteggio": "62.5"}]
+    csv_path = str(tmp_path / "_giocatori.csv")
+    tipi = data_store.fpedia_types(giocatori)
+    assert tipi["Punteggio"] == "float64"
+    data_store.write_fpedia(giocatori, csv_path, tipi)
+
+    df = data_store.read_parquet(data_store.parquet_path(csv_path))
+    assert df["Punteggio"].tolist() == [60.0, 62.5]
@@ -0,0 +1,46 @@
+# tests/test_fpedia_parser.py
+import pytest
+
+import benchmark
+import fpedia_parser
+
+PAGINE = benchmark.pagine_sintetiche()
+
+
+@pytest.mark.parametrize("pagina", PAGINE, ids=range(len(PAGINE)))
+def test_spec_matches_legacy_parser(pagina):
+    assert fpedia_parser.parse_attributi_giocatore(
+        pagina, "html.parser"
+    ) == benchmark._parse_attributi_giocatore_legacy(pagina)
+
+
+def test_pages_cover_optional_fields():
+    risultati = [
+        fpedia_parser.parse_attributi_giocatore(p, "html.parser") for p in PAGINE
+    ]
+    assert {r["Trend"] for r in risultati} == {"UP", "DOWN", "STABLE"}
+    assert {r["Consigliato prossima giornata"] for r in risultati} == {True, False}
+    assert {r["Infortunato"] for r in risultati} == {True, False}
+    assert {r["Nuovo acquisto"] for r in risultati} == {True, False}
+    assert any(not r["Skills"] for r in risultati)
+    assert any("Sconosciuta" in r["Skills"] for r in risultati)
+
+
+@pytest.mark.parametrize("backend", fpedia_parser.BACKENDS)
+def test_backends_match_html_parser(backend):
+    if backend != "html.parser":
+        pytest.importorskip(backend)
+    for pagina in PAGINE:
+        assert fpedia_parser.parse_attributi_giocatore(
+            pagina, backend
+        ) == fpedia_parser.parse_attributi_giocatore(pagina, "html.parser")
+
+
+def test_parse_in_pool_matches_inline_parse():
+    fpedia_parser.start_pool()
+    try:
+        assert fpedia_parser.parse_in_pool(PAGINE[0]) == (
+            fpedia_parser.parse_attributi_giocatore(PAGINE[0])
+        )
+    finally:
+        fpedia_parser.shutdown_pool()
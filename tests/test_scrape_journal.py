@@ -0,0 +1,50 @@
+# tests/test_scrape_journal.py
+import json
+import os
+
+import pytest
+
+import config
+import data_retriever
+import fpedia_parser
+from scrape_journal import DeadLetterFile
+
+FALLITI = [f"https://example.org/giocatore-{i}" for i in range(3)]
+
+
+@pytest.fixture
+def dead_letter(tmp_path, monkeypatch):
+    path = str(tmp_path / "_giocatori_failed.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for url in FALLITI:
+            f.write(json.dumps({"url": url, "attempts": 3}) + "\n")
+    monkeypatch.setattr(config, "GIOCATORI_FAILED", path)
+    monkeypatch.setattr(config, "GIOCATORI_CSV", str(tmp_path / "_giocatori.csv"))
+    monkeypatch.setattr(config, "GIOCATORI_JOURNAL", str(tmp_path / "_giocatori.jsonl"))
+    monkeypatch.setattr(config, "HTML_ARCHIVE_ENABLED", False)
+    monkeypatch.setattr(config, "HTTP_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "PARSER_PROCESSES", 0)
+    return DeadLetterFile(path)
+
+
+def test_completed_run_replaces_failures(dead_letter):
+    dead_letter.open()
+    assert dead_letter.urls() == FALLITI  # Untouched while the run is going
+    dead_letter.append(FALLITI[1], 3, TimeoutError("timed out"))
+    dead_letter.close(completed=True)
+    assert dead_letter.urls() == [FALLITI[1]]
+
+
+def test_interrupted_retry_keeps_failures(dead_letter, monkeypatch):
+    def interrotto(urls, esiti, controller):
+        # One page fails again, then the run is interrupted
+        esiti.on_failure(next(iter(urls)), 3, ConnectionError("reset"))
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(data_retriever, "_scrape_giocatori_threaded", interrotto)
+    with pytest.raises(KeyboardInterrupt):
+        data_retriever.scrape_fpedia(retry_failed=True)
+    fpedia_parser.shutdown_pool()
+
+    assert dead_letter.urls() == FALLITI
+    assert not os.path.exists(dead_letter.path + ".tmp")